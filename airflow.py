@@ -0,0 +1,186 @@
+"""
+Airflow calculations for Testing and Commissioning canopies
+Computes module flowrates, totals and percentage of design for every canopy in one NumPy pass
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from equipment_config import CANOPY_K_FACTOR_TABLES, EXTRACT_K_FACTOR_TABLES, SUPPLY_K_FACTOR_TABLES
+
+# Water wash hoods are measured with an anemometer across the opening (QE = V × L × W)
+ANEMOMETER_MODELS = frozenset(['CMWF', 'CMWI', 'CMW-MUAP-CJ', 'CMW-CJ'])
+# Models with a supply air plenum
+SUPPLY_MODELS = frozenset(['KVF', 'UVF', 'CMWF', 'CMW-MUAP-CJ', 'KVD', 'KVV'])
+# Water wash hood opening width in meters
+OPENING_WIDTH_M = 0.09
+DEFAULT_OPENING_LENGTH_MM = 1800
+
+# Per-module arrays (one entry per module, in canopy order)
+ModuleFlows = namedtuple('ModuleFlows', ['flowrate_m3h', 'flowrate_m3s', 'percentage'])
+# Sums over a canopy's modules; percentage is of the total design flowrate
+AirflowTotals = namedtuple('AirflowTotals', ['flowrate_m3h', 'flowrate_m3s', 'design_ls', 'percentage'])
+CanopyAirflow = namedtuple('CanopyAirflow', ['extract', 'supply', 'extract_total', 'supply_total'])
+
+
+def _compile_extract_table(table):
+    """Dense array indexed by KSA filter count, zero where the table has no entry"""
+    k_factors = np.zeros(max(table) + 1)
+    k_factors[list(table)] = list(table.values())
+    return k_factors
+
+
+# Lookup arrays built once from the equipment_config tables
+EXTRACT_K_FACTORS = {name: _compile_extract_table(table) for name, table in EXTRACT_K_FACTOR_TABLES.items()}
+# name -> (hood lengths, K-Factors), sorted by length
+SUPPLY_K_FACTORS = {name: tuple(np.array(sorted(table), dtype=float).T) for name, table in SUPPLY_K_FACTOR_TABLES.items()}
+
+
+def k_factor_table(model, section):
+    """Name of the 'extract' or 'supply' K-Factor table used by a canopy model"""
+    return CANOPY_K_FACTOR_TABLES.get(model, CANOPY_K_FACTOR_TABLES['default'])[section]
+
+
+def extract_k_factors(model, num_filters, with_uv=False):
+    """
+    Default extract K-Factors for a canopy's modules
+
+    Args:
+        model: Canopy model (selects the table, see CANOPY_K_FACTOR_TABLES)
+        num_filters: Sequence of KSA filter counts, one per module
+        with_uv: Use the UV table regardless of the model
+
+    Returns:
+        Array of K-Factors in m³/h, zero for filter counts that are not in the table
+    """
+    k_factors = EXTRACT_K_FACTORS['uv' if with_uv else k_factor_table(model, 'extract')]
+    counts = np.asarray(num_filters, dtype=float)
+    in_table = (counts >= 0) & (counts < len(k_factors)) & (counts == np.floor(counts))
+    return np.where(in_table, k_factors[np.where(in_table, counts, 0).astype(int)], 0.0)
+
+
+def supply_k_factors(model, hood_lengths):
+    """
+    Default supply K-Factors for a canopy's modules
+
+    Args:
+        model: Canopy model (selects the table, see CANOPY_K_FACTOR_TABLES)
+        hood_lengths: Sequence of hood lengths in meters, one per module
+
+    Returns:
+        Array of K-Factors in m³/h, interpolated and rounded to one decimal
+    """
+    lengths, k_factors = SUPPLY_K_FACTORS[k_factor_table(model, 'supply')]
+    hood_lengths = np.clip(np.asarray(hood_lengths, dtype=float), lengths[0], lengths[-1])
+    # Each length falls in the table interval (lengths[upper - 1], lengths[upper]]
+    upper = np.clip(np.searchsorted(lengths, hood_lengths), 1, len(lengths) - 1)
+    x1, x2 = lengths[upper - 1], lengths[upper]
+    y1, y2 = k_factors[upper - 1], k_factors[upper]
+    interpolated = y1 + (y2 - y1) * (hood_lengths - x1) / (x2 - x1)
+    # round() rather than np.round so halfway values round the same way as the published tables
+    return np.array([round(k_factor, 1) for k_factor in interpolated.tolist()])
+
+
+def get_extract_k_factor(num_filters, hood_type, with_uv=False):
+    """Get K-Factor for extract air based on number of KSA filters and hood type"""
+    return float(extract_k_factors(hood_type, [num_filters], with_uv)[0])
+
+
+def get_supply_k_factor(hood_length, hood_type=None):
+    """Get K-Factor for supply air based on hood length (H-555 table unless the model has its own)"""
+    return float(supply_k_factors(hood_type, [hood_length])[0])
+
+
+def _field(modules, field, default=0.0):
+    return np.array([module.get(field, default) for module in modules], dtype=float)
+
+
+def k_factor_flowrates(k_factors, readings_pa):
+    """
+    Flowrates from K-Factors and manometer readings (Qv = K √Pa)
+
+    Returns:
+        Array of m³/h, zero where the K-Factor or reading is not positive
+    """
+    measured = (k_factors > 0) & (readings_pa > 0)
+    return np.where(measured, k_factors * np.sqrt(np.where(measured, readings_pa, 0.0)), 0.0)
+
+
+def percent_of_design(flowrate_m3s, design_ls):
+    """Percentage of the design flowrate (L/s), zero where no design flowrate is set"""
+    return np.divide(flowrate_m3s, design_ls / 1000, out=np.zeros_like(flowrate_m3s),
+                     where=design_ls > 0) * 100
+
+
+def _section_flows(canopies, section):
+    """Compute every module of one section (extract or supply) across all canopies"""
+    modules = [module for canopy in canopies for module in canopy.get(section, [])]
+    owners = np.repeat(np.arange(len(canopies)), [len(canopy.get(section, [])) for canopy in canopies])
+
+    flowrate_m3h = k_factor_flowrates(_field(modules, 'k_factor'), _field(modules, 'tab_reading'))
+    flowrate_m3s = flowrate_m3h / 3600
+    if section == 'extract_data':
+        anemometer_canopies = np.array([canopy.get('model') in ANEMOMETER_MODELS for canopy in canopies],
+                                       dtype=bool)
+        uses_anemometer = anemometer_canopies[owners]
+        if uses_anemometer.any():
+            anemometer_m3s = (_field(modules, 'anemometer')
+                              * (_field(modules, 'length_opening', DEFAULT_OPENING_LENGTH_MM) / 1000)
+                              * OPENING_WIDTH_M)
+            flowrate_m3s = np.where(uses_anemometer, anemometer_m3s, flowrate_m3s)
+            flowrate_m3h = np.where(uses_anemometer, anemometer_m3s * 3600, flowrate_m3h)
+
+    design_ls = _field(modules, 'design_flowrate_ls')
+    flows = ModuleFlows(flowrate_m3h, flowrate_m3s, percent_of_design(flowrate_m3s, design_ls))
+
+    count = len(canopies)
+    total_m3h = np.bincount(owners, weights=flowrate_m3h, minlength=count)
+    total_design_ls = np.bincount(owners, weights=design_ls, minlength=count)
+    totals = AirflowTotals(
+        total_m3h,
+        np.bincount(owners, weights=flowrate_m3s, minlength=count),
+        total_design_ls,
+        np.divide(total_m3h, total_design_ls / 1000 * 3600, out=np.zeros(count),
+                  where=total_design_ls > 0) * 100
+    )
+    return flows, totals, np.cumsum([0] + [len(canopy.get(section, [])) for canopy in canopies])
+
+
+def calculate_airflow(canopies):
+    """
+    Calculate extract and supply airflow for all canopies
+
+    Extract modules of water wash hoods use the anemometer reading across the opening,
+    all other modules use the K-Factor and manometer reading.
+
+    Args:
+        canopies: List of canopy dictionaries with 'model', 'extract_data' and 'supply_data'
+
+    Returns:
+        List of CanopyAirflow, one per canopy, holding ModuleFlows arrays and AirflowTotals of floats
+    """
+    extract, extract_totals, extract_bounds = _section_flows(canopies, 'extract_data')
+    supply, supply_totals, supply_bounds = _section_flows(canopies, 'supply_data')
+
+    results = []
+    for i in range(len(canopies)):
+        extract_slice = slice(extract_bounds[i], extract_bounds[i + 1])
+        supply_slice = slice(supply_bounds[i], supply_bounds[i + 1])
+        results.append(CanopyAirflow(
+            extract=ModuleFlows(*(values[extract_slice] for values in extract)),
+            supply=ModuleFlows(*(values[supply_slice] for values in supply)),
+            extract_total=AirflowTotals(*(float(values[i]) for values in extract_totals)),
+            supply_total=AirflowTotals(*(float(values[i]) for values in supply_totals))
+        ))
+    return results
+
+
+def store_airflow(canopies, results):
+    """Write calculated flowrates and percentages back into the canopies' module dictionaries"""
+    for canopy, airflow in zip(canopies, results):
+        for section, flows in (('extract_data', airflow.extract), ('supply_data', airflow.supply)):
+            for module, m3h, m3s, percentage in zip(canopy.get(section, []), *flows):
+                module['flowrate_m3h'] = float(m3h)
+                module['flowrate_m3s'] = float(m3s)
+                module['percentage'] = float(percentage)
@@ -0,0 +1,256 @@
+"""
+Headless batch report generation
+Regenerates Word reports from saved report_data payloads (JSON files, a directory of them, or JSONL)
+
+Usage:
+    python batch_reports.py payloads/ more.jsonl --output reports/ --workers 4
+
+Payloads use the report_data shape built by the app. Photos and bitmap signatures, which are
+BytesIO objects in the app, are written in JSON as {"$file": "relative/path.jpg"} (relative to
+the payload file) or {"$base64": "..."}; stroke signatures (see signature.py) are plain JSON.
+Output files are named after the payload's 'report_id' when present, otherwise after the
+input file (and line number for JSONL); repeated names get a _2, _3, ... suffix. Payloads that
+cannot be read are reported as failed reports.
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+# report_type -> name of the builder in report_engine.py (same dispatch as the download button)
+REPORT_BUILDERS = {
+    'Technical Report': 'create_technical_report',
+    'Testing and Commissioning Report': 'create_testing_commissioning_report',
+    'General Service Report': 'create_general_service_report'
+}
+DEFAULT_REPORT_TYPE = 'Technical Report'
+# Report types with a streaming writer in report_engine.py (writes to a file without building the .docx in memory)
+REPORT_WRITERS = {
+    'Technical Report': 'write_technical_report'
+}
+
+
+class PayloadError(ValueError):
+    """A payload that could not be read (it is reported as a failed report)"""
+
+
+def _output_name(name):
+    """Make a payload name safe to use as a file name"""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(name)).strip('._') or 'report'
+
+
+def load_jobs(inputs):
+    """
+    Read report payloads from files, directories and JSONL files
+
+    Returns:
+        List of (name, payload, base_dir) tuples
+    """
+    jobs = []
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            paths = sorted(os.path.join(input_path, name) for name in os.listdir(input_path)
+                           if name.endswith(('.json', '.jsonl')))
+        else:
+            paths = [input_path]
+
+        for path in paths:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            base_dir = os.path.dirname(os.path.abspath(path))
+            try:
+                with open(path, 'r', encoding='utf-8') as payload_file:
+                    if path.endswith('.jsonl'):
+                        for line_number, line in enumerate(payload_file, 1):
+                            if line.strip():
+                                jobs.append(_load_payload(line, f"{stem}_{line_number:04d}", base_dir))
+                    else:
+                        jobs.append(_load_payload(payload_file.read(), stem, base_dir))
+            except (OSError, UnicodeDecodeError) as e:
+                jobs.append((_output_name(stem), PayloadError(f"{path}: {e}"), base_dir))
+    return jobs
+
+
+def _load_payload(text, default_name, base_dir):
+    """Parse one payload; unreadable ones become a PayloadError in place of the payload"""
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as e:
+        return _output_name(default_name), PayloadError(f"Invalid JSON: {e}"), base_dir
+    if not isinstance(payload, dict):
+        return _output_name(default_name), PayloadError("Payload is not a JSON object"), base_dir
+    return _output_name(payload.get('report_id') or default_name), payload, base_dir
+
+
+def _unique_names(jobs):
+    """Suffix repeated output names with _2, _3, ... so no report overwrites another"""
+    seen = set()
+    unique = []
+    for name, payload, base_dir in jobs:
+        candidate, number = name, 1
+        # Compared case-insensitively, as on case-insensitive file systems
+        while candidate.lower() in seen:
+            number += 1
+            candidate = f"{name}_{number}"
+        seen.add(candidate.lower())
+        unique.append((candidate, payload, base_dir))
+    return unique
+
+
+def decode_payload(value, base_dir):
+    """Turn {"$file": ...} and {"$base64": ...} markers into BytesIO objects"""
+    if isinstance(value, dict):
+        if set(value) == {'$file'}:
+            with open(os.path.join(base_dir, value['$file']), 'rb') as binary_file:
+                return io.BytesIO(binary_file.read())
+        if set(value) == {'$base64'}:
+            return io.BytesIO(base64.b64decode(value['$base64']))
+        return {key: decode_payload(item, base_dir) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_payload(item, base_dir) for item in value]
+    return value
+
+
+@contextmanager
+def atomic_output(path):
+    """Open a temporary file next to path that replaces path once the block completes"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        # mkstemp creates the file owner-only; use the usual permissions for the output
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        with os.fdopen(fd, 'w+b') as temp_file:
+            yield temp_file
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_atomic(path, content):
+    """Write bytes so readers never see a partially written file"""
+    with atomic_output(path) as output_file:
+        output_file.write(content)
+
+
+def _init_worker():
+    """Load the report builders once per process, keeping photo preprocessing serial (the batch is already parallel)"""
+    import photo_processing
+    photo_processing.PHOTO_WORKERS = 1
+    import report_engine  # noqa: F401
+
+
+def generate_report(job):
+    """
+    Build one report and write it to disk
+
+    Args:
+        job: Tuple (name, payload, base_dir, output_dir)
+
+    Returns:
+        Dictionary with name, output path, report type, seconds and error (None on success)
+    """
+    name, payload, base_dir, output_dir = job
+    report_type = payload.get('report_type', DEFAULT_REPORT_TYPE) if isinstance(payload, dict) else None
+    result = {'name': name, 'report_type': report_type, 'output': None, 'seconds': 0.0, 'error': None}
+    start = time.perf_counter()
+    try:
+        if isinstance(payload, PayloadError):
+            raise payload
+        builder_name = REPORT_BUILDERS.get(report_type)
+        if builder_name is None:
+            raise ValueError(f"Unknown report_type: {report_type}")
+
+        import report_engine
+        output_path = os.path.join(output_dir, f"{name}.docx")
+        writer_name = REPORT_WRITERS.get(report_type)
+        if writer_name is not None:
+            with atomic_output(output_path) as output_file:
+                getattr(report_engine, writer_name)(decode_payload(payload, base_dir), output_file)
+        else:
+            doc_bytes = getattr(report_engine, builder_name)(decode_payload(payload, base_dir))
+            write_atomic(output_path, doc_bytes.getvalue())
+        result['output'] = output_path
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['traceback'] = traceback.format_exc()
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_batch(jobs, output_dir, workers=None):
+    """
+    Generate all reports, in a process pool when workers > 1
+
+    Args:
+        jobs: List from load_jobs (repeated names are made unique)
+        output_dir: Directory for the .docx files (created if missing)
+        workers: Worker processes (defaults to the CPU count)
+
+    Returns:
+        List of result dictionaries from generate_report, in job order
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(name, payload, base_dir, output_dir) for name, payload, base_dir in _unique_names(jobs)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(tasks) <= 1:
+        # Serial batches keep the photo pool: photos are the only parallel work then
+        return [generate_report(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker) as pool:
+        return list(pool.map(generate_report, tasks))
+
+
+def format_summary(results, elapsed):
+    """Build the text summary printed at the end of a batch"""
+    failures = [result for result in results if result['error']]
+    lines = [f"{len(results) - len(failures)} of {len(results)} report(s) generated in {elapsed:.1f}s"]
+    if results:
+        slowest = max(results, key=lambda result: result['seconds'])
+        lines.append(f"Slowest: {slowest['name']} ({slowest['seconds']:.2f}s)")
+    if failures:
+        lines.append(f"{len(failures)} failure(s):")
+        lines.extend(f"  {result['name']}: {result['error']}" for result in failures)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate service reports from saved report_data payloads")
+    parser.add_argument('inputs', nargs='+', help="JSON files, directories of JSON files, or JSONL files")
+    parser.add_argument('-o', '--output', default='reports', help="Output directory (default: reports)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Print tracebacks of failed reports")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.inputs)
+    print(f"Generating {len(jobs)} report(s) into {args.output}...")
+
+    start = time.perf_counter()
+    results = run_batch(jobs, args.output, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        status = 'FAILED' if result['error'] else 'ok'
+        print(f"{status:6} {result['seconds']:6.2f}s  {result['name']} ({result['report_type'] or 'unreadable'})")
+        if result['error'] and args.verbose:
+            print(result['traceback'])
+
+    print(format_summary(results, elapsed))
+    return 1 if any(result['error'] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Precompiled index of the inspection checklists
+Maps (equipment type, item id) to checklist items so questions are found without walking the tree,
+and flattens each checklist into nodes so the visible questions are found in one linear scan
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from equipment_config import EQUIPMENT_TYPES, MARVEL_CHECKLIST
+
+# Index key used for the Marvel checklist shared by all equipment types
+MARVEL = 'MARVEL'
+
+# question/type/conditions come from the checklist item, parent_path is the ids of its ancestors
+ChecklistEntry = namedtuple('ChecklistEntry', ['question', 'type', 'conditions', 'parent_path', 'item'])
+
+# One question of a compiled checklist: key is its inspection_data key, parent the index of the node
+# whose answer shows it (-1 for top-level questions) and trigger that answer's condition key (e.g. 'no')
+ChecklistNode = namedtuple('ChecklistNode', ['key', 'item', 'parent', 'trigger', 'depth'])
+
+
+def _index_checklist(index, equipment_type, checklist_items, parent_path=()):
+    """Add checklist items and their follow-ups in depth-first order (first occurrence wins)"""
+    for item in checklist_items:
+        index.setdefault((equipment_type, item['id']), ChecklistEntry(
+            question=item.get('question'),
+            type=item.get('type'),
+            conditions=item.get('conditions', {}),
+            parent_path=parent_path,
+            item=item
+        ))
+        for condition in item.get('conditions', {}).values():
+            if 'follow_up' in condition:
+                _index_checklist(index, equipment_type, condition['follow_up'], parent_path + (item['id'],))
+
+
+def build_checklist_index(equipment_types=EQUIPMENT_TYPES, marvel_checklist=MARVEL_CHECKLIST):
+    """
+    Build the checklist index
+
+    Returns:
+        Tuple (index, item_ids) where index maps (equipment type, item id) to a ChecklistEntry
+        and item_ids maps each equipment type to the ids in its checklist, follow-ups included
+    """
+    index = {}
+    for equipment_type, config in equipment_types.items():
+        _index_checklist(index, equipment_type, config.get('checklist', []))
+    _index_checklist(index, MARVEL, marvel_checklist)
+
+    item_ids = {}
+    for equipment_type, item_id in index:
+        item_ids.setdefault(equipment_type, []).append(item_id)
+    return index, {equipment_type: tuple(ids) for equipment_type, ids in item_ids.items()}
+
+
+CHECKLIST_INDEX, CHECKLIST_ITEM_IDS = build_checklist_index()
+
+
+def compile_checklist(checklist_items, prefix=''):
+    """
+    Flatten a checklist into nodes in rendering order (every parent precedes its follow-ups)
+
+    Args:
+        checklist_items: Checklist from equipment_config
+        prefix: Prefix of the inspection_data keys (e.g. 'marvel_')
+
+    Returns:
+        Tuple of ChecklistNode
+    """
+    nodes = []
+    # Depth-first with an explicit stack of (items, parent index, trigger, depth), items reversed
+    stack = [(list(reversed(checklist_items)), -1, None, 0)]
+    while stack:
+        items, parent, trigger, depth = stack[-1]
+        if not items:
+            stack.pop()
+            continue
+        item = items.pop()
+        nodes.append(ChecklistNode(prefix + item['id'], item, parent, trigger, depth))
+        index = len(nodes) - 1
+        # Conditions are pushed last first so their follow-ups come out in declaration order
+        for answer_key, condition in reversed(list(item.get('conditions', {}).items())):
+            if condition.get('follow_up'):
+                stack.append((list(reversed(condition['follow_up'])), index, answer_key, depth + 1))
+    return tuple(nodes)
+
+
+COMPILED_CHECKLISTS = {equipment_type: compile_checklist(config.get('checklist', []))
+                       for equipment_type, config in EQUIPMENT_TYPES.items()}
+COMPILED_CHECKLISTS[MARVEL] = compile_checklist(MARVEL_CHECKLIST, prefix='marvel_')
+
+
+def answer_trigger(data):
+    """Condition key an inspection_data entry's answer selects ('' if unanswered)"""
+    answer = data.get('answer', '') if isinstance(data, dict) else ''
+    return answer.lower() if isinstance(answer, str) else ''
+
+
+def iter_visible_nodes(nodes, inspection_data):
+    """
+    Yield the indexes of the questions shown for the given answers, in rendering order
+
+    One pass in node order: a follow-up is visible when its parent is visible and the
+    parent's answer selects the follow-up's condition. Answers are read as the scan reaches
+    each node, so a form may store a question's answer before its follow-ups are checked.
+
+    Args:
+        nodes: Compiled checklist (see compile_checklist)
+        inspection_data: Equipment inspection_data (key -> {'answer': ..., 'comment': ...})
+    """
+    visible = [False] * len(nodes)
+    for index, node in enumerate(nodes):
+        if node.parent >= 0:
+            if not visible[node.parent]:
+                continue
+            if answer_trigger(inspection_data.get(nodes[node.parent].key)) != node.trigger:
+                continue
+        visible[index] = True
+        yield index
+
+
+def visible_nodes(nodes, inspection_data):
+    """List of the indexes of the visible questions (see iter_visible_nodes)"""
+    return list(iter_visible_nodes(nodes, inspection_data))
+
+
+@lru_cache(maxsize=64)
+def _checklist_with_marvel(equipment_type):
+    """Compiled checklist of a type followed by the Marvel questions (parent indexes shifted)"""
+    nodes = COMPILED_CHECKLISTS.get(equipment_type, ())
+    offset = len(nodes)
+    return nodes + tuple(node._replace(parent=node.parent + offset) if node.parent >= 0 else node
+                         for node in COMPILED_CHECKLISTS[MARVEL])
+
+
+@lru_cache(maxsize=128)
+def _checklist_keys(equipment_type, with_marvel):
+    """inspection_data keys of every question an equipment's checklist can show"""
+    if with_marvel:
+        return frozenset(node.key for node in _checklist_with_marvel(equipment_type))
+    return frozenset(node.key for node in COMPILED_CHECKLISTS.get(equipment_type, ()))
+
+
+def checklist_keys(equipment):
+    """inspection_data keys of every question of an equipment's compiled checklist, visible or not"""
+    return _checklist_keys(equipment.get('type'), bool(equipment.get('with_marvel', False)))
+
+
+def equipment_checklist(equipment):
+    """Compiled checklist of an equipment: its type's questions, then Marvel's if enabled"""
+    if equipment.get('with_marvel', False):
+        return _checklist_with_marvel(equipment.get('type'))
+    return COMPILED_CHECKLISTS.get(equipment.get('type'), ())
+
+
+def get_checklist_entry(equipment_type, item_id):
+    """
+    Look up a checklist item
+
+    Args:
+        equipment_type: Equipment type code (e.g. 'KVF') or MARVEL
+        item_id: Checklist item id
+
+    Returns:
+        ChecklistEntry or None if the item is not in that checklist
+    """
+    return CHECKLIST_INDEX.get((equipment_type, item_id))
+
+
+@lru_cache(maxsize=4096)
+def find_question(equipment_type, item_key):
+    """
+    Find the question text for an inspection_data key
+
+    Keys may carry prefixes (parent ids, 'marvel_'), so every run of key parts is tried,
+    longest first from the start of the key. Results are cached per (type, key).
+
+    Returns:
+        Question text or None if no part of the key is a checklist item
+    """
+    if item_key.startswith('marvel_'):
+        entry = CHECKLIST_INDEX.get((MARVEL, item_key[7:]))
+        if entry and entry.question:
+            return entry.question
+
+    parts = item_key.split('_')
+    for i in range(len(parts)):
+        for j in range(len(parts), i, -1):
+            entry = CHECKLIST_INDEX.get((equipment_type, '_'.join(parts[i:j])))
+            if entry and entry.question:
+                return entry.question
+    return None
+
+
+@lru_cache(maxsize=4096)
+def key_in_checklist(equipment_type, item_key):
+    """Return True if any item id of the equipment's checklist occurs in item_key (cached per type and key)"""
+    return any(item_id in item_key for item_id in CHECKLIST_ITEM_IDS.get(equipment_type, ()))
@@ -0,0 +1,154 @@
+"""
+Server-side draft store for shareable links
+Keeps the full form payload and its photos in SQLite under a short random ID
+"""
+
+import json
+import os
+import re
+import secrets
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+
+DRAFT_DB_PATH = os.environ.get('DRAFT_STORE_PATH', os.path.join('.drafts', 'drafts.sqlite3'))
+# Drafts expire after 14 days by default
+DEFAULT_TTL_SECONDS = 14 * 24 * 3600
+# A single draft (form data and photos) may use at most 100 MB
+DEFAULT_MAX_DRAFT_BYTES = 100 * 1024 * 1024
+# Oldest drafts are evicted once the store holds more than 2 GB
+DEFAULT_MAX_TOTAL_BYTES = 2 * 1024 * 1024 * 1024
+
+_DRAFT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,32}$')
+
+
+class DraftTooLargeError(ValueError):
+    """Raised when a draft exceeds the per-draft size quota"""
+
+
+class DraftStore:
+    """
+    SQLite store of shared drafts
+
+    Usage:
+        store = DraftStore()
+        draft_id = store.save(form_data, {'k0/e0/photo_lights_operational': photo_bytes})
+        form_data, blobs = store.load(draft_id)
+    """
+
+    def __init__(self, path=DRAFT_DB_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_draft_bytes=DEFAULT_MAX_DRAFT_BYTES, max_total_bytes=DEFAULT_MAX_TOTAL_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_draft_bytes = max_draft_bytes
+        self.max_total_bytes = max_total_bytes
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA foreign_keys = ON')
+        if not self._initialized:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS drafts (
+                    id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    payload BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS draft_blobs (
+                    draft_id TEXT NOT NULL REFERENCES drafts(id) ON DELETE CASCADE,
+                    name TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (draft_id, name)
+                );
+                CREATE INDEX IF NOT EXISTS drafts_created ON drafts(created_at);
+            ''')
+            self._initialized = True
+        return conn
+
+    def save(self, form_data, blobs=None):
+        """
+        Store a draft
+
+        Args:
+            form_data: JSON-serializable form data (see collect_form_data)
+            blobs: Optional dictionary of name -> bytes (photos)
+
+        Returns:
+            The new draft ID
+
+        Raises:
+            DraftTooLargeError: If the draft is larger than max_draft_bytes
+        """
+        blobs = blobs or {}
+        payload = zlib.compress(json.dumps(form_data, separators=(',', ':')).encode('utf-8'))
+        size = len(payload) + sum(len(data) for data in blobs.values())
+        if size > self.max_draft_bytes:
+            raise DraftTooLargeError(
+                f"Draft is {size / 1048576:.1f} MB, the limit is {self.max_draft_bytes / 1048576:.0f} MB")
+
+        now = time.time()
+        draft_id = secrets.token_urlsafe(9)
+        with closing(self._connect()) as conn, conn:
+            self._purge_expired(conn, now)
+            conn.execute('INSERT INTO drafts (id, created_at, expires_at, size, payload) VALUES (?, ?, ?, ?, ?)',
+                         (draft_id, now, now + self.ttl_seconds, size, payload))
+            conn.executemany('INSERT INTO draft_blobs (draft_id, name, data) VALUES (?, ?, ?)',
+                             [(draft_id, name, bytes(data)) for name, data in blobs.items()])
+            self._enforce_total_quota(conn, draft_id)
+        return draft_id
+
+    def load(self, draft_id, now=None):
+        """
+        Load a draft
+
+        Returns:
+            Tuple (form_data, blobs) or None if the draft does not exist or has expired
+        """
+        if not draft_id or not _DRAFT_ID_PATTERN.match(draft_id):
+            return None
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT payload FROM drafts WHERE id = ? AND expires_at > ?',
+                               (draft_id, now)).fetchone()
+            if row is None:
+                return None
+            blobs = dict(conn.execute('SELECT name, data FROM draft_blobs WHERE draft_id = ?', (draft_id,)))
+        return json.loads(zlib.decompress(row[0]).decode('utf-8')), blobs
+
+    def delete(self, draft_id):
+        """Remove a draft and its photos"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM drafts WHERE id = ?', (draft_id,))
+
+    def purge_expired(self, now=None):
+        """Remove expired drafts, returning how many were removed"""
+        with closing(self._connect()) as conn, conn:
+            return self._purge_expired(conn, time.time() if now is None else now)
+
+    def total_size(self):
+        """Return the stored size of all drafts in bytes"""
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COALESCE(SUM(size), 0) FROM drafts').fetchone()[0]
+
+    def _purge_expired(self, conn, now):
+        return conn.execute('DELETE FROM drafts WHERE expires_at <= ?', (now,)).rowcount
+
+    def _enforce_total_quota(self, conn, keep_id):
+        """Evict the oldest drafts until the store fits max_total_bytes"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM drafts').fetchone()[0]
+        if total <= self.max_total_bytes:
+            return
+        oldest = conn.execute('SELECT id, size FROM drafts WHERE id != ? ORDER BY created_at',
+                              (keep_id,)).fetchall()
+        for draft_id, size in oldest:
+            conn.execute('DELETE FROM drafts WHERE id = ?', (draft_id,))
+            total -= size
+            if total <= self.max_total_bytes:
+                break
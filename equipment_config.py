@@ -1736,4 +1736,33 @@ ECOLOGY_PPM_ITEMS = [
             "no": {"photo": True, "comment": True}
         }
     }
-]
\ No newline at end of file
+]
+# K-Factor tables (m³/h) for Testing and Commissioning airflow, from the hood documentation
+# Extract tables map the number of KSA filters to the K-Factor; other filter counts have no K-Factor
+EXTRACT_K_FACTOR_TABLES = {
+    # KVF/KVI standard hoods without UV
+    "standard": {1: 67.21, 2: 134.46, 3: 201.67, 4: 268.88, 5: 336.09, 6: 403.30},
+    # UVF/UVI hoods with UV
+    "uv": {1: 53.82, 2: 107.64, 3: 161.46, 4: 215.28, 5: 269.1, 6: 322.92}
+}
+
+# Supply tables map hood length (m) to the K-Factor; lengths in between are interpolated
+# and lengths outside the table use the first or last entry
+SUPPLY_K_FACTOR_TABLES = {
+    "H-555": [
+        (1.0, 121.7), (1.1, 133.9), (1.2, 146.1), (1.3, 158.2), (1.4, 170.4),
+        (1.5, 182.6), (1.6, 194.8), (1.7, 207.0), (1.8, 219.1), (1.9, 231.3),
+        (2.0, 243.3), (2.1, 255.5), (2.2, 267.7), (2.3, 279.9), (2.4, 292.0),
+        (2.5, 304.2), (2.6, 316.4), (2.7, 328.6), (2.8, 340.8), (2.9, 352.9),
+        (3.0, 365.1), (3.1, 377.3), (3.2, 389.5), (3.3, 401.7), (3.4, 413.8),
+        (3.5, 426.0), (3.6, 438.2), (3.7, 450.4), (3.8, 462.6), (3.9, 474.7),
+        (4.0, 486.9)
+    ]
+}
+
+# K-Factor tables used by each canopy model; models not listed use the default tables
+CANOPY_K_FACTOR_TABLES = {
+    "default": {"extract": "standard", "supply": "H-555"},
+    "UVF": {"extract": "uv", "supply": "H-555"},
+    "UVI": {"extract": "uv", "supply": "H-555"}
+}
@@ -0,0 +1,200 @@
+"""
+Typed inspection records
+Slotted records for kitchens, equipment, answers and photos, with conversion to and from the
+dict shape used by session state, drafts and share links (see collect_form_data/restore_form_data)
+
+Inspection data keys ('capture_jet_fan', 'marvel_fan_running', ...) are parsed once into an
+ItemPath, cached per key, so readers compare sections and item ids instead of re-splitting strings.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# Sections of an equipment's inspection data; '' is the equipment type's own checklist
+CHECKLIST_SECTION = ''
+MARVEL_SECTION = 'marvel'
+ALARM_SECTION = 'alarm'
+
+_SECTION_PREFIXES = {MARVEL_SECTION: 'marvel_', ALARM_SECTION: 'alarm_'}
+
+
+@lru_cache(maxsize=4096)
+def _trailing_ids(item_id):
+    """Every trailing run of the parts of an item id (legacy keys may carry parent ids)"""
+    parts = item_id.split('_')
+    return frozenset('_'.join(parts[i:]) for i in range(len(parts)))
+
+
+@dataclass(frozen=True, slots=True)
+class ItemPath:
+    """Place of an answer in an equipment's inspection: the section and the checklist item id"""
+
+    item_id: str
+    section: str = CHECKLIST_SECTION
+
+    @property
+    def key(self):
+        """inspection_data key of the item"""
+        return _SECTION_PREFIXES.get(self.section, '') + self.item_id
+
+    @property
+    def photo_key(self):
+        """Photos key of the item (numbered photos append _1, _2, ...)"""
+        return f"photo_{self.key}"
+
+    def ends_with_any(self, item_ids):
+        """True if the item id, or any trailing part of it, is one of item_ids"""
+        return not _trailing_ids(self.item_id).isdisjoint(item_ids)
+
+
+@lru_cache(maxsize=4096)
+def item_path(key):
+    """
+    Parse an inspection_data key
+
+    Args:
+        key: Key like 'capture_jet_fan' or 'marvel_fan_running'
+
+    Returns:
+        ItemPath (cached per key)
+    """
+    if key.startswith('marvel_'):
+        return ItemPath(key[7:], MARVEL_SECTION)
+    return ItemPath(key)
+
+
+def alarm_path(alarm_key):
+    """ItemPath of an alarm_details key like 'alarm_1'"""
+    return ItemPath(alarm_key[6:], ALARM_SECTION)
+
+
+@dataclass(slots=True)
+class Answer:
+    """Answer to one checklist item (text and number questions keep their value as the answer)"""
+
+    answer: object = ''
+    comment: str = ''
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('answer', ''), data.get('comment', ''))
+
+    def to_dict(self):
+        return {'answer': self.answer, 'comment': self.comment}
+
+
+@dataclass(slots=True)
+class Photo:
+    """Photo of an item; index is 0 for a single photo, or its number among several"""
+
+    path: ItemPath
+    index: int = 0
+    file: object = None
+
+    @property
+    def key(self):
+        """Photos key in the equipment dict shape"""
+        return f"{self.path.photo_key}_{self.index}" if self.index else self.path.photo_key
+
+    @classmethod
+    def from_key(cls, photo_key, photo_file, paths):
+        """
+        Parse a photos key against the item paths of its equipment
+
+        Args:
+            photo_key: Key like 'photo_capture_jet_fan' or 'photo_alarm_1_2'
+            photo_file: Photo file object (e.g. photo_store.PhotoRef)
+            paths: Dictionary mapping photo_key to ItemPath for the equipment's items
+
+        Returns:
+            Photo; keys of unknown items keep the whole key as their item id
+        """
+        if photo_key in paths:
+            return cls(paths[photo_key], 0, photo_file)
+        base, _, number = photo_key.rpartition('_')
+        if number.isdigit() and base in paths and not number.startswith('0'):
+            return cls(paths[base], int(number), photo_file)
+        return cls(ItemPath(photo_key[6:] if photo_key.startswith('photo_') else photo_key), 0, photo_file)
+
+
+@dataclass(slots=True)
+class Equipment:
+    """One piece of inspected equipment"""
+
+    type: str = ''
+    with_marvel: bool = False
+    location: str = ''
+    answers: dict = field(default_factory=dict)  # ItemPath -> Answer, in inspection order
+    alarm_details: dict = field(default_factory=dict)  # 'alarm_1' -> {'description': ...}
+    photos: list = field(default_factory=list)  # Photo
+    id: str = ''
+    other_data: dict = field(default_factory=dict)  # inspection_data values that are not answers, as they are
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from the session state dict shape"""
+        answers, other_data = {}, {}
+        for key, value in data.get('inspection_data', {}).items():
+            if isinstance(value, dict):
+                answers[item_path(key)] = Answer.from_dict(value)
+            else:
+                other_data[key] = value
+        alarm_details = {key: dict(value) for key, value in data.get('alarm_details', {}).items()}
+
+        paths = {path.photo_key: path for path in answers}
+        paths.update((alarm_path(key).photo_key, alarm_path(key)) for key in alarm_details)
+        photos = [Photo.from_key(key, photo_file, paths) for key, photo_file in data.get('photos', {}).items()]
+
+        return cls(data.get('type', ''), data.get('with_marvel', False), data.get('location', ''),
+                   answers, alarm_details, photos, data.get('id', ''), other_data)
+
+    def to_dict(self, include_photos=True):
+        """
+        Convert to the session state dict shape
+
+        Args:
+            include_photos: False for share links, which carry neither photos nor ids
+        """
+        inspection_data = {path.key: answer.to_dict() for path, answer in self.answers.items()}
+        inspection_data.update(self.other_data)
+        data = {
+            'type': self.type,
+            'with_marvel': self.with_marvel,
+            'location': self.location,
+            'inspection_data': inspection_data,
+            'alarm_details': {key: dict(value) for key, value in self.alarm_details.items()}
+        }
+        if include_photos:
+            data['id'] = self.id
+            data['photos'] = {photo.key: photo.file for photo in self.photos}
+        return data
+
+
+@dataclass(slots=True)
+class Kitchen:
+    """A kitchen and its equipment"""
+
+    name: str = ''
+    equipment: list = field(default_factory=list)  # Equipment
+    id: str = ''
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('name', ''),
+                   [Equipment.from_dict(equipment) for equipment in data.get('equipment_list', [])],
+                   data.get('id', ''))
+
+    def to_dict(self, include_photos=True):
+        """Convert to the session state dict shape (see Equipment.to_dict)"""
+        data = {
+            'name': self.name,
+            'equipment_list': [equipment.to_dict(include_photos) for equipment in self.equipment]
+        }
+        if include_photos:
+            data['id'] = self.id
+        return data
+
+
+def kitchens_from_dicts(kitchen_list):
+    """Typed kitchens of a session state kitchen_list"""
+    return [Kitchen.from_dict(kitchen) for kitchen in kitchen_list]
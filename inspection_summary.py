@@ -0,0 +1,219 @@
+"""
+Report summaries of inspected equipment
+Builds the per-equipment summary used by the reports and the collapsed equipment view, and keeps
+one per equipment up to date incrementally (EquipmentSummaries).
+
+Kept out of app.py: Streamlit runs the main script as a new module on every rerun, so a class
+defined there would not match the instance stored in st.session_state on the previous run.
+"""
+
+from checklist_index import checklist_keys, equipment_checklist, find_question, iter_visible_nodes, key_in_checklist
+from equipment_config import EQUIPMENT_TYPES
+from inspection_model import MARVEL_SECTION, item_path
+
+
+def find_question_text(equipment_type, item_key):
+    """Find the actual question text for a given item key"""
+    question = find_question(equipment_type, item_key)
+    if question:
+        return question
+    
+    # Fallback to formatted key
+    return item_key.replace('_', ' ').title()
+
+
+# Items excluded from No responses (these are not issues)
+EXCLUDE_FROM_NO = frozenset(['final_remarks', 'lights_ballast'])
+
+
+def group_photos_by_key(photos, item_keys):
+    """
+    Group photos under every item key their photo key starts with
+
+    Args:
+        photos: Equipment photos dictionary (photo key -> file)
+        item_keys: Inspection item keys photos can belong to
+
+    Returns:
+        Dictionary mapping item key to a list of (photo key, file) in photo order
+    """
+    grouped = {}
+    item_keys = set(item_keys)
+    # Only prefixes as long as some item key can match
+    key_lengths = sorted({len(key) for key in item_keys})
+    
+    for photo_key, photo_file in photos.items():
+        if not photo_key.startswith('photo_'):
+            continue
+        suffix = photo_key[6:]
+        for length in key_lengths:
+            if length > len(suffix):
+                break
+            if suffix[:length] in item_keys:
+                grouped.setdefault(suffix[:length], []).append((photo_key, photo_file))
+    
+    return grouped
+
+
+def summarize_equipment(equipment):
+    """Build the report summary of one equipment's inspection"""
+    equip_summary = {
+        'type': equipment['type'],
+        'type_name': EQUIPMENT_TYPES[equipment['type']]['name'],
+        'with_marvel': equipment.get('with_marvel', False),
+        'location': equipment.get('location', ''),
+        'yes_responses': [],
+        'no_responses': [],
+        'na_responses': [],
+        'photos_count': len(equipment.get('photos', {})),
+        'inspection_data': equipment.get('inspection_data', {}),
+        'photos': equipment.get('photos', {}),
+        'yes_photos': {},
+        'no_photos': {},
+        'na_photos': {},
+        'alarm_details': equipment.get('alarm_details', {})
+    }
+    
+    # Answers of follow-ups hidden by a later change of their question's answer are left out
+    inspection_data = equipment.get('inspection_data', {})
+    nodes = equipment_checklist(equipment)
+    shown_keys = {nodes[index].key for index in iter_visible_nodes(nodes, inspection_data)}
+    hidden_keys = checklist_keys(equipment) - shown_keys
+    
+    # Keep answers that belong to this equipment, in inspection order
+    answers = []
+    for key, data in inspection_data.items():
+        if not isinstance(data, dict) or key in hidden_keys:
+            continue
+        path = item_path(key)
+        if path.section == MARVEL_SECTION:
+            # Skip Marvel questions if Marvel is not enabled
+            if not equipment.get('with_marvel', False):
+                continue
+        elif not key_in_checklist(equipment['type'], key):
+            continue  # Skip this question as it doesn't belong to current equipment
+        answers.append((key, path, data))
+    
+    photos_by_key = group_photos_by_key(equipment.get('photos', {}), [key for key, _, _ in answers])
+    
+    for key, path, data in answers:
+        answer = data.get('answer', '')
+        
+        if answer == 'Yes':
+            responses, photos = equip_summary['yes_responses'], equip_summary['yes_photos']
+        elif answer == 'No':
+            # Only add to no_responses if it's not in the exclude list; keys might be like
+            # "lights_ballast" or "lights_ballast_ballast_issue", so any trailing part counts
+            if path.ends_with_any(EXCLUDE_FROM_NO):
+                continue
+            responses, photos = equip_summary['no_responses'], equip_summary['no_photos']
+        elif answer == 'N/A':
+            responses, photos = equip_summary['na_responses'], equip_summary['na_photos']
+        elif answer and answer not in ['', '0']:
+            # Text or number responses are shown with the Yes responses
+            responses, photos = equip_summary['yes_responses'], equip_summary['yes_photos']
+        else:
+            continue
+        
+        responses.append({
+            'item': key,
+            'question': find_question_text(equipment['type'], key),
+            'answer': answer,
+            'comment': data.get('comment', '')
+        })
+        photos.update(photos_by_key.get(key, ()))
+    
+    # For backward compatibility, keep issues_found as no_responses
+    equip_summary['issues_found'] = equip_summary['no_responses']
+    return equip_summary
+
+
+def _compact_summary(equip_summary):
+    """Answer and photo counts of a summarize_equipment result"""
+    return {
+        'type_name': equip_summary['type_name'],
+        'location': equip_summary['location'],
+        'with_marvel': equip_summary['with_marvel'],
+        'yes': len(equip_summary['yes_responses']),
+        'no': len(equip_summary['no_responses']),
+        'na': len(equip_summary['na_responses']),
+        'photos': equip_summary['photos_count']
+    }
+
+
+def compact_equipment_summary(equipment):
+    """
+    Count the answers and photos of one equipment, for the collapsed equipment view
+
+    Returns:
+        Dictionary with type_name, location, with_marvel and yes/no/na/photos counts,
+        or None if no equipment type is selected yet
+    """
+    if not equipment.get('type'):
+        return None
+    return _compact_summary(summarize_equipment(equipment))
+
+
+class EquipmentSummaries:
+    """
+    Report summaries of the session's equipment, kept up to date incrementally
+
+    The form marks an equipment dirty whenever one of its answers, comments, photos or
+    header fields changes (see app.set_equipment_value); only dirty equipment is summarized
+    again when a summary is read. Equipment objects that are replaced (e.g. restored from
+    a link) start dirty.
+    """
+
+    def __init__(self):
+        # id(equipment) -> [equipment, dirty, summary, compact summary]
+        self._entries = {}
+
+    def _entry(self, equipment):
+        entry = self._entries.get(id(equipment))
+        if entry is None or entry[0] is not equipment:
+            entry = self._entries[id(equipment)] = [equipment, True, None, None]
+        if entry[1]:
+            if equipment.get('type'):
+                entry[2] = summarize_equipment(equipment)
+                entry[3] = _compact_summary(entry[2])
+            else:
+                entry[2] = entry[3] = None
+            entry[1] = False
+        return entry
+
+    def mark_dirty(self, equipment):
+        """Rebuild this equipment's summary on the next read"""
+        entry = self._entries.get(id(equipment))
+        if entry is not None and entry[0] is equipment:
+            entry[1] = True
+
+    def summary(self, equipment):
+        """summarize_equipment result, or None if no equipment type is selected"""
+        return self._entry(equipment)[2]
+
+    def compact(self, equipment):
+        """compact_equipment_summary result"""
+        return self._entry(equipment)[3]
+
+    def totals(self, kitchen_list):
+        """
+        Inspection progress over all equipment
+
+        Returns:
+            Dictionary with equipment, yes, no, na and photos counts
+        """
+        totals = {'equipment': 0, 'yes': 0, 'no': 0, 'na': 0, 'photos': 0}
+        for kitchen in kitchen_list:
+            for equipment in kitchen.get('equipment_list', []):
+                compact = self.compact(equipment)
+                if compact is not None:
+                    totals['equipment'] += 1
+                    for field in ('yes', 'no', 'na', 'photos'):
+                        totals[field] += compact[field]
+        return totals
+
+    def prune(self, kitchen_list):
+        """Forget equipment that is no longer in the form"""
+        live = {id(equipment) for kitchen in kitchen_list for equipment in kitchen.get('equipment_list', [])}
+        for key in [key for key in self._entries if key not in live]:
+            del self._entries[key]
@@ -0,0 +1,480 @@
+"""
+Photo processing for report images
+Normalizes uploaded photos (orientation, size, metadata) before they are embedded in Word documents
+"""
+
+import contextlib
+import copy
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps, PngImagePlugin
+
+logger = logging.getLogger(__name__)
+
+# Photos are shown 2 inches wide in the report builders
+DEFAULT_PRINT_WIDTH_INCHES = 2.0
+# Pixels per inch kept for the printed width (2 in x 200 dpi = 400 px wide)
+DEFAULT_PRINT_DPI = 200
+DEFAULT_JPEG_QUALITY = 82
+# Number of normalized photos kept in memory so each upload is processed once
+NORMALIZED_CACHE_SIZE = 256
+# Worker processes used to preprocess a report's photos; 1 processes them serially
+PHOTO_WORKERS = int(os.environ.get('REPORT_PHOTO_WORKERS', os.cpu_count() or 1))
+
+# EXIF tag whose values 5-8 rotate the image by 90 degrees
+ORIENTATION_TAG = 0x0112
+
+_normalized_cache = OrderedDict()
+# Reports are built on the report queue's threads while the form reads the cache
+_cache_lock = threading.Lock()
+
+# Process pool shared by all reports, created on first use (see _photo_pool)
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+# Pool -> number of normalize_uploads calls using it; a replaced pool is shut down when this drops to 0
+_pool_leases = {}
+
+
+def read_photo_bytes(photo):
+    """
+    Return the raw bytes of a photo
+
+    Args:
+        photo: Streamlit UploadedFile, BytesIO, bytes or a file path
+    """
+    if isinstance(photo, (bytes, bytearray)):
+        return bytes(photo)
+    if isinstance(photo, str):
+        with open(photo, 'rb') as photo_file:
+            return photo_file.read()
+    if hasattr(photo, 'getvalue'):
+        return bytes(photo.getvalue())
+    photo.seek(0)
+    return photo.read()
+
+
+def _max_width(print_width_inches, dpi):
+    return max(1, int(round(print_width_inches * dpi)))
+
+
+def _target_size(size, max_width):
+    """Size after downscaling to max_width, keeping the aspect ratio (never upscales)"""
+    width, height = size
+    if width <= max_width:
+        return width, height
+    return max_width, max(1, int(round(height * max_width / width)))
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def normalize_photo(data, print_width_inches=DEFAULT_PRINT_WIDTH_INCHES,
+                    dpi=DEFAULT_PRINT_DPI, quality=DEFAULT_JPEG_QUALITY):
+    """
+    Apply EXIF orientation, downscale to the printed size and re-encode without metadata
+
+    Args:
+        data: Original image bytes
+        print_width_inches: Width the photo is shown at in the document
+        dpi: Target resolution for the printed width
+        quality: JPEG quality used for re-encoding
+
+    Returns:
+        Normalized image bytes (JPEG, or PNG for images with transparency)
+    """
+    max_width = _max_width(print_width_inches, dpi)
+
+    with Image.open(io.BytesIO(data)) as original:
+        # Let the JPEG decoder skip detail we would throw away anyway
+        original.draft('RGB', (max_width, max_width))
+        image = ImageOps.exif_transpose(original)
+
+        if image.width > max_width:
+            image = image.resize(_target_size(image.size, max_width), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        if _has_alpha(image):
+            image.save(output, format='PNG', optimize=True, dpi=(dpi, dpi))
+        else:
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            # No exif/icc arguments, so metadata is not carried over
+            image.save(output, format='JPEG', quality=quality, optimize=True, dpi=(dpi, dpi))
+
+    return output.getvalue()
+
+
+def placeholder_photo(data, key, print_width_inches=DEFAULT_PRINT_WIDTH_INCHES, dpi=DEFAULT_PRINT_DPI):
+    """
+    Blank image with the size and format normalize_photo will produce, read from the headers only
+
+    Args:
+        data: Original image bytes
+        key: Text stored in the placeholder so different photos never share an image part
+        print_width_inches, dpi: See normalize_photo
+
+    Returns:
+        Placeholder image bytes (JPEG, or PNG for images with transparency)
+
+    Raises:
+        OSError, ValueError: If the image headers cannot be read
+    """
+    max_width = _max_width(print_width_inches, dpi)
+    with Image.open(io.BytesIO(data)) as original:
+        # draft() only changes the decoder scale, so the size matches normalize_photo without decoding
+        original.draft('RGB', (max_width, max_width))
+        width, height = original.size
+        if original.getexif().get(ORIENTATION_TAG) in (5, 6, 7, 8):
+            width, height = height, width
+        size = _target_size((width, height), max_width)
+        output = io.BytesIO()
+        if _has_alpha(original):
+            info = PngImagePlugin.PngInfo()
+            info.add_text('placeholder', key)
+            Image.new('LA', size).save(output, format='PNG', pnginfo=info)
+        else:
+            Image.new('L', size).save(output, format='JPEG', quality=1, comment=key)
+    return output.getvalue()
+
+
+class PhotoStats:
+    """Size accounting for the photos embedded in one report"""
+
+    def __init__(self):
+        self.photos = 0
+        self.original_bytes = 0
+        self.normalized_bytes = 0
+        # Distinct images embedded; repeated photos reference an existing image part
+        self.images = 0
+
+    def add(self, original_size, normalized_size):
+        self.photos += 1
+        self.original_bytes += original_size
+        self.normalized_bytes += normalized_size
+
+    def summary(self):
+        """Human readable before/after summary"""
+        summary = (f"{self.photos} photo(s): {self.original_bytes / 1048576:.1f} MB -> "
+                   f"{self.normalized_bytes / 1048576:.1f} MB")
+        if self.images and self.images < self.photos:
+            summary += f" ({self.images} distinct)"
+        return summary
+
+
+def _normalize_or_original(data, print_width_inches, dpi, quality):
+    """Normalize image bytes, falling back to the original bytes if they cannot be decoded"""
+    try:
+        return normalize_photo(data, print_width_inches, dpi, quality)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not normalize photo, embedding original: %s", e)
+        return data
+
+
+def _normalize_job(job):
+    """Process pool entry point: job is (data, print_width_inches, dpi, quality)"""
+    return _normalize_or_original(*job)
+
+
+@contextlib.contextmanager
+def _photo_pool(workers):
+    """
+    Lease the shared process pool, with at least the given number of workers
+
+    A pool replaced by a bigger one, or dropped after breaking, is only shut down once its last
+    lease ends, so no report submits photos to a pool another report has shut down.
+
+    Workers are started with forkserver (spawn where unavailable): forking the threaded
+    Streamlit server could copy locks held by other threads into the children.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                _retire_pool(_pool)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        pool = _pool
+        _pool_leases[pool] = _pool_leases.get(pool, 0) + 1
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            _pool_leases[pool] -= 1
+            if not _pool_leases[pool]:
+                del _pool_leases[pool]
+                if pool is not _pool:
+                    pool.shutdown(wait=False)
+
+
+def _retire_pool(pool):
+    """Shut down a pool that is no longer shared, now or when its last lease ends (call with _pool_lock held)"""
+    if pool not in _pool_leases:
+        pool.shutdown(wait=False)
+
+
+def shutdown_photo_pool():
+    """Stop the shared process pool (it is created again when needed)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+
+def _discard_photo_pool(pool):
+    """Drop a broken pool so the next report starts a new one"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_workers = None, 0
+            _retire_pool(pool)
+
+
+def _cache_get(key):
+    with _cache_lock:
+        normalized = _normalized_cache.get(key)
+        if normalized is not None:
+            _normalized_cache.move_to_end(key)
+        return normalized
+
+
+def _cache_put(key, normalized):
+    with _cache_lock:
+        _normalized_cache[key] = normalized
+        while len(_normalized_cache) > NORMALIZED_CACHE_SIZE:
+            _normalized_cache.popitem(last=False)
+
+
+def normalize_upload(photo, stats=None, print_width_inches=DEFAULT_PRINT_WIDTH_INCHES,
+                     dpi=DEFAULT_PRINT_DPI, quality=DEFAULT_JPEG_QUALITY):
+    """
+    Normalize an uploaded photo, reusing earlier results for identical uploads
+
+    Args:
+        photo: Photo in any form accepted by read_photo_bytes
+        stats: Optional PhotoStats updated with the before/after sizes
+        print_width_inches, dpi, quality: See normalize_photo
+
+    Returns:
+        Normalized image bytes (the original bytes if the image cannot be decoded)
+    """
+    data = read_photo_bytes(photo)
+    key = (hashlib.sha1(data).hexdigest(), print_width_inches, dpi, quality)
+
+    normalized = _cache_get(key)
+    if normalized is None:
+        normalized = _normalize_or_original(data, print_width_inches, dpi, quality)
+        _cache_put(key, normalized)
+
+    if stats is not None:
+        stats.add(len(data), len(normalized))
+    return normalized
+
+
+def normalize_uploads(photos, max_workers=None, print_width_inches=DEFAULT_PRINT_WIDTH_INCHES,
+                      dpi=DEFAULT_PRINT_DPI, quality=DEFAULT_JPEG_QUALITY):
+    """
+    Normalize many photos at once, decoding and resizing them in the shared process pool
+
+    Args:
+        photos: Photos in any form accepted by read_photo_bytes
+        max_workers: Number of worker processes (defaults to PHOTO_WORKERS, 1 runs serially)
+        print_width_inches, dpi, quality: See normalize_photo
+
+    Returns:
+        List of (original_size, normalized bytes) in the order of photos
+    """
+    workers = PHOTO_WORKERS if max_workers is None else max_workers
+    originals = [read_photo_bytes(photo) for photo in photos]
+    keys = [(hashlib.sha1(data).hexdigest(), print_width_inches, dpi, quality) for data in originals]
+
+    # Only decode each distinct, not yet cached image once
+    results = {}
+    pending = {}
+    for key, data in zip(keys, originals):
+        cached = _cache_get(key)
+        if cached is not None:
+            results[key] = cached
+        elif key not in pending:
+            pending[key] = (data, print_width_inches, dpi, quality)
+
+    if pending:
+        jobs = list(pending.values())
+        normalized = None
+        if workers > 1 and len(jobs) > 1:
+            pool = None
+            try:
+                with _photo_pool(workers) as pool:
+                    normalized = list(pool.map(_normalize_job, jobs))
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning("Photo process pool failed, processing serially: %s", e)
+                if pool is not None:
+                    _discard_photo_pool(pool)
+        if normalized is None:
+            normalized = [_normalize_job(job) for job in jobs]
+
+        for key, result in zip(pending, normalized):
+            results[key] = result
+            _cache_put(key, result)
+
+    return [(len(data), results[key]) for key, data in zip(keys, originals)]
+
+
+class PhotoBatch:
+    """
+    Photos of one report, preprocessed before the document is assembled
+
+    Photos with identical content are embedded once: later occurrences reference the
+    image part of the first one instead of adding and hashing the picture again.
+
+    Usage:
+        photos = PhotoBatch()
+        photos.prepare(all_photos_in_report)
+        photos.add(run, photo_file, Inches(2.0))
+    """
+
+    def __init__(self, max_workers=None, progress=None):
+        self.max_workers = max_workers
+        # Optional report_jobs.ReportProgress, told about every photo once it is processed
+        self.progress = progress
+        self.stats = PhotoStats()
+        self._prepared = {}
+        # (document part, normalized digest, width) -> (part, first InlineShape)
+        self._embedded = {}
+
+    def prepare(self, photos):
+        """Normalize all photos up front, in parallel when workers are available"""
+        photos = [photo for photo in photos if id(photo) not in self._prepared]
+        for photo, result in zip(photos, normalize_uploads(photos, self.max_workers)):
+            # Keep a reference to the photo so its id stays unique while the batch lives
+            self._prepared[id(photo)] = (photo, result, hashlib.sha1(result[1]).hexdigest())
+
+    def add(self, run, photo, width):
+        """Add a photo to a run, using the preprocessed result when available"""
+        prepared = self._prepared.get(id(photo))
+        if prepared is not None and width.inches == DEFAULT_PRINT_WIDTH_INCHES:
+            (original_size, normalized), digest = prepared[1:]
+            self.stats.add(original_size, len(normalized))
+        else:
+            normalized = normalize_upload(photo, self.stats, print_width_inches=width.inches)
+            digest = hashlib.sha1(normalized).hexdigest()
+        picture = self._embed(run, normalized, digest, width)
+        self._photos_done(1)
+        return picture
+
+    def _photos_done(self, count):
+        if self.progress is not None:
+            for _ in range(count):
+                self.progress.photo_done()
+
+    def _embed(self, run, normalized, digest, width):
+        part = run.part
+        key = (id(part), digest, int(width))
+        embedded = self._embedded.get(key)
+        if embedded is None:
+            picture = run.add_picture(io.BytesIO(normalized), width=width)
+            self._embedded[key] = (part, picture)
+            self.stats.images += 1
+            return picture
+
+        # Same drawing as the first occurrence (same image rId and size), with its own shape id
+        first = embedded[1]
+        inline = copy.deepcopy(first._inline)
+        inline.docPr.id = part.next_id
+        run._r.add_drawing(inline)
+        return type(first)(inline)
+
+
+class DeferredPhotoBatch(PhotoBatch):
+    """
+    Photos of a report that is written with docx_stream.save_streaming
+
+    add() embeds a small placeholder with the final size of each photo, so the document
+    tree never holds photo data; save_streaming swaps in the normalized photos a chunk at
+    a time while it writes the package.
+    """
+
+    def __init__(self, max_workers=None, progress=None):
+        super().__init__(max_workers, progress)
+        # placeholder digest -> (photo, print width in inches)
+        self.deferred = {}
+        # placeholder digest -> number of places it fills (reported done once it is normalized)
+        self.placements = {}
+
+    def prepare(self, photos):
+        """Nothing to do up front: photos are normalized while the package is written"""
+
+    def add(self, run, photo, width):
+        """Add a placeholder for a photo to a run"""
+        data = read_photo_bytes(photo)
+        digest = hashlib.sha1(data).hexdigest()
+        try:
+            placeholder = placeholder_photo(data, f"{digest}:{width.inches}", width.inches)
+        except (OSError, ValueError):
+            # Not an image we can size up front; embed it now like PhotoBatch does
+            return super().add(run, photo, width)
+        placeholder_digest = hashlib.sha1(placeholder).hexdigest()
+        self.deferred.setdefault(placeholder_digest, (photo, width.inches))
+        self.placements[placeholder_digest] = self.placements.get(placeholder_digest, 0) + 1
+        self.stats.add(len(data), 0)
+        return self._embed(run, placeholder, digest, width)
+
+    def normalized(self, placeholder_digests, chunk_size=None):
+        """
+        Normalize deferred photos, keeping at most one chunk of originals in memory
+
+        Args:
+            placeholder_digests: Digests of the placeholders to replace (keys of deferred)
+            chunk_size: Photos normalized together (defaults to 4 per worker)
+
+        Yields:
+            (placeholder digest, normalized bytes)
+        """
+        workers = PHOTO_WORKERS if self.max_workers is None else self.max_workers
+        chunk_size = chunk_size or max(1, workers) * 4
+        by_width = OrderedDict()
+        for placeholder_digest in placeholder_digests:
+            photo, width_inches = self.deferred[placeholder_digest]
+            by_width.setdefault(width_inches, []).append((placeholder_digest, photo))
+
+        for width_inches, entries in by_width.items():
+            for start in range(0, len(entries), chunk_size):
+                chunk = entries[start:start + chunk_size]
+                results = normalize_uploads([photo for _, photo in chunk], workers, width_inches)
+                # The chunk's photos are done once normalized, not when their placeholders went in
+                self._photos_done(sum(self.placements.get(digest, 1) for digest, _ in chunk))
+                for (placeholder_digest, _), (_, normalized) in zip(chunk, results):
+                    self.stats.normalized_bytes += len(normalized)
+                    yield placeholder_digest, normalized
+
+
+def add_report_photo(run, photo, width, stats=None):
+    """
+    Add a normalized photo to a document run
+
+    Args:
+        run: python-docx Run the picture is added to
+        photo: Photo in any form accepted by read_photo_bytes
+        width: Printed width as a docx Length (e.g. Inches(2.0))
+        stats: Optional PhotoStats for the report being built
+    """
+    normalized = normalize_upload(photo, stats, print_width_inches=width.inches)
+    return run.add_picture(io.BytesIO(normalized), width=width)
+
+
+def clear_photo_cache():
+    """Forget all normalized photos"""
+    with _cache_lock:
+        _normalized_cache.clear()
@@ -0,0 +1,165 @@
+"""
+Disk-backed store for uploaded photos
+Spools uploads to a per-session directory keyed by content hash, so session state only keeps small PhotoRef handles
+"""
+
+import hashlib
+import logging
+import os
+import secrets
+import shutil
+import tempfile
+import time
+import weakref
+
+from photo_processing import read_photo_bytes
+
+logger = logging.getLogger(__name__)
+
+PHOTO_SPOOL_ROOT = os.environ.get('PHOTO_SPOOL_DIR',
+                                  os.path.join(tempfile.gettempdir(), 'service-report-photos'))
+# Spools of sessions that ended without cleanup (e.g. a server crash) are removed after a day
+SPOOL_MAX_AGE_SECONDS = 24 * 3600
+
+# Stores of the sessions open in this process (their spools are never purged)
+_live_stores = weakref.WeakSet()
+
+
+class PhotoRef:
+    """
+    Handle to a spooled photo
+
+    Works anywhere an UploadedFile did: read_photo_bytes, PhotoBatch and the report cache
+    read the bytes from disk on demand through getvalue().
+    """
+
+    __slots__ = ('path', 'digest', 'name', 'size', '__weakref__')
+
+    def __init__(self, path, digest, name, size):
+        self.path = path
+        self.digest = digest
+        self.name = name
+        self.size = size
+
+    def getvalue(self):
+        """Return the photo bytes"""
+        with open(self.path, 'rb') as photo_file:
+            return photo_file.read()
+
+    def __repr__(self):
+        return f"PhotoRef({self.name!r}, {self.size} bytes, {self.digest[:12]})"
+
+
+class PhotoStore:
+    """
+    Per-session spool of uploaded photos, deduplicated by SHA-256 of their content
+
+    The spool directory is removed by clear(), or automatically when the store is
+    garbage collected with the session state it lives in.
+
+    Usage:
+        store = PhotoStore()
+        equipment['photos'][photo_key] = store.put(uploaded_file)
+    """
+
+    def __init__(self, session_id=None, root=PHOTO_SPOOL_ROOT):
+        self.directory = os.path.join(root, session_id or secrets.token_hex(8))
+        self._refs = {}     # digest -> PhotoRef
+        self._uploads = {}  # Streamlit upload file_id -> PhotoRef, so reruns skip hashing
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        _live_stores.add(self)
+
+    def __len__(self):
+        return len(self._refs)
+
+    def put(self, photo, name=None):
+        """
+        Spool a photo
+
+        Args:
+            photo: UploadedFile, BytesIO, bytes or PhotoRef
+            name: Optional display name (defaults to the upload's name)
+
+        Returns:
+            PhotoRef (the same handle for identical content)
+        """
+        if isinstance(photo, PhotoRef):
+            return photo
+        file_id = getattr(photo, 'file_id', None)
+        ref = self._uploads.get(file_id) if file_id is not None else None
+        if ref is not None and os.path.exists(ref.path):
+            self._touch()
+            return ref
+
+        data = read_photo_bytes(photo)
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.directory, digest)
+        # Checked on every put so photos are spooled again if the directory was removed
+        if os.path.exists(path):
+            self._touch()
+        else:
+            self._write(path, data)
+        ref = self._refs.get(digest)
+        if ref is None:
+            ref = PhotoRef(path, digest, name or getattr(photo, 'name', None) or digest[:12], len(data))
+            self._refs[digest] = ref
+        if file_id is not None:
+            self._uploads[file_id] = ref
+        return ref
+
+    def _touch(self):
+        """Mark the spool as in use, so purge_stale_spools in other processes keeps it"""
+        try:
+            os.utime(self.directory)
+        except OSError:
+            pass
+
+    def _write(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def total_size(self):
+        """Return the bytes spooled to disk"""
+        return sum(ref.size for ref in self._refs.values())
+
+    def clear(self):
+        """Remove the spool directory and forget all handles"""
+        self._refs.clear()
+        self._uploads.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def purge_stale_spools(root=PHOTO_SPOOL_ROOT, max_age_seconds=SPOOL_MAX_AGE_SECONDS, now=None):
+    """
+    Remove session spools that have not been used for max_age_seconds
+
+    Spools of stores still alive in this process are always kept, however long a session stays open.
+
+    Returns:
+        Number of spool directories removed
+    """
+    now = time.time() if now is None else now
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return 0
+
+    live = {os.path.abspath(store.directory) for store in list(_live_stores)}
+    removed = 0
+    for entry in entries:
+        try:
+            if os.path.abspath(entry.path) in live:
+                continue
+            if entry.is_dir() and now - entry.stat().st_mtime > max_age_seconds:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except OSError as e:
+            logger.warning("Could not check photo spool %s: %s", entry.path, e)
+    return removed
@@ -0,0 +1,136 @@
+"""
+Content-addressed cache for generated report documents
+Avoids rebuilding the .docx on every Streamlit rerun once a report is generated
+"""
+
+import hashlib
+import io
+from collections import OrderedDict
+from datetime import date, datetime
+
+from photo_store import PhotoRef
+
+
+def _update_digest(digest, value):
+    """Feed a report_data value into the digest using a stable, type-tagged encoding"""
+    if isinstance(value, dict):
+        digest.update(b'd%d:' % len(value))
+        for key in sorted(value, key=str):
+            _update_digest(digest, str(key))
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'l%d:' % len(value))
+        for item in value:
+            _update_digest(digest, item)
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8')
+        digest.update(b's%d:' % len(encoded))
+        digest.update(encoded)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        digest.update(b'b%d:' % len(value))
+        digest.update(value)
+    elif isinstance(value, PhotoRef):
+        # Spooled photos are addressed by their content hash, no need to read them back
+        _update_digest(digest, 'photo:' + value.digest)
+    elif hasattr(value, 'getvalue'):
+        # BytesIO signatures and Streamlit UploadedFile photos
+        _update_digest(digest, bytes(value.getvalue()))
+    elif hasattr(value, 'read') and hasattr(value, 'seek'):
+        position = value.tell()
+        value.seek(0)
+        content = value.read()
+        value.seek(position)
+        _update_digest(digest, content)
+    elif isinstance(value, (datetime, date)):
+        _update_digest(digest, value.isoformat())
+    else:
+        # None, bool, int, float and anything else with a stable repr
+        encoded = f"{type(value).__name__}:{value!r}".encode('utf-8')
+        digest.update(b'r%d:' % len(encoded))
+        digest.update(encoded)
+
+
+def report_cache_key(report_data, builder=None):
+    """
+    Compute a stable hash of report_data, photo and signature bytes included
+
+    Args:
+        report_data: Report data dictionary as passed to the report builders
+        builder: Optional builder function, so different report types never collide
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if builder is not None:
+        _update_digest(digest, f"{builder.__module__}.{builder.__qualname__}")
+    _update_digest(digest, report_data)
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """Small LRU cache of generated report bytes keyed by the content of report_data"""
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, report_data, builder):
+        """
+        Return the cached report for report_data, or None if it has not been built
+
+        Returns:
+            A fresh BytesIO positioned at the start of the document, or None
+        """
+        content = self._lookup(report_cache_key(report_data, builder))
+        return None if content is None else io.BytesIO(content)
+
+    def put(self, report_data, builder, content):
+        """Store report bytes built elsewhere (e.g. by a report_jobs.ReportQueue job)"""
+        self._store(report_cache_key(report_data, builder), content)
+
+    def get_or_build(self, report_data, builder):
+        """
+        Return the report for report_data, building it only when the content changed
+
+        Args:
+            report_data: Report data dictionary
+            builder: Report builder returning a BytesIO (e.g. create_technical_report)
+
+        Returns:
+            A fresh BytesIO positioned at the start of the document
+        """
+        key = report_cache_key(report_data, builder)
+        content = self._lookup(key)
+        if content is None:
+            content = builder(report_data).getvalue()
+            self._store(key, content)
+        return io.BytesIO(content)
+
+    def _lookup(self, key):
+        content = self._entries.get(key)
+        if content is None:
+            self.misses += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return content
+
+    def _store(self, key, content):
+        self._entries[key] = content
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached reports (counters are kept)"""
+        self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached reports"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
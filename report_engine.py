@@ -0,0 +1,1519 @@
+"""
+Report engine for the Service Reports application
+Builds the Technical, General Service and Testing & Commissioning Word reports without Streamlit,
+so the builders can be imported by the CLI tools and run in worker processes
+"""
+
+from datetime import datetime
+import io
+import logging
+import os
+import tempfile
+
+from docx import Document
+from docx.shared import Inches, Pt, RGBColor
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.enum.table import WD_TABLE_ALIGNMENT
+
+from utils import (style_heading, create_info_table, set_cell_margins, format_table_style_enhanced,
+                   remove_cell_borders, set_cell_background, set_cell_shading, set_row_height, set_table_borders,
+                   report_style, set_paragraph_styles, set_run_styles, HIGHLIGHT_STYLE, TABLE_HEADING_STYLE,
+                   TABLE_TEXT_STYLE, TC_CELL_STYLE, TC_HEADER_STYLE, TC_TABLE_STYLE)
+from photo_processing import DeferredPhotoBatch, PhotoBatch
+from docx_stream import save_streaming
+from airflow import calculate_airflow
+from report_jobs import ReportProgress
+from signature import add_signature_picture
+from report_template import letterhead_template
+
+logger = logging.getLogger(__name__)
+
+# Technical reports with this many photos are assembled with the streaming writer
+STREAMING_PHOTO_THRESHOLD = int(os.environ.get('REPORT_STREAMING_PHOTOS', 100))
+
+
+def create_report_document():
+    """Create a report document from the cached letterhead template, or a blank one with report margins"""
+    try:
+        if os.path.exists(letterhead_template.template_path):
+            # Template already has margins and header/footer set up
+            return letterhead_template.new_document()
+    except Exception as e:
+        logger.warning("Could not load template: %s. Using blank document.", e)
+    
+    # Fallback to creating a new document
+    doc = Document()
+    
+    # Set document margins
+    sections = doc.sections
+    for section in sections:
+        section.top_margin = Inches(0.75)
+        section.bottom_margin = Inches(0.75)
+        section.left_margin = Inches(0.75)
+        section.right_margin = Inches(0.75)
+        section.header_distance = Inches(0.5)
+        section.footer_distance = Inches(0.5)
+    return doc
+
+
+def collect_technical_report_photos(data):
+    """Return the alarm and supporting photos embedded in the technical report"""
+    photos = []
+    for kitchen in data.get('equipment_inspection', []):
+        for equip in kitchen.get('equipment', []):
+            if equip.get('alarm_details'):
+                photos.extend(photo for photo_key, photo in equip.get('photos', {}).items()
+                              if 'photo_alarm_' in photo_key)
+            for bucket in ('yes_photos', 'no_photos', 'na_photos'):
+                photos.extend((equip.get(bucket) or {}).values())
+    return photos
+
+
+def create_technical_report(data, progress=None):
+    """
+    Generate a Professional Technical Report Word document
+
+    Reports with STREAMING_PHOTO_THRESHOLD photos or more are written with the streaming
+    writer, so only the finished file is held in memory.
+
+    Args:
+        data: Report data dictionary
+        progress: Optional ReportProgress updated as sections and photos are added
+
+    Returns:
+        BytesIO with the .docx
+    """
+    photos = collect_technical_report_photos(data)
+    if len(photos) >= STREAMING_PHOTO_THRESHOLD:
+        with tempfile.TemporaryFile() as output:
+            write_technical_report(data, output, progress)
+            output.seek(0)
+            return io.BytesIO(output.read())
+
+    progress = progress or ReportProgress()
+    progress.expect_photos(len(photos))
+    # Decode and downscale every photo up front, in parallel, before assembling the document
+    progress.stage = 'Processing photos'
+    report_photos = PhotoBatch(progress=progress)
+    report_photos.prepare(photos)
+    doc = build_technical_report(data, report_photos, progress)
+    logger.info("Technical report photos: %s", report_photos.stats.summary())
+
+    # Save to bytes
+    progress.stage = 'Saving document'
+    doc_bytes = io.BytesIO()
+    doc.save(doc_bytes)
+    doc_bytes.seek(0)
+
+    return doc_bytes
+
+
+def write_technical_report(data, output, progress=None):
+    """
+    Write a Technical Report straight to a file, normalizing photos while the package is written
+
+    Args:
+        data: Report data dictionary
+        output: File path or writable binary file object
+        progress: Optional ReportProgress updated as sections and photos are added
+
+    Returns:
+        output
+    """
+    progress = progress or ReportProgress()
+    progress.expect_photos(len(collect_technical_report_photos(data)))
+    report_photos = DeferredPhotoBatch(progress=progress)
+    doc = build_technical_report(data, report_photos, progress)
+    progress.stage = 'Writing photos'
+    save_streaming(doc, report_photos, output)
+    logger.info("Technical report photos (streamed): %s", report_photos.stats.summary())
+    return output
+
+
+def build_technical_report(data, report_photos, progress=None):
+    """
+    Assemble the Technical Report document
+
+    Args:
+        data: Report data dictionary
+        report_photos: PhotoBatch (or DeferredPhotoBatch) that embeds the photos
+        progress: Optional ReportProgress updated at each section
+
+    Returns:
+        python-docx Document
+    """
+    progress = progress or ReportProgress()
+    
+    # Use template if available, otherwise create new document
+    doc = create_report_document()
+    
+    # Add some initial spacing
+    doc.add_paragraph()
+    doc.add_paragraph()
+    
+    # Add title manually to avoid underline
+    title_para = doc.add_paragraph()
+    title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title_run = title_para.add_run('TECHNICAL REPORT')
+    title_run.font.size = Pt(20)
+    title_run.font.color.rgb = RGBColor(31, 71, 136)  # Professional Blue
+    title_run.font.bold = True
+    
+    # Add report reference and date
+    ref_para = doc.add_paragraph()
+    ref_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    ref_run = ref_para.add_run(f"Report Date: {data.get('date', datetime.now().strftime('%B %d, %Y'))}")
+    ref_run.font.size = Pt(11)
+    ref_run.font.color.rgb = RGBColor(100, 100, 100)
+    
+    # Add minimal spacing
+    doc.add_paragraph()
+    
+    # GENERAL INFORMATION SECTION
+    progress.section('1. GENERAL INFORMATION')
+    general_heading = doc.add_heading('1. GENERAL INFORMATION', level=1)
+    style_heading(general_heading, level=1)
+    
+    # Create professional info table
+    general_info = [
+        ("Customer Name", data.get('customer_name', '')),
+        ("Project Name", data.get('project_name', '')),
+        ("Contact Person", data.get('contact_person', '')),
+        ("Location", data.get('outlet_location', '')),
+        ("Contact Number", data.get('contact_number', '')),
+        ("Visit Type", data.get('visit_type', '')),
+        ("Visit Classification", data.get('visit_class', ''))
+    ]
+    
+    create_info_table(doc, general_info)
+    doc.add_paragraph()  # Add spacing
+    
+    # EQUIPMENT INSPECTION SECTION
+    progress.section('2. EQUIPMENT INSPECTION DETAILS')
+    equipment_heading = doc.add_heading('2. EQUIPMENT INSPECTION DETAILS', level=1)
+    style_heading(equipment_heading, level=1)
+    
+    kitchen_summary = data.get('equipment_inspection', [])
+    
+    if kitchen_summary:
+        for kitchen_idx, kitchen in enumerate(kitchen_summary):
+            # Kitchen header
+            kitchen_title = doc.add_heading(f"Kitchen: {kitchen['name']}", level=2)
+            style_heading(kitchen_title, level=2)
+            
+            # Process equipment in this kitchen
+            for equip_idx, equip in enumerate(kitchen.get('equipment', [])):
+                # Equipment header (as sub-section under kitchen)
+                marvel_status = " (With Marvel)" if equip.get('with_marvel', False) else ""
+                equip_title = doc.add_heading(f"  {equip['type_name']}{marvel_status}", level=3)
+                style_heading(equip_title, level=3)
+            
+                # Equipment info
+                equip_info_para = doc.add_paragraph()
+                equip_info_para.add_run(f"Location: {equip['location']}").font.size = Pt(11)
+                
+                # Add alarm details if any alarms are registered
+                if equip.get('alarm_details'):
+                    doc.add_paragraph()
+                    alarm_heading = doc.add_paragraph()
+                    alarm_run = alarm_heading.add_run("Registered Alarms:")
+                    alarm_run.bold = True
+                    alarm_run.font.size = Pt(12)
+                    alarm_run.font.color.rgb = RGBColor(255, 0, 0)  # Red color for alarms
+                    
+                    for alarm_key, alarm_data in equip['alarm_details'].items():
+                        if alarm_data.get('description'):
+                            alarm_num = alarm_key.replace('alarm_', '')
+                            alarm_para = doc.add_paragraph()
+                            alarm_para.add_run(f"Alarm {alarm_num}: ").bold = True
+                            alarm_para.add_run(alarm_data['description']).font.size = Pt(11)
+                            alarm_para.paragraph_format.left_indent = Inches(0.5)
+                    
+                    # Add alarm photos
+                    alarm_photos = {}
+                    for photo_key, photo_file in equip.get('photos', {}).items():
+                        if 'photo_alarm_' in photo_key:
+                            alarm_photos[photo_key] = photo_file
+                    
+                    if alarm_photos:
+                        doc.add_paragraph()
+                        alarm_photos_para = doc.add_paragraph()
+                        alarm_photos_para.add_run("Alarm Photos:\n").bold = True
+                        
+                        # Group photos in pairs for side-by-side display
+                        photo_items = list(alarm_photos.items())
+                        for i in range(0, len(photo_items), 2):
+                            # Create a table for side-by-side photos
+                            photo_table = doc.add_table(rows=1, cols=2)
+                            photo_table.autofit = False
+                            
+                            # First photo
+                            photo_key, photo_file = photo_items[i]
+                            cell1 = photo_table.cell(0, 0)
+                            cell1_para = cell1.paragraphs[0]
+                            cell1_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                            
+                            # Add downscaled photo
+                            run1 = cell1_para.add_run()
+                            report_photos.add(run1, photo_file, Inches(2.0))
+                            
+                            # Add caption
+                            caption1 = cell1.add_paragraph()
+                            caption_text = photo_key.replace('photo_', '').replace('_', ' ').title()
+                            caption1.add_run(caption_text).font.size = Pt(9)
+                            caption1.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                            
+                            # Second photo (if exists)
+                            if i + 1 < len(photo_items):
+                                photo_key2, photo_file2 = photo_items[i + 1]
+                                cell2 = photo_table.cell(0, 1)
+                                cell2_para = cell2.paragraphs[0]
+                                cell2_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                                
+                                # Add downscaled photo
+                                run2 = cell2_para.add_run()
+                                report_photos.add(run2, photo_file2, Inches(2.0))
+                                
+                                # Add caption
+                                caption2 = cell2.add_paragraph()
+                                caption_text2 = photo_key2.replace('photo_', '').replace('_', ' ').title()
+                                caption2.add_run(caption_text2).font.size = Pt(9)
+                                caption2.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                            
+                            # Add spacing after photos
+                            doc.add_paragraph()
+                
+                # COMBINED INSPECTION FINDINGS TABLE
+                all_findings = []
+                
+                # Add positive findings
+                if equip.get('yes_responses'):
+                    for yes_item in equip['yes_responses']:
+                        question_text = yes_item.get('question', yes_item['item'].replace('_', ' ').title())
+                        # Use the actual answer value (could be "Yes" or text like "GOT")
+                        answer_text = yes_item.get('answer', 'YES')
+                        if yes_item['comment']:
+                            answer_text += f"\n{yes_item['comment']}"
+                        all_findings.append((question_text, answer_text))
+                
+                # Add issues (NO responses)
+                if equip.get('no_responses'):
+                    for no_item in equip['no_responses']:
+                        question_text = no_item.get('question', no_item['item'].replace('_', ' ').title())
+                        # Use the actual answer value
+                        answer_text = no_item.get('answer', 'NO')
+                        if no_item['comment']:
+                            answer_text += f"\n{no_item['comment']}"
+                        all_findings.append((question_text, answer_text))
+                
+                # Add N/A responses
+                if equip.get('na_responses'):
+                    for na_item in equip['na_responses']:
+                        question_text = na_item.get('question', na_item['item'].replace('_', ' ').title())
+                        # Use the actual answer value
+                        answer_text = na_item.get('answer', 'N/A')
+                        if na_item['comment']:
+                            answer_text += f"\n{na_item['comment']}"
+                        all_findings.append((question_text, answer_text))
+                
+                # Create combined table if there are any findings
+                if all_findings:
+                    doc.add_paragraph()
+                    findings_heading = doc.add_paragraph()
+                    findings_run = findings_heading.add_run("Inspection Findings:")
+                    findings_run.bold = True
+                    findings_run.font.size = Pt(12)
+                    
+                    create_info_table(doc, all_findings, col_widths=[4, 2.5])
+                
+                # Combine all photos below the table
+                all_photos = {}
+                if equip.get('yes_photos'):
+                    all_photos.update(equip['yes_photos'])
+                if equip.get('no_photos'):
+                    all_photos.update(equip['no_photos'])
+                if equip.get('na_photos'):
+                    all_photos.update(equip['na_photos'])
+                
+                # Add all photos if available
+                if all_photos:
+                    doc.add_paragraph()
+                    photos_para = doc.add_paragraph()
+                    photos_para.add_run("Supporting Photos:\n").bold = True
+                    
+                    # Group photos in pairs for side-by-side display
+                    photo_items = list(all_photos.items())
+                    for i in range(0, len(photo_items), 2):
+                        # Create a table for side-by-side photos
+                        photo_table = doc.add_table(rows=1, cols=2)
+                        photo_table.autofit = False
+                        
+                        # First photo
+                        photo_key, photo_file = photo_items[i]
+                        cell1 = photo_table.cell(0, 0)
+                        cell1_para = cell1.paragraphs[0]
+                        cell1_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                        
+                        # Add downscaled photo
+                        run1 = cell1_para.add_run()
+                        report_photos.add(run1, photo_file, Inches(2.0))
+                        
+                        # Add caption
+                        caption1 = cell1.add_paragraph()
+                        caption1.add_run(photo_key.replace('photo_', '').replace('_', ' ').title()).font.size = Pt(9)
+                        caption1.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                        
+                        # Second photo (if exists)
+                        if i + 1 < len(photo_items):
+                            photo_key2, photo_file2 = photo_items[i + 1]
+                            cell2 = photo_table.cell(0, 1)
+                            cell2_para = cell2.paragraphs[0]
+                            cell2_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                            
+                            # Add downscaled photo
+                            run2 = cell2_para.add_run()
+                            report_photos.add(run2, photo_file2, Inches(2.0))
+                            
+                            # Add caption
+                            caption2 = cell2.add_paragraph()
+                            caption2.add_run(photo_key2.replace('photo_', '').replace('_', ' ').title()).font.size = Pt(9)
+                            caption2.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                        
+                        # Add spacing after photos
+                        doc.add_paragraph()
+                
+                # If no issues found at all
+                if not equip.get('no_responses'):
+                    doc.add_paragraph()
+                    para = doc.add_paragraph()
+                    no_issues_run = para.add_run("No issues identified during inspection.")
+                    no_issues_run.font.size = Pt(11)
+                    no_issues_run.font.color.rgb = RGBColor(0, 128, 0)  # Green color
+                
+                # Add spacing between equipment in the same kitchen
+                if equip_idx < len(kitchen.get('equipment', [])) - 1:
+                    doc.add_paragraph()
+            
+            # Add spacing between kitchens
+            if kitchen_idx < len(kitchen_summary) - 1:
+                doc.add_paragraph()
+    else:
+        para = doc.add_paragraph()
+        para.add_run("No equipment inspection data available.").font.size = Pt(11)
+    
+    # WORK PERFORMED SECTION (only if filled)
+    section_number = 3
+    if data.get('work_performed'):
+        progress.section(f'{section_number}. JOB DETAILS')
+        work_heading = doc.add_heading(f'{section_number}. JOB DETAILS', level=1)
+        style_heading(work_heading, level=1)
+        
+        work_para = doc.add_paragraph()
+        work_text = work_para.add_run(data.get('work_performed', ''))
+        work_text.font.size = Pt(11)
+        work_para.paragraph_format.line_spacing = 1.5
+        work_para.paragraph_format.space_after = Pt(12)
+        section_number += 1
+    
+    # SPARE PARTS SECTION
+    spare_parts = data.get('spare_parts', [])
+    if spare_parts and any(part.get('name') for part in spare_parts):
+        progress.section(f'{section_number}. SPARE PARTS REQUIRED')
+        parts_heading = doc.add_heading(f'{section_number}. SPARE PARTS REQUIRED', level=1)
+        style_heading(parts_heading, level=1)
+        
+        # Create table for spare parts
+        parts_table = doc.add_table(rows=1, cols=3)
+        parts_table.allow_autofit = False
+        
+        # Set column widths
+        for cell in parts_table.columns[0].cells:
+            cell.width = Inches(0.8)
+        for cell in parts_table.columns[1].cells:
+            cell.width = Inches(4.5)
+        for cell in parts_table.columns[2].cells:
+            cell.width = Inches(1.2)
+        
+        # Header row
+        header_cells = parts_table.rows[0].cells
+        header_cells[0].text = 'S.No.'
+        header_cells[1].text = 'Spare Part Name'
+        header_cells[2].text = 'Quantity'
+        
+        # Style header
+        highlight_style = report_style(doc.part, HIGHLIGHT_STYLE)
+        for cell in header_cells:
+            set_run_styles(cell, highlight_style)
+            cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            
+            # Set background color
+            set_cell_shading(cell, '1f4788')
+        
+        # Add spare parts rows
+        serial_no = 1
+        for part in spare_parts:
+            if part.get('name'):  # Only add if part name is not empty
+                row = parts_table.add_row()
+                row.cells[0].text = str(serial_no)
+                row.cells[1].text = part.get('name', '')
+                row.cells[2].text = str(part.get('quantity', 1))
+                
+                # Center align serial number and quantity
+                row.cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                row.cells[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                
+                serial_no += 1
+        
+        # Apply professional table formatting
+        format_table_style_enhanced(parts_table)
+        
+        # Add spacing after table
+        doc.add_paragraph()
+        section_number += 1
+    else:
+        # Add note if no spare parts required
+        progress.section(f'{section_number}. SPARE PARTS REQUIRED')
+        no_parts_heading = doc.add_heading(f'{section_number}. SPARE PARTS REQUIRED', level=1)
+        style_heading(no_parts_heading, level=1)
+        
+        no_parts_para = doc.add_paragraph()
+        no_parts_text = no_parts_para.add_run('No spare parts required.')
+        no_parts_text.font.size = Pt(11)
+        no_parts_text.font.italic = True
+        no_parts_para.paragraph_format.space_after = Pt(12)
+        section_number += 1
+    
+    # RECOMMENDATIONS SECTION
+    if data.get('recommendations'):
+        progress.section(f'{section_number}. RECOMMENDATIONS')
+        rec_heading = doc.add_heading(f'{section_number}. RECOMMENDATIONS', level=1)
+        style_heading(rec_heading, level=1)
+        
+        rec_para = doc.add_paragraph()
+        rec_text = rec_para.add_run(data.get('recommendations', ''))
+        rec_text.font.size = Pt(11)
+        rec_para.paragraph_format.line_spacing = 1.5
+        rec_para.paragraph_format.space_after = Pt(12)
+        section_number += 1
+    
+    # Add page break before signatures
+    doc.add_page_break()
+    
+    # SIGNATURE SECTION
+    progress.section('ACKNOWLEDGMENT AND SIGNATURES')
+    sig_heading = doc.add_heading('ACKNOWLEDGMENT AND SIGNATURES', level=1)
+    style_heading(sig_heading, level=1)
+    
+    # Add acknowledgment text
+    ack_para = doc.add_paragraph()
+    ack_text = ack_para.add_run(
+        "The undersigned acknowledge that the service described in this report has been "
+        "completed satisfactorily and in accordance with the agreed specifications."
+    )
+    ack_text.font.size = Pt(10)
+    ack_text.font.italic = True
+    ack_para.paragraph_format.space_after = Pt(24)
+    
+    # Create signature table
+    sig_table = doc.add_table(rows=4, cols=2)
+    sig_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    
+    # Configure signature columns
+    for col in sig_table.columns:
+        for cell in col.cells:
+            cell.width = Inches(3)
+    
+    # Technician signature
+    sig_table.cell(0, 0).text = "Service Technician:"
+    
+    # Add signature image if available
+    if data.get('technician_signature'):
+        sig_cell = sig_table.cell(1, 0)
+        sig_para = sig_cell.paragraphs[0]
+        sig_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = sig_para.add_run()
+        add_signature_picture(run, data.get('technician_signature'), Inches(1.5))
+    else:
+        sig_table.cell(1, 0).text = "_" * 35
+    
+    sig_table.cell(2, 0).text = data.get('technician_name', '')
+    sig_table.cell(3, 0).text = f"Date: {datetime.now().strftime('%B %d, %Y')}"
+    
+    # Customer signature
+    sig_table.cell(0, 1).text = "Customer Representative:"
+    
+    # Add customer signature image if available
+    if data.get('customer_signature'):
+        sig_cell = sig_table.cell(1, 1)
+        sig_para = sig_cell.paragraphs[0]
+        sig_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = sig_para.add_run()
+        add_signature_picture(run, data.get('customer_signature'), Inches(1.5))
+    else:
+        sig_table.cell(1, 1).text = "_" * 35
+    
+    sig_table.cell(2, 1).text = data.get('customer_signatory', data.get('customer_name', ''))
+    sig_table.cell(3, 1).text = f"Date: {datetime.now().strftime('%B %d, %Y')}"
+    
+    # Style signature table
+    text_style = report_style(doc.part, TABLE_TEXT_STYLE)
+    for row in sig_table.rows:
+        for cell in row.cells:
+            cell.paragraphs[0].style = text_style
+            cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            set_cell_margins(cell, top=0.1, bottom=0.1)
+    
+    # Make labels bold
+    sig_table.cell(0, 0).paragraphs[0].runs[0].font.bold = True
+    sig_table.cell(0, 1).paragraphs[0].runs[0].font.bold = True
+    
+    # Add final note
+    doc.add_paragraph()
+    note_para = doc.add_paragraph()
+    note_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    note_text = note_para.add_run(
+        "This report is confidential and proprietary.\n"
+        "For service inquiries, please contact our Service Department."
+    )
+    note_text.font.size = Pt(9)
+    note_text.font.name = 'Arial'
+    note_text.font.color.rgb = RGBColor(128, 128, 128)
+    
+    return doc
+
+
+def create_general_service_report(data, progress=None):
+    """Generate a Professional General Service Report Word document"""
+    progress = progress or ReportProgress()
+    
+    # Use template if available, otherwise create new document
+    doc = create_report_document()
+    
+    # Get the default style and set font
+    try:
+        normal_style = doc.styles['Normal']
+        normal_style.font.name = 'Arial'
+        normal_style.font.size = Pt(11)
+    except:
+        pass
+    
+    # Set default font for headings
+    try:
+        for i in range(1, 4):
+            heading_style = doc.styles[f'Heading {i}']
+            heading_style.font.name = 'Arial'
+    except:
+        pass
+    
+    # Photos embedded in this report
+    report_photos = PhotoBatch(progress=progress)
+    
+    # Title
+    title = doc.add_heading('GENERAL SERVICE REPORT', level=0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    style_heading(title, level=0)
+    
+    # Add minimal spacing
+    doc.add_paragraph()
+    
+    # GENERAL INFORMATION SECTION
+    progress.section('1. GENERAL INFORMATION')
+    general_heading = doc.add_heading('1. GENERAL INFORMATION', level=1)
+    style_heading(general_heading, level=1)
+    
+    # Create professional info table (same style as Technical Report)
+    general_info = [
+        ("Customer Name", data.get('customer_name', '')),
+        ("Project Name", data.get('project_name', '')),
+        ("Contact Person", data.get('contact_person', '')),
+        ("Location", data.get('outlet_location', '')),
+        ("Contact Number", data.get('contact_number', '')),
+        ("Visit Type", data.get('visit_type', '')),
+        ("Visit Classification", data.get('visit_class', ''))
+    ]
+    
+    create_info_table(doc, general_info)
+    doc.add_paragraph()  # Add spacing
+    
+    # WORK PERFORMED SECTION
+    section_number = 2
+    progress.section(f'{section_number}. WORK PERFORMED')
+    work_heading = doc.add_heading(f'{section_number}. WORK PERFORMED', level=1)
+    style_heading(work_heading, level=1)
+    
+    work_performed_list = data.get('work_performed_list', [])
+    
+    if work_performed_list:
+        # Create a table for work performed items
+        work_table = doc.add_table(rows=1, cols=2)
+        work_table.allow_autofit = False
+        work_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+        
+        # Set column widths
+        work_table.columns[0].width = Inches(0.8)
+        work_table.columns[1].width = Inches(5.7)
+        
+        # Header row
+        header_cells = work_table.rows[0].cells
+        header_cells[0].text = 'S.No.'
+        header_cells[1].text = 'Work Performed Description'
+        
+        # Style header row to match Technical Report
+        heading_style = report_style(doc.part, TABLE_HEADING_STYLE)
+        text_style = report_style(doc.part, TABLE_TEXT_STYLE)
+        for i, cell in enumerate(header_cells):
+            set_paragraph_styles(cell, heading_style)
+            if i == 0:  # S.No. column
+                cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            else:  # Description column
+                cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            set_cell_background(cell, 'E8E8E8')
+        
+        # Add work items
+        for idx, work_item in enumerate(work_performed_list):
+            if work_item.get('title') or work_item.get('description'):
+                row = work_table.add_row()
+                row.cells[0].text = str(idx + 1)
+                # Use title if available, otherwise use description
+                row.cells[1].text = work_item.get('title', work_item.get('description', ''))
+                for cell in row.cells:
+                    set_paragraph_styles(cell, text_style)
+                row.cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        # Apply borders
+        set_table_borders(work_table)
+        doc.add_paragraph()
+        
+        # Add detailed descriptions if any
+        has_descriptions = any(work_item.get('description') for work_item in work_performed_list)
+        if has_descriptions:
+            details_heading = doc.add_paragraph()
+            details_run = details_heading.add_run("Work Details:")
+            details_run.bold = True
+            details_run.font.size = Pt(12)
+            details_run.font.name = 'Arial'
+            
+            for idx, work_item in enumerate(work_performed_list):
+                if work_item.get('description'):
+                    # Work item number and title
+                    item_para = doc.add_paragraph()
+                    item_title = item_para.add_run(f"{idx + 1}. {work_item.get('title', f'Work Item {idx + 1}')}: ")
+                    item_title.bold = True
+                    item_title.font.size = Pt(11)
+                    item_title.font.name = 'Arial'
+                    
+                    # Description
+                    desc_text = item_para.add_run(work_item['description'])
+                    desc_text.font.size = Pt(11)
+                    desc_text.font.name = 'Arial'
+                    item_para.paragraph_format.left_indent = Inches(0.25)
+                    item_para.paragraph_format.space_after = Pt(6)
+            
+            doc.add_paragraph()
+        
+        # Add photos section if any work items have photos
+        has_photos = any(work_item.get('photos') for work_item in work_performed_list)
+        if has_photos:
+            photos_heading = doc.add_paragraph()
+            photos_run = photos_heading.add_run("Work Photos:")
+            photos_run.bold = True
+            photos_run.font.size = Pt(12)
+            photos_run.font.name = 'Arial'
+            
+            # Collect all photos from all work items
+            all_photos = []
+            for work_idx, work_item in enumerate(work_performed_list):
+                if work_item.get('photos'):
+                    for photo_idx, photo in enumerate(work_item['photos']):
+                        photo_desc = work_item.get('photo_descriptions', {}).get(str(photo_idx), f'Work Item {work_idx + 1} - Photo {photo_idx + 1}')
+                        all_photos.append((photo, photo_desc))
+            progress.expect_photos(len(all_photos))
+            progress.stage = 'Processing photos'
+            report_photos.prepare([photo for photo, _ in all_photos])
+            
+            # Display photos in pairs
+            for i in range(0, len(all_photos), 2):
+                photo_table = doc.add_table(rows=1, cols=2)
+                photo_table.autofit = False
+                
+                # First photo
+                photo_file, photo_desc = all_photos[i]
+                cell1 = photo_table.cell(0, 0)
+                cell1_para = cell1.paragraphs[0]
+                cell1_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                
+                # Add downscaled photo
+                run1 = cell1_para.add_run()
+                report_photos.add(run1, photo_file, Inches(2.0))
+                
+                # Add caption
+                caption1 = cell1.add_paragraph()
+                caption_run1 = caption1.add_run(photo_desc)
+                caption_run1.font.size = Pt(9)
+                caption_run1.font.name = 'Arial'
+                caption1.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                
+                # Second photo (if exists)
+                if i + 1 < len(all_photos):
+                    photo_file2, photo_desc2 = all_photos[i + 1]
+                    cell2 = photo_table.cell(0, 1)
+                    cell2_para = cell2.paragraphs[0]
+                    cell2_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    
+                    # Add downscaled photo
+                    run2 = cell2_para.add_run()
+                    report_photos.add(run2, photo_file2, Inches(2.0))
+                    
+                    # Add caption
+                    caption2 = cell2.add_paragraph()
+                    caption_run2 = caption2.add_run(photo_desc2)
+                    caption_run2.font.size = Pt(9)
+                    caption_run2.font.name = 'Arial'
+                    caption2.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                
+                # Add spacing after photos
+                doc.add_paragraph()
+    else:
+        no_work_para = doc.add_paragraph()
+        no_work_text = no_work_para.add_run('No work performed recorded.')
+        no_work_text.font.size = Pt(11)
+        no_work_text.font.name = 'Arial'
+        no_work_text.font.italic = True
+        no_work_para.paragraph_format.space_after = Pt(12)
+    
+    section_number += 1
+    
+    # SPARE PARTS SECTION (same as technical report)
+    spare_parts = data.get('spare_parts', [])
+    if spare_parts and any(part.get('name') for part in spare_parts):
+        progress.section(f'{section_number}. SPARE PARTS REQUIRED')
+        parts_heading = doc.add_heading(f'{section_number}. SPARE PARTS REQUIRED', level=1)
+        style_heading(parts_heading, level=1)
+        
+        # Create table for spare parts
+        parts_table = doc.add_table(rows=1, cols=3)
+        parts_table.allow_autofit = False
+        parts_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+        
+        # Set column widths
+        parts_table.columns[0].width = Inches(0.8)
+        parts_table.columns[1].width = Inches(4.5)
+        parts_table.columns[2].width = Inches(1.2)
+        
+        # Header row
+        header_cells = parts_table.rows[0].cells
+        header_cells[0].text = 'S.No.'
+        header_cells[1].text = 'Spare Part Description'
+        header_cells[2].text = 'Quantity'
+        
+        # Style header row to match Technical Report
+        heading_style = report_style(doc.part, TABLE_HEADING_STYLE)
+        text_style = report_style(doc.part, TABLE_TEXT_STYLE)
+        for cell in header_cells:
+            set_paragraph_styles(cell, heading_style)
+            cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            set_cell_background(cell, 'E8E8E8')
+        
+        # Add spare parts
+        for idx, part in enumerate(spare_parts):
+            if part.get('name'):
+                row = parts_table.add_row()
+                row.cells[0].text = str(idx + 1)
+                row.cells[1].text = part.get('name', '')
+                row.cells[2].text = str(part.get('quantity', 1))
+                for cell in row.cells:
+                    set_paragraph_styles(cell, text_style)
+                row.cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                row.cells[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        # Apply borders
+        set_table_borders(parts_table)
+        doc.add_paragraph()
+        section_number += 1
+    else:
+        progress.section(f'{section_number}. SPARE PARTS REQUIRED')
+        parts_heading = doc.add_heading(f'{section_number}. SPARE PARTS REQUIRED', level=1)
+        style_heading(parts_heading, level=1)
+        
+        no_parts_para = doc.add_paragraph()
+        no_parts_text = no_parts_para.add_run('No spare parts required.')
+        no_parts_text.font.size = Pt(11)
+        no_parts_text.font.name = 'Arial'
+        no_parts_text.font.italic = True
+        no_parts_para.paragraph_format.space_after = Pt(12)
+        section_number += 1
+    
+    # RECOMMENDATIONS SECTION (same as technical report)
+    if data.get('recommendations'):
+        progress.section(f'{section_number}. RECOMMENDATIONS')
+        rec_heading = doc.add_heading(f'{section_number}. RECOMMENDATIONS', level=1)
+        style_heading(rec_heading, level=1)
+        
+        rec_para = doc.add_paragraph()
+        rec_text = rec_para.add_run(data.get('recommendations', ''))
+        rec_text.font.size = Pt(11)
+        rec_text.font.name = 'Arial'
+        rec_para.paragraph_format.line_spacing = 1.5
+        rec_para.paragraph_format.space_after = Pt(12)
+        section_number += 1
+    
+    # Add page break before signatures
+    doc.add_page_break()
+    
+    # SIGNATURE SECTION - Updated to match Testing & Commissioning format
+    progress.section('ACKNOWLEDGMENT AND SIGNATURES')
+    sig_heading = doc.add_heading('ACKNOWLEDGMENT AND SIGNATURES', level=1)
+    style_heading(sig_heading, level=1)
+    
+    # Add acknowledgment text
+    ack_para = doc.add_paragraph()
+    ack_text = ack_para.add_run(
+        "The undersigned acknowledge that the service described in this report has been "
+        "completed satisfactorily and in accordance with the agreed specifications."
+    )
+    ack_text.font.size = Pt(11)
+    ack_text.font.name = 'Arial'
+    ack_text.font.italic = True
+    ack_para.paragraph_format.space_after = Pt(36)
+    
+    # Add some space before the signature area
+    doc.add_paragraph()
+    doc.add_paragraph()
+    
+    # Create a 2-column table for side-by-side signatures
+    sig_table = doc.add_table(rows=5, cols=2)
+    sig_table.allow_autofit = False
+    sig_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    
+    # Set column widths
+    for cell in sig_table.columns[0].cells:
+        cell.width = Inches(3.2)
+    for cell in sig_table.columns[1].cells:
+        cell.width = Inches(3.2)
+    
+    # Service Technician section
+    tech_label = sig_table.cell(0, 0)
+    tech_label.text = "Service Technician:"
+    tech_label.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    for run in tech_label.paragraphs[0].runs:
+        run.font.bold = True
+        run.font.size = Pt(12)
+        run.font.name = 'Arial'
+    
+    # Add space for signature
+    sig_space = sig_table.cell(1, 0)
+    sig_space_para = sig_space.paragraphs[0]
+    sig_space_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    if data.get('technician_signature'):
+        run = sig_space_para.add_run()
+        add_signature_picture(run, data.get('technician_signature'), Inches(2))
+    else:
+        # Create empty space for signature
+        sig_space_para.add_run("\n\n\n\n")
+    
+    # Signature line
+    sig_line = sig_table.cell(2, 0)
+    sig_line.text = "_" * 30
+    sig_line.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Empty row for spacing
+    sig_table.cell(3, 0).text = ""
+    
+    # Date
+    date_cell = sig_table.cell(4, 0)
+    date_cell.text = f"Date: {datetime.now().strftime('%B %d, %Y')}"
+    date_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Customer Representative section
+    cust_label = sig_table.cell(0, 1)
+    cust_label.text = "Customer Representative:"
+    cust_label.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    for run in cust_label.paragraphs[0].runs:
+        run.font.bold = True
+        run.font.size = Pt(12)
+        run.font.name = 'Arial'
+    
+    # Add space for customer signature
+    cust_space = sig_table.cell(1, 1)
+    cust_space_para = cust_space.paragraphs[0]
+    cust_space_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    if data.get('customer_signature'):
+        run = cust_space_para.add_run()
+        add_signature_picture(run, data.get('customer_signature'), Inches(2))
+    else:
+        # Create empty space for signature
+        cust_space_para.add_run("\n\n\n\n")
+    
+    # Signature line
+    cust_line = sig_table.cell(2, 1)
+    cust_line.text = "_" * 30
+    cust_line.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Empty row for spacing
+    sig_table.cell(3, 1).text = ""
+    
+    # Date
+    cust_date = sig_table.cell(4, 1)
+    cust_date.text = f"Date: {datetime.now().strftime('%B %d, %Y')}"
+    cust_date.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Style all text in signature table
+    for row in sig_table.rows:
+        for cell in row.cells:
+            for para in cell.paragraphs:
+                for run in para.runs:
+                    if not run.font.bold:
+                        run.font.size = Pt(11)
+                        run.font.name = 'Arial'
+            set_cell_margins(cell, top=0.1, bottom=0.1)
+    
+    # Add footer text
+    doc.add_paragraph()
+    doc.add_paragraph()
+    footer_para = doc.add_paragraph()
+    footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer_text = footer_para.add_run(
+        "This report is confidential and proprietary.\n"
+        "For service inquiries, please contact our Service Department."
+    )
+    footer_text.font.size = Pt(9)
+    footer_text.font.name = 'Arial'
+    footer_text.font.color.rgb = RGBColor(128, 128, 128)
+    footer_text.font.italic = True
+    
+    logger.info("General service report photos: %s", report_photos.stats.summary())
+    
+    # Save to bytes
+    progress.stage = 'Saving document'
+    doc_bytes = io.BytesIO()
+    doc.save(doc_bytes)
+    doc_bytes.seek(0)
+    
+    return doc_bytes
+
+def format_tc_table(table, is_header=False):
+    """Format Testing & Commissioning table with blue header style and reduced row height"""
+    # Borders, compact cell margins and vertical centering come from the table style
+    table.style = report_style(table.part, TC_TABLE_STYLE)
+    header_style = report_style(table.part, TC_HEADER_STYLE)
+    cell_style = report_style(table.part, TC_CELL_STYLE)
+    
+    # Format cells and set row heights
+    for row_idx, row in enumerate(table.rows):
+        # Set row height
+        set_row_height(row, 280)  # Further reduced height in twips (280 = ~0.19 inches)
+        
+        for cell in row.cells:
+            # Style the cell based on position
+            if is_header and row_idx == 0:
+                # Blue header background with white bold text
+                set_cell_shading(cell, '1F4788')  # Blue color
+                set_paragraph_styles(cell, header_style)
+            else:
+                # Regular cells - centered 9pt text
+                set_paragraph_styles(cell, cell_style)
+
+def create_testing_commissioning_report(data, progress=None):
+    """Generate a Testing and Commissioning Report Word document"""
+    import math
+    progress = progress or ReportProgress()
+    
+    # Use template if available, otherwise create new document
+    doc = create_report_document()
+    
+    # Add title
+    title_para = doc.add_paragraph()
+    title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title_run = title_para.add_run('TESTING AND COMMISSIONING REPORT')
+    title_run.font.size = Pt(16)
+    title_run.font.color.rgb = RGBColor(31, 71, 136)
+    title_run.font.bold = True
+    
+    # Add report date
+    ref_para = doc.add_paragraph()
+    ref_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    ref_run = ref_para.add_run(f"Report Date: {data.get('date', datetime.now().strftime('%B %d, %Y'))}")
+    ref_run.font.size = Pt(11)
+    ref_run.font.color.rgb = RGBColor(100, 100, 100)
+    
+    doc.add_paragraph()
+    
+    # GENERAL INFORMATION SECTION
+    progress.section('GENERAL INFORMATION')
+    general_heading = doc.add_heading('GENERAL INFORMATION', level=1)
+    style_heading(general_heading, level=1)
+    
+    # Create professional info table
+    general_info = [
+        ("Customer Name", data.get('customer_name', '')),
+        ("Project Name", data.get('project_name', '')),
+        ("Contact Person", data.get('contact_person', '')),
+        ("Location", data.get('outlet_location', '')),
+        ("Contact Number", data.get('contact_number', '')),
+        ("Visit Type", data.get('visit_type', '')),
+        ("Visit Classification", data.get('visit_class', ''))
+    ]
+    
+    create_info_table(doc, general_info)
+    
+    # Add page break before canopy commissioning data
+    doc.add_page_break()
+    
+    # CANOPY COMMISSIONING DATA SECTION
+    progress.section('CANOPY COMMISSIONING DATA')
+    canopy_heading = doc.add_heading('CANOPY COMMISSIONING DATA', level=1)
+    style_heading(canopy_heading, level=1)
+    
+    canopy_data = data.get('canopy_data', [])
+    # Flowrates are recalculated from the readings, with the same engine as the form
+    canopy_airflow = calculate_airflow(canopy_data)
+    
+    for canopy_idx, canopy in enumerate(canopy_data):
+        airflow = canopy_airflow[canopy_idx]
+        # Add page break before each canopy (except the first one since we already have a page break)
+        if canopy_idx > 0:
+            doc.add_page_break()
+        
+        # Check if this is a Mobichef model (only has checklist, no air data)
+        if canopy.get('model') == 'Mobichef':
+            # For Mobichef, create a MOBICHEF DATA table
+            # Create table with header row for "MOBICHEF DATA"
+            mobichef_header_table = doc.add_table(rows=1, cols=1)
+            mobichef_header_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+            mobichef_header_cell = mobichef_header_table.cell(0, 0)
+            mobichef_header_cell.text = "MOBICHEF DATA"
+            format_tc_table(mobichef_header_table, is_header=True)
+            
+            # Mobichef Info Table (merged with header visually)
+            mobichef_info_table = doc.add_table(rows=3, cols=2)
+            mobichef_info_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+            
+            # Populate mobichef info (only relevant fields)
+            mobichef_info_table.cell(0, 0).text = "Drawing Number"
+            mobichef_info_table.cell(0, 1).text = canopy.get('drawing_number', '')
+            mobichef_info_table.cell(1, 0).text = "Canopy Location"
+            mobichef_info_table.cell(1, 1).text = canopy.get('location', '')
+            mobichef_info_table.cell(2, 0).text = "Canopy Model"
+            mobichef_info_table.cell(2, 1).text = canopy.get('model', '')
+            
+            format_tc_table(mobichef_info_table)
+            
+            doc.add_paragraph()
+        else:
+            # EXTRACT AIR DATA for non-Mobichef models
+            # Create table with header row for "EXTRACT AIR DATA"
+            extract_header_table = doc.add_table(rows=1, cols=1)
+            extract_header_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+            extract_header_cell = extract_header_table.cell(0, 0)
+            extract_header_cell.text = "EXTRACT AIR DATA"
+            format_tc_table(extract_header_table, is_header=True)
+            
+            # Extract Air Info Table (merged with header visually)
+            extract_info_table = doc.add_table(rows=6, cols=2)
+            extract_info_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+            
+            # Populate extract info
+            extract_info_table.cell(0, 0).text = "Drawing Number"
+            extract_info_table.cell(0, 1).text = canopy.get('drawing_number', '')
+            extract_info_table.cell(1, 0).text = "Canopy Location"
+            extract_info_table.cell(1, 1).text = canopy.get('location', '')
+            extract_info_table.cell(2, 0).text = "Canopy Model"
+            extract_info_table.cell(2, 1).text = canopy.get('model', '')
+            # Get extract data first
+            extract_data = canopy.get('extract_data', [])
+            # Sum design flowrates from all modules (in L/s)
+            total_extract_design_ls = airflow.extract_total.design_ls
+            extract_info_table.cell(3, 0).text = "Design Flowrate"
+            extract_info_table.cell(3, 1).text = f"{total_extract_design_ls:.0f} L/s"
+            extract_info_table.cell(4, 0).text = "Quantity of Canopy Sections"
+            extract_info_table.cell(4, 1).text = str(canopy.get('modules', 1))
+            extract_info_table.cell(5, 0).text = "Calculation"
+            # Show correct formula based on hood type
+            is_cmw_type = canopy.get('model') in ['CMWF', 'CMWI', 'CMW-MUAP-CJ', 'CMW-CJ', 'CMW', 'CXW']
+            if is_cmw_type:
+                extract_info_table.cell(5, 1).text = "QE = V × L × W"
+            else:
+                extract_info_table.cell(5, 1).text = "Qv = K √Pa"
+            
+            format_tc_table(extract_info_table)
+            
+            # Extract Air Readings Table (connected to info table)
+            extract_data = canopy.get('extract_data', [])
+            if extract_data:
+                # Check if CMW type to determine columns
+                is_cmw = canopy.get('model') in ['CMWF', 'CMWI', 'CMW-MUAP-CJ', 'CMW-CJ']
+                
+                if is_cmw:
+                    # CMW type table with different columns
+                    extract_table = doc.add_table(rows=len(extract_data) + 2, cols=7)  # +2 for header and total
+                    extract_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+                    
+                    # Headers for CMW
+                    headers = ['Hood #', 'Anemometer Reading\n(V - m/s)', 'Length of\nopening\n(mm)', 
+                              'Width of\nopening\n(meter)', 'Achieved\n(m³/h)', 'Design\n(L/s)', 'Percentage']
+                    for col_idx, header in enumerate(headers):
+                        cell = extract_table.cell(0, col_idx)
+                        cell.text = header
+                    
+                    # Data rows for CMW
+                    for row_idx, section_data in enumerate(extract_data):
+                        achieved_m3h = airflow.extract.flowrate_m3h[row_idx]
+                        
+                        # Get design flowrate for this module (stored in L/s)
+                        design_ls = section_data.get('design_flowrate_ls', 0.0)
+                        
+                        extract_table.cell(row_idx + 1, 0).text = f"M{row_idx + 1}"
+                        extract_table.cell(row_idx + 1, 1).text = f"{section_data.get('anemometer', 0.0):.2f} m/s"
+                        # Display length in mm (stored in mm, displayed in mm)
+                        length_mm = section_data.get('length_opening', 1800)
+                        extract_table.cell(row_idx + 1, 2).text = f"{length_mm:.0f}"
+                        extract_table.cell(row_idx + 1, 3).text = "0.09m"
+                        extract_table.cell(row_idx + 1, 4).text = f"{achieved_m3h:.2f}"  # Display in m³/h
+                        extract_table.cell(row_idx + 1, 5).text = f"{design_ls:.0f}"  # Display in L/s
+                        extract_table.cell(row_idx + 1, 6).text = f"{airflow.extract.percentage[row_idx]:.0f}%"
+                    
+                    # Total row - only populate and border columns 3-6
+                    # Leave first 3 columns empty (no borders)
+                    total_row_idx = len(extract_data) + 1
+                    
+                    # Remove borders from first 3 cells of total row
+                    for col_idx in range(3):
+                        remove_cell_borders(extract_table.cell(total_row_idx, col_idx))
+                    
+                    # Style the TOTAL cell with blue background and white text
+                    total_cell = extract_table.cell(total_row_idx, 3)
+                    total_cell.text = "TOTAL"
+                    
+                    # Apply blue background to TOTAL cell
+                    set_cell_shading(total_cell, '1F4788')  # Blue color
+                    
+                    # Make text white and bold
+                    set_run_styles(total_cell, report_style(doc.part, HIGHLIGHT_STYLE))
+                    
+                    extract_table.cell(total_row_idx, 4).text = f"{airflow.extract_total.flowrate_m3h:.0f}"
+                    extract_table.cell(total_row_idx, 5).text = f"{airflow.extract_total.design_ls:.0f}"
+                    extract_table.cell(total_row_idx, 6).text = f"{airflow.extract_total.percentage:.0f}%"
+                else:
+                    # Regular table with K-Factor
+                    extract_table = doc.add_table(rows=len(extract_data) + 2, cols=7)  # +2 for header and total
+                    extract_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+                    
+                    # Headers
+                    headers = ['Module', 'Manometer\nReading (Pa)', 'K-Factor\n(m³/h)', 'Flowrate\n(m³/h)', 'Flowrate\n(m³/s)', 'Design\n(L/s)', 'Percentage']
+                    for col_idx, header in enumerate(headers):
+                        cell = extract_table.cell(0, col_idx)
+                        cell.text = header
+                    
+                    # Data rows
+                    for row_idx, section_data in enumerate(extract_data):
+                        flowrate_m3h = airflow.extract.flowrate_m3h[row_idx]
+                        flowrate_m3s = airflow.extract.flowrate_m3s[row_idx]
+                        design_ls = section_data.get('design_flowrate_ls', 0.0)
+                        
+                        extract_table.cell(row_idx + 1, 0).text = f"M{row_idx + 1}"
+                        extract_table.cell(row_idx + 1, 1).text = f"{section_data.get('tab_reading', 0.0):.1f}"
+                        extract_table.cell(row_idx + 1, 2).text = f"{section_data.get('k_factor', 0.0):.1f}"
+                        extract_table.cell(row_idx + 1, 3).text = f"{flowrate_m3h:.0f}"
+                        extract_table.cell(row_idx + 1, 4).text = f"{flowrate_m3s:.3f}"
+                        extract_table.cell(row_idx + 1, 5).text = f"{design_ls:.0f}"
+                        extract_table.cell(row_idx + 1, 6).text = f"{airflow.extract.percentage[row_idx]:.0f}%"
+                    
+                    # Total row
+                    total_row_idx = len(extract_data) + 1
+                    
+                    # Add borders to total row starting from column 2 (index 2)
+                    # First two columns empty (no borders)
+                    for col_idx in range(2):
+                        remove_cell_borders(extract_table.cell(total_row_idx, col_idx))
+                    
+                    # Column 2: "TOTAL" text
+                    total_cell = extract_table.cell(total_row_idx, 2)
+                    total_cell.text = "TOTAL"
+                    set_cell_background(total_cell, '1F4788')  # Blue color
+                    
+                    # Make text white and bold
+                    set_run_styles(total_cell, report_style(doc.part, HIGHLIGHT_STYLE))
+                    
+                    # Fill in total values
+                    extract_table.cell(total_row_idx, 3).text = f"{airflow.extract_total.flowrate_m3h:.0f}"
+                    extract_table.cell(total_row_idx, 4).text = f"{airflow.extract_total.flowrate_m3s:.3f}"
+                    extract_table.cell(total_row_idx, 5).text = f"{airflow.extract_total.design_ls:.0f}"
+                    extract_table.cell(total_row_idx, 6).text = f"{airflow.extract_total.percentage:.0f}%"
+                
+                format_tc_table(extract_table, is_header=True)
+            
+            doc.add_paragraph()
+            
+            # SUPPLY AIR DATA (if applicable)
+            if canopy.get('model') in ['KVF', 'UVF', 'CMWF', 'CMW-MUAP-CJ', 'KVD', 'KVV']:
+                # SUPPLY AIR DATA
+                # Create table with header row for "SUPPLY AIR DATA"
+                supply_header_table = doc.add_table(rows=1, cols=1)
+                supply_header_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+                supply_header_cell = supply_header_table.cell(0, 0)
+                supply_header_cell.text = "SUPPLY AIR DATA"
+                format_tc_table(supply_header_table, is_header=True)
+                
+                # Supply Air Info Table (merged with header visually)
+                supply_info_table = doc.add_table(rows=6, cols=2)
+                supply_info_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+                
+                # Populate supply info
+                supply_info_table.cell(0, 0).text = "Drawing Number"
+                supply_info_table.cell(0, 1).text = canopy.get('drawing_number', '')
+                supply_info_table.cell(1, 0).text = "Canopy Location"
+                supply_info_table.cell(1, 1).text = canopy.get('location', '')
+                supply_info_table.cell(2, 0).text = "Canopy Model"
+                supply_info_table.cell(2, 1).text = canopy.get('model', '')
+                # Get supply data first
+                supply_data = canopy.get('supply_data', [])
+                # Sum design flowrates from all modules (in L/s)
+                total_supply_design_ls = airflow.supply_total.design_ls
+                supply_info_table.cell(3, 0).text = "Design Flowrate"
+                supply_info_table.cell(3, 1).text = f"{total_supply_design_ls:.0f} L/s"
+                supply_info_table.cell(4, 0).text = "Quantity of Canopy Sections"
+                supply_info_table.cell(4, 1).text = str(canopy.get('modules', 1))
+                supply_info_table.cell(5, 0).text = "Calculation"
+                # Supply always uses K-Factor calculation
+                supply_info_table.cell(5, 1).text = "Qv = K √Pa"
+                
+                format_tc_table(supply_info_table)
+                
+                # Supply Air Readings Table (connected to info table)
+                if supply_data:
+                    supply_table = doc.add_table(rows=len(supply_data) + 2, cols=7)  # +2 for header and total
+                    supply_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+                    
+                    # Headers
+                    headers = ['Module', 'Manometer\nReading (Pa)', 'K-Factor\n(m³/h)', 'Flowrate\n(m³/h)', 'Flowrate\n(m³/s)', 'Design\n(L/s)', 'Percentage']
+                    for col_idx, header in enumerate(headers):
+                        cell = supply_table.cell(0, col_idx)
+                        cell.text = header
+                    
+                    # Data rows
+                    for row_idx, section_data in enumerate(supply_data):
+                        flowrate_m3h = airflow.supply.flowrate_m3h[row_idx]
+                        flowrate_m3s = airflow.supply.flowrate_m3s[row_idx]
+                        design_ls = section_data.get('design_flowrate_ls', 0.0)
+                        
+                        supply_table.cell(row_idx + 1, 0).text = f"M{row_idx + 1}"
+                        supply_table.cell(row_idx + 1, 1).text = f"{section_data.get('tab_reading', 0.0):.1f}"
+                        supply_table.cell(row_idx + 1, 2).text = f"{section_data.get('k_factor', 0.0):.1f}"
+                        supply_table.cell(row_idx + 1, 3).text = f"{flowrate_m3h:.0f}"
+                        supply_table.cell(row_idx + 1, 4).text = f"{flowrate_m3s:.3f}"
+                        supply_table.cell(row_idx + 1, 5).text = f"{design_ls:.0f}"
+                        supply_table.cell(row_idx + 1, 6).text = f"{airflow.supply.percentage[row_idx]:.0f}%"
+                    
+                    # Total row
+                    total_row_idx = len(supply_data) + 1
+                    
+                    # Add borders to total row starting from column 2 (index 2)
+                    # First two columns empty (no borders)
+                    for col_idx in range(2):
+                        remove_cell_borders(supply_table.cell(total_row_idx, col_idx))
+                    
+                    # Cell 2 gets "Total" text with dark blue background
+                    total_cell = supply_table.cell(total_row_idx, 2)
+                    total_cell.text = "Total"
+                    # Set background color to dark blue
+                    set_cell_shading(total_cell, '2B5797')  # Dark blue
+                    
+                    # Make text white and bold
+                    set_run_styles(total_cell, report_style(doc.part, HIGHLIGHT_STYLE))
+                    
+                    # Fill in total values
+                    supply_table.cell(total_row_idx, 3).text = f"{airflow.supply_total.flowrate_m3h:.0f}"
+                    supply_table.cell(total_row_idx, 4).text = f"{airflow.supply_total.flowrate_m3s:.3f}"
+                    supply_table.cell(total_row_idx, 5).text = f"{airflow.supply_total.design_ls:.0f}"
+                    supply_table.cell(total_row_idx, 6).text = f"{airflow.supply_total.percentage:.0f}%"
+                    
+                    format_tc_table(supply_table, is_header=True)
+        
+        
+        # EQUIPMENT CHECKLIST for this canopy
+        # Get checklist for this specific canopy using location and model
+        canopy_location = canopy.get('location', f'Canopy {canopy_idx+1}')
+        canopy_model = canopy.get('model', 'Unknown')
+        checklist_key = f'{canopy_location} {canopy_model}'
+        
+        checklists_data = data.get('tc_checklists', {})
+        if checklist_key in checklists_data and checklists_data[checklist_key]:
+            checklist_items = checklists_data[checklist_key]
+            
+            # Add space before checklist
+            doc.add_paragraph()
+            
+            # Create header table for checklist
+            checklist_header_table = doc.add_table(rows=1, cols=1)
+            checklist_header_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+            checklist_header_cell = checklist_header_table.cell(0, 0)
+            checklist_header_cell.text = f"{canopy_location} {canopy_model} EQUIPMENT CHECKLIST"
+            format_tc_table(checklist_header_table, is_header=True)
+            
+            # Create checklist items table (no headers)
+            checklist_table = doc.add_table(rows=len(checklist_items), cols=2)
+            checklist_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+            
+            # Checklist items
+            for row_idx, (item_name, status) in enumerate(checklist_items.items()):
+                checklist_table.cell(row_idx, 0).text = item_name
+                # Handle different status values
+                if status == "Yes" or status == "OK" or status == "Clean":
+                    display_status = "✓"
+                elif status == "No" or status == "Faulty" or status == "Dirty" or status == "Overload" or status == "Missing":
+                    display_status = "✗"
+                elif status == "N/A":
+                    display_status = "N/A"
+                else:
+                    display_status = status  # Display as-is for any other status
+                checklist_table.cell(row_idx, 1).text = display_status
+            
+            format_tc_table(checklist_table, is_header=False)  # No blue header for checklist items
+        
+        doc.add_paragraph()
+    
+    # RECOMMENDATIONS SECTION
+    progress.section('RECOMMENDATIONS')
+    rec_heading = doc.add_heading('RECOMMENDATIONS', level=1)
+    style_heading(rec_heading, level=1)
+    
+    recommendations_para = doc.add_paragraph()
+    recommendations_para.add_run(data.get('recommendations', 'No specific recommendations at this time.'))
+    
+    # Add page break before signatures
+    doc.add_page_break()
+    
+    # ACKNOWLEDGMENT AND SIGNATURES SECTION
+    progress.section('ACKNOWLEDGMENT AND SIGNATURES')
+    sig_heading = doc.add_heading('ACKNOWLEDGMENT AND SIGNATURES', level=1)
+    style_heading(sig_heading, level=1)
+    
+    # Add acknowledgment text
+    ack_para = doc.add_paragraph()
+    ack_text = ack_para.add_run(
+        "The undersigned acknowledge that the service described in this report has been "
+        "completed satisfactorily and in accordance with the agreed specifications."
+    )
+    ack_text.font.size = Pt(11)
+    ack_text.font.name = 'Arial'
+    ack_text.font.italic = True
+    ack_para.paragraph_format.space_after = Pt(36)
+    
+    # Add some space before the signature area
+    doc.add_paragraph()
+    doc.add_paragraph()
+    
+    # Create a 2-column table for side-by-side signatures
+    sig_table = doc.add_table(rows=5, cols=2)
+    sig_table.allow_autofit = False
+    sig_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    
+    # Set column widths
+    for cell in sig_table.columns[0].cells:
+        cell.width = Inches(3.2)
+    for cell in sig_table.columns[1].cells:
+        cell.width = Inches(3.2)
+    
+    # Service Technician section
+    tech_label = sig_table.cell(0, 0)
+    tech_label.text = "Service Technician:"
+    tech_label.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    for run in tech_label.paragraphs[0].runs:
+        run.font.bold = True
+        run.font.size = Pt(12)
+        run.font.name = 'Arial'
+    
+    # Add space for signature
+    sig_space = sig_table.cell(1, 0)
+    sig_space_para = sig_space.paragraphs[0]
+    sig_space_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    if data.get('technician_signature'):
+        run = sig_space_para.add_run()
+        add_signature_picture(run, data.get('technician_signature'), Inches(2))
+    else:
+        # Create empty space for signature
+        sig_space_para.add_run("\n\n\n\n")
+    
+    # Signature line
+    sig_line = sig_table.cell(2, 0)
+    sig_line.text = "_" * 30
+    sig_line.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Technician name
+    name_cell = sig_table.cell(3, 0)
+    name_cell.text = data.get('technician_name', '')
+    name_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Date
+    date_cell = sig_table.cell(4, 0)
+    date_cell.text = f"Date: {datetime.now().strftime('%B %d, %Y')}"
+    date_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Customer Representative section
+    cust_label = sig_table.cell(0, 1)
+    cust_label.text = "Customer Representative:"
+    cust_label.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    for run in cust_label.paragraphs[0].runs:
+        run.font.bold = True
+        run.font.size = Pt(12)
+        run.font.name = 'Arial'
+    
+    # Add space for customer signature
+    cust_space = sig_table.cell(1, 1)
+    cust_space_para = cust_space.paragraphs[0]
+    cust_space_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    if data.get('customer_signature'):
+        run = cust_space_para.add_run()
+        add_signature_picture(run, data.get('customer_signature'), Inches(2))
+    else:
+        # Create empty space for signature
+        cust_space_para.add_run("\n\n\n\n")
+    
+    # Signature line
+    cust_line = sig_table.cell(2, 1)
+    cust_line.text = "_" * 30
+    cust_line.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Customer name
+    cust_name_cell = sig_table.cell(3, 1)
+    cust_name_cell.text = data.get('customer_name', '')
+    cust_name_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Date
+    cust_date = sig_table.cell(4, 1)
+    cust_date.text = f"Date: {datetime.now().strftime('%B %d, %Y')}"
+    cust_date.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Style all text in signature table
+    for row in sig_table.rows:
+        for cell in row.cells:
+            for para in cell.paragraphs:
+                for run in para.runs:
+                    if not run.font.bold:
+                        run.font.size = Pt(11)
+                        run.font.name = 'Arial'
+            set_cell_margins(cell, top=0.1, bottom=0.1)
+    
+    # Add confidentiality notice similar to Technical Report
+    doc.add_paragraph()
+    conf_para = doc.add_paragraph()
+    conf_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    conf_text = conf_para.add_run(
+        "This report is confidential and proprietary.\n"
+        "For service inquiries, please contact our Service Department."
+    )
+    conf_text.font.size = Pt(9)
+    conf_text.font.name = 'Arial'
+    conf_text.font.color.rgb = RGBColor(128, 128, 128)
+    
+    # Save to bytes
+    progress.stage = 'Saving document'
+    doc_bytes = io.BytesIO()
+    doc.save(doc_bytes)
+    doc_bytes.seek(0)
+    
+    return doc_bytes
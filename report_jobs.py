@@ -0,0 +1,216 @@
+"""
+Background report generation queue
+Builds reports on a small server-wide thread pool, so a Streamlit session keeps rerunning while its document is assembled
+
+Every session submits its report_data and gets a job ID back; the UI polls the job for progress
+and offers the download once it is done. The pool bounds how many reports build at once, jobs
+start in submission order, and each session has at most one job in the queue, so one user
+clicking "Generate Report" repeatedly cannot starve the others.
+"""
+
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Reports built at the same time on this server
+REPORT_QUEUE_WORKERS = int(os.environ.get('REPORT_QUEUE_WORKERS', 2))
+# Finished jobs whose report was never picked up are dropped after this long
+FINISHED_JOB_TTL_SECONDS = 15 * 60
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class ReportProgress:
+    """
+    Progress of one report build
+
+    Written by the builder thread, read by the UI: the builders call section() at each
+    top-level heading and the photo batches call photo_done() as each photo is processed.
+    """
+
+    def __init__(self):
+        self.stage = 'Queued'
+        self.sections_done = 0
+        self.photos_done = 0
+        self.photos_total = 0
+
+    def section(self, name):
+        """Record that the builder started a new section"""
+        self.sections_done += 1
+        self.stage = name
+
+    def expect_photos(self, count):
+        """Add photos to the number the report will place"""
+        self.photos_total += count
+
+    def photo_done(self):
+        """Record that one photo was processed for the document"""
+        self.photos_done += 1
+
+    def summary(self):
+        """Return a one-line description for the UI"""
+        text = f"{self.stage} ({self.sections_done} section(s) done"
+        if self.photos_total:
+            text += f", {min(self.photos_done, self.photos_total)} of {self.photos_total} photos"
+        return text + ")"
+
+
+def snapshot(value):
+    """
+    Copy the dictionaries and lists of report_data
+
+    The session keeps editing its lists (e.g. kitchen_list) while a job runs; photos and
+    signatures are shared, the builders only read them.
+    """
+    if isinstance(value, dict):
+        return {key: snapshot(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [snapshot(item) for item in value]
+    return value
+
+
+class ReportJob:
+    """A report build submitted to the queue"""
+
+    def __init__(self, owner, builder, report_data, key=None, resources=None):
+        self.id = secrets.token_hex(8)
+        self.owner = owner
+        self.builder = builder
+        self.report_data = report_data
+        self.key = key
+        # Kept alive until the build ends, e.g. the PhotoStore whose spool holds the photos
+        self.resources = resources
+        self.progress = ReportProgress()
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self.future = None
+
+    @property
+    def active(self):
+        """True while the job is queued or running"""
+        return self.status in (QUEUED, RUNNING)
+
+    def __repr__(self):
+        return f"ReportJob({self.id}, {self.status}, {self.progress.summary()})"
+
+
+class ReportQueue:
+    """
+    Thread pool of report builds shared by all sessions of the server
+
+    Usage:
+        queue = ReportQueue()
+        job_id = queue.submit(session_id, create_technical_report, report_data)
+        job = queue.get(job_id)  # job.status, job.progress, job.result (bytes) once DONE
+    """
+
+    def __init__(self, max_workers=REPORT_QUEUE_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report')
+        self._jobs = {}     # job ID -> ReportJob
+        self._pending = []  # queued jobs in submission order
+        self._lock = threading.Lock()
+
+    def submit(self, owner, builder, report_data, key=None, resources=None):
+        """
+        Queue a report build, replacing the owner's previous job if it has not started yet
+
+        Args:
+            owner: Session identifier (each owner has at most one queued job)
+            builder: Report builder taking (report_data, progress=...) and returning a BytesIO
+            report_data: Report data dictionary (its dictionaries and lists are copied)
+            key: Optional cache key of report_data, kept on the job
+            resources: Optional object kept alive until the build ends, so a session that
+                closes while its job is queued does not remove files the report reads
+
+        Returns:
+            Job ID
+        """
+        job = ReportJob(owner, builder, snapshot(report_data), key, resources)
+        with self._lock:
+            self._prune()
+            for queued in [queued for queued in self._pending if queued.owner == owner]:
+                self._cancel(queued)
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            job.future = self._pool.submit(self._run, job)
+        return job.id
+
+    def get(self, job_id):
+        """Return the job with this ID, or None if it is unknown or was pruned"""
+        return self._jobs.get(job_id)
+
+    def position(self, job_id):
+        """Number of queued jobs that start before this one (0 when it is next or already running)"""
+        with self._lock:
+            for index, job in enumerate(self._pending):
+                if job.id == job_id:
+                    return index
+        return 0
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started yet; returns True if it was cancelled"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job is not None and self._cancel(job)
+
+    def forget(self, job_id):
+        """Drop a finished job (and its report bytes) once the caller has taken the result"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.active:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads, cancelling jobs that have not started"""
+        with self._lock:
+            for job in list(self._pending):
+                self._cancel(job)
+        self._pool.shutdown(wait=wait)
+
+    def _cancel(self, job):
+        if job.status != QUEUED or not job.future.cancel():
+            return False
+        self._pending.remove(job)
+        job.report_data = job.resources = None
+        job.status = CANCELLED
+        job.finished = time.time()
+        return True
+
+    def _prune(self):
+        cutoff = time.time() - FINISHED_JOB_TTL_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if not job.active and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        with self._lock:
+            self._pending.remove(job)
+            job.status = RUNNING
+        job.progress.stage = 'Starting'
+        start = time.perf_counter()
+        status = FAILED
+        try:
+            job.result = job.builder(job.report_data, progress=job.progress).getvalue()
+            status = DONE
+        except Exception as e:
+            logger.exception("Report job %s failed", job.id)
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            # The builder input can hold large lists; only the result is needed from here on
+            job.report_data = job.resources = None
+            job.finished = time.time()
+            job.status = status
+        logger.info("Report job %s %s in %.2fs", job.id, job.status, time.perf_counter() - start)
@@ -0,0 +1,62 @@
+"""
+Letterhead template cache for the report builders
+Parses "Templates/Report Letter Head.docx" once per process and hands out copies
+"""
+
+import copy
+import os
+import threading
+
+from docx import Document
+
+REPORT_TEMPLATE_PATH = "Templates/Report Letter Head.docx"
+
+
+class TemplateCache:
+    """
+    Pristine parsed template, reloaded when the file's modification time changes
+
+    Usage:
+        letterhead = TemplateCache(REPORT_TEMPLATE_PATH)
+        doc = letterhead.new_document()
+    """
+
+    def __init__(self, template_path):
+        self.template_path = template_path
+        self.loads = 0
+        self._mtime = None
+        self._document = None
+        self._lock = threading.Lock()
+
+    def _pristine(self):
+        """Return the parsed template, parsing it again if the file changed"""
+        mtime = os.stat(self.template_path).st_mtime_ns
+        with self._lock:
+            if self._document is None or mtime != self._mtime:
+                self._document = Document(self.template_path)
+                self._mtime = mtime
+                self.loads += 1
+            return self._document
+
+    def new_document(self):
+        """
+        Create a new document based on the template
+
+        Returns:
+            An independent python-docx Document; the cached template is never modified
+
+        Raises:
+            OSError: If the template file cannot be read
+        """
+        pristine = self._pristine()
+        with self._lock:
+            return copy.deepcopy(pristine)
+
+    def clear(self):
+        """Forget the parsed template"""
+        with self._lock:
+            self._document = None
+            self._mtime = None
+
+
+letterhead_template = TemplateCache(REPORT_TEMPLATE_PATH)
@@ -3,7 +3,7 @@ Sample report generator to demonstrate the document output
 Run this script to generate a sample Technical Report
 """
 
-from app import create_technical_report
+from report_engine import create_technical_report
 from datetime import datetime
 from PIL import Image, ImageDraw
 import io
@@ -0,0 +1,180 @@
+"""
+Compact codec for shareable form links
+Version 2 payloads are 'v2:' + base64(deflate(JSON with short keys)); older links are plain base64 JSON
+"""
+
+import base64
+import json
+import zlib
+
+V2_PREFIX = 'v2:'
+
+# Decoded payloads larger than this are rejected (protects against zip bombs)
+MAX_DECODED_BYTES = 2 * 1024 * 1024
+
+# Short codes for the field names used by collect_form_data
+KEY_CODES = {
+    'basic_info': 'b',
+    'kitchen_data': 'k',
+    'customer_name': 'cn',
+    'project_name': 'pn',
+    'contact_person': 'cp',
+    'outlet_location': 'ol',
+    'contact_number': 'ct',
+    'visit_type': 'vt',
+    'visit_class': 'vc',
+    'report_date': 'rd',
+    'work_performed': 'wp',
+    'spare_parts': 'sp',
+    'recommendations': 'rc',
+    'technician_name': 'tn',
+    'service_date': 'sd',
+    'report_type': 'rt',
+    'work_performed_list': 'wl',
+    'num_kitchens': 'nk',
+    'kitchen_list': 'kl',
+    'equipment_list': 'el',
+    'inspection_data': 'i',
+    'alarm_details': 'ad',
+    'with_marvel': 'm',
+    'location': 'l',
+    'name': 'n',
+    'type': 't',
+    'answer': 'a',
+    'comment': 'c',
+    'description': 'd',
+    'quantity': 'q',
+    'title': 'ti',
+    'photo_descriptions': 'pd',
+    'photos': 'ph'
+}
+CODE_KEYS = {code: key for key, code in KEY_CODES.items()}
+
+# Escape marker for data keys that would otherwise read as a short code
+ESCAPE = '~'
+
+# Equipment fields left out of the payload when they hold their default value
+EQUIPMENT_DEFAULTS = {'type': '', 'with_marvel': False, 'location': '', 'alarm_details': {}}
+
+
+def _compact_key(key):
+    if not isinstance(key, str):
+        return key
+    if key in KEY_CODES:
+        return KEY_CODES[key]
+    if key in CODE_KEYS or key.startswith(ESCAPE):
+        return ESCAPE + key
+    return key
+
+
+def _expand_key(key):
+    if not isinstance(key, str):
+        return key
+    if key.startswith(ESCAPE):
+        return key[1:]
+    return CODE_KEYS.get(key, key)
+
+
+def _rename_keys(value, rename):
+    """Apply rename to every dictionary key in a JSON value"""
+    if isinstance(value, dict):
+        return {rename(key): _rename_keys(item, rename) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rename_keys(item, rename) for item in value]
+    return value
+
+
+def _strip_empty(form_data):
+    """Drop empty basic info, default equipment fields and unanswered questions"""
+    basic_info = {key: value for key, value in form_data.get('basic_info', {}).items() if value}
+    kitchen_data = dict(form_data.get('kitchen_data', {}))
+
+    kitchens = []
+    for kitchen in kitchen_data.get('kitchen_list', []):
+        equipment_list = []
+        for equipment in kitchen.get('equipment_list', []):
+            compact = {key: value for key, value in equipment.items()
+                       if key not in EQUIPMENT_DEFAULTS or value != EQUIPMENT_DEFAULTS[key]}
+            inspection_data = {}
+            for item_key, data in equipment.get('inspection_data', {}).items():
+                if isinstance(data, dict):
+                    data = {field: value for field, value in data.items() if value != ''}
+                if data:
+                    inspection_data[item_key] = data
+            compact['inspection_data'] = inspection_data
+            equipment_list.append(compact)
+        kitchens.append(dict(kitchen, equipment_list=equipment_list))
+    if 'kitchen_list' in kitchen_data:
+        kitchen_data['kitchen_list'] = kitchens
+
+    return {'basic_info': basic_info, 'kitchen_data': kitchen_data}
+
+
+def _restore_defaults(form_data):
+    """Put back the fields removed by _strip_empty"""
+    for kitchen in form_data.get('kitchen_data', {}).get('kitchen_list', []):
+        for equipment in kitchen.get('equipment_list', []):
+            for key, default in EQUIPMENT_DEFAULTS.items():
+                equipment.setdefault(key, dict(default) if isinstance(default, dict) else default)
+            for data in equipment.setdefault('inspection_data', {}).values():
+                if isinstance(data, dict):
+                    data.setdefault('answer', '')
+                    data.setdefault('comment', '')
+    return form_data
+
+
+def encode_v1(form_data):
+    """Encode form data the original way (base64 of the JSON)"""
+    json_str = json.dumps(form_data, separators=(',', ':'))
+    return base64.urlsafe_b64encode(json_str.encode('utf-8')).decode('utf-8')
+
+
+def decode_v1(encoded):
+    """Decode an original base64 JSON payload"""
+    return json.loads(base64.urlsafe_b64decode(encoded.encode('utf-8')).decode('utf-8'))
+
+
+def encode_v2(form_data):
+    """
+    Encode form data as a compact v2 payload
+
+    Args:
+        form_data: Dictionary from collect_form_data
+
+    Returns:
+        'v2:' followed by URL-safe base64 (without padding) of the deflated JSON
+    """
+    compact = _rename_keys(_strip_empty(form_data), _compact_key)
+    json_bytes = json.dumps(compact, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    compressed = zlib.compress(json_bytes, level=9, wbits=-15)
+    return V2_PREFIX + base64.urlsafe_b64encode(compressed).decode('ascii').rstrip('=')
+
+
+def decode_v2(encoded):
+    """
+    Decode a v2 payload
+
+    Raises:
+        ValueError: If the payload is corrupted or too large
+    """
+    body = encoded[len(V2_PREFIX):]
+    try:
+        compressed = base64.urlsafe_b64decode(body + '=' * (-len(body) % 4))
+        decompressor = zlib.decompressobj(wbits=-15)
+        json_bytes = decompressor.decompress(compressed, MAX_DECODED_BYTES)
+    except (ValueError, zlib.error) as e:
+        raise ValueError(f"corrupted v2 payload: {e}") from e
+    if decompressor.unconsumed_tail or not decompressor.eof:
+        raise ValueError("v2 payload is truncated or too large")
+
+    form_data = _rename_keys(json.loads(json_bytes.decode('utf-8')), _expand_key)
+    if not isinstance(form_data, dict):
+        raise ValueError("v2 payload is not an object")
+    return _restore_defaults(form_data)
+
+
+def decode_share_payload(encoded):
+    """Decode a v1 or v2 payload, based on its prefix"""
+    if encoded.startswith(V2_PREFIX):
+        return decode_v2(encoded)
+    return decode_v1(encoded)
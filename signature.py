@@ -0,0 +1,234 @@
+"""
+Signature processing for the technician and customer canvases
+Turns an st_canvas drawing into what the reports embed: a cropped PNG of the bitmap, or a compact stroke list
+
+Stroke signatures are plain JSON, small enough for drafts and share links:
+    {'size': [canvas width, canvas height], 'strokes': [[stroke width, x0, y0, x1, y1, ...], ...]}
+They are only rasterized when a report is built, at the printed size (see add_signature_picture).
+"""
+
+import hashlib
+import io
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Largest signature image kept (width, height in pixels)
+SIGNATURE_MAX_SIZE = (200, 80)
+# Narrower signatures are padded with white to this width:height ratio, since reports print
+# signatures at a fixed width (a single vertical stroke would otherwise print inches tall)
+SIGNATURE_MIN_ASPECT = SIGNATURE_MAX_SIZE[0] / SIGNATURE_MAX_SIZE[1]
+# Resolution stroke signatures are rendered at for the printed report
+SIGNATURE_PRINT_DPI = 300
+# Strokes are drawn this many times larger, then downsampled, to smooth their edges
+SIGNATURE_SUPERSAMPLE = 3
+# Number of processed signatures kept in memory (two canvases per session)
+SIGNATURE_CACHE_SIZE = 32
+
+_signature_cache = OrderedDict()
+
+
+def alpha_bbox(image_data):
+    """
+    Bounding box of the drawn (non-transparent) pixels of an RGBA canvas array
+
+    Args:
+        image_data: Array of shape (height, width, 4)
+
+    Returns:
+        (left, upper, right, lower) like PIL's getbbox, or None for an empty canvas
+    """
+    alpha = np.asarray(image_data)[:, :, 3]
+    rows = alpha.any(axis=1)
+    if not rows.any():
+        return None
+    columns = alpha.any(axis=0)
+    # argmax finds the first True of each projection, from the start and from the end
+    upper = int(rows.argmax())
+    lower = len(rows) - int(rows[::-1].argmax())
+    left = int(columns.argmax())
+    right = len(columns) - int(columns[::-1].argmax())
+    return left, upper, right, lower
+
+
+def _cropped_key(cropped, max_size):
+    """Cache key of a cropped drawing (its pixels and the target size)"""
+    cropped = np.ascontiguousarray(cropped)
+    digest = hashlib.sha1(f"{cropped.shape}{cropped.dtype}{max_size}".encode('ascii'))
+    digest.update(cropped.data)
+    return digest.hexdigest()
+
+
+def _signature_png(cropped, max_size):
+    """Composite cropped RGBA strokes onto white (centered, padded to max_size's ratio if narrower) and shrink them"""
+    strokes = Image.fromarray(cropped.astype(np.uint8), 'RGBA')
+    width = max(strokes.width, round(strokes.height * max_size[0] / max_size[1]))
+    signature = Image.new('RGB', (width, strokes.height), 'white')
+    signature.paste(strokes, ((width - strokes.width) // 2, 0), mask=strokes.getchannel('A'))
+    signature.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    signature.save(output, format='PNG')
+    return output.getvalue()
+
+
+def signature_image_bytes(image_data, max_size=SIGNATURE_MAX_SIZE):
+    """
+    Crop a canvas drawing to its strokes, composite it onto white and shrink it to max_size
+
+    Signatures narrower than max_size's width:height ratio are padded with white to that ratio.
+
+    Args:
+        image_data: RGBA canvas array of shape (height, width, 4)
+        max_size: (width, height) the signature must fit in
+
+    Returns:
+        PNG bytes, or None if nothing was drawn
+    """
+    bbox = alpha_bbox(image_data)
+    if bbox is None:
+        return None
+    left, upper, right, lower = bbox
+    return _signature_png(np.asarray(image_data)[upper:lower, left:right], max_size)
+
+
+def canvas_signature(image_data, max_size=SIGNATURE_MAX_SIZE):
+    """
+    Process a signature canvas, reusing the result while the drawing is unchanged
+
+    Only the cropped strokes are hashed, so an empty canvas costs one pass over the alpha
+    channel and an unchanged signature one hash of its bounding box.
+
+    Args:
+        image_data: st_canvas image_data (None before the canvas is drawn)
+        max_size: (width, height) the signature must fit in
+
+    Returns:
+        BytesIO with the PNG for the report builders, or None if nothing was drawn
+    """
+    if image_data is None:
+        return None
+    bbox = alpha_bbox(image_data)
+    if bbox is None:
+        return None
+    left, upper, right, lower = bbox
+    cropped = np.asarray(image_data)[upper:lower, left:right]
+
+    key = _cropped_key(cropped, max_size)
+    png = _signature_cache.get(key)
+    if png is None:
+        png = _signature_png(cropped, max_size)
+        _signature_cache[key] = png
+        while len(_signature_cache) > SIGNATURE_CACHE_SIZE:
+            _signature_cache.popitem(last=False)
+    else:
+        _signature_cache.move_to_end(key)
+    return io.BytesIO(png)
+
+
+def canvas_strokes(json_data, width, height):
+    """
+    Compact stroke list of an st_canvas freedraw drawing
+
+    Args:
+        json_data: st_canvas json_data (fabric.js objects; freedraw strokes are 'path' objects
+            whose commands use canvas coordinates)
+        width, height: Canvas size in pixels
+
+    Returns:
+        Stroke signature dictionary, or None if nothing was drawn
+    """
+    strokes = []
+    for obj in (json_data or {}).get('objects', []):
+        if obj.get('type') != 'path':
+            continue
+        points = []
+        for command in obj.get('path') or []:
+            # 'M'/'L' end at (x, y); freedraw's 'Q' curves pass close to their control point
+            for x, y in zip(command[1::2], command[2::2]):
+                point = [round(x), round(y)]
+                if points[-2:] != point:
+                    points.extend(point)
+        if points:
+            strokes.append([obj.get('strokeWidth', 1)] + points)
+    if not strokes:
+        return None
+    return {'size': [width, height], 'strokes': strokes}
+
+
+def is_stroke_signature(signature):
+    """True for stroke signature dictionaries (as opposed to PNG file objects)"""
+    return isinstance(signature, dict) and 'strokes' in signature
+
+
+def _stroke_bbox(strokes):
+    """(left, upper, right, lower) covering all strokes including their width"""
+    left = upper = float('inf')
+    right = lower = float('-inf')
+    for stroke in strokes:
+        half = stroke[0] / 2
+        xs, ys = stroke[1::2], stroke[2::2]
+        left, right = min(left, min(xs) - half), max(right, max(xs) + half)
+        upper, lower = min(upper, min(ys) - half), max(lower, max(ys) + half)
+    return left, upper, right, lower
+
+
+def render_strokes(signature, print_width_inches, dpi=SIGNATURE_PRINT_DPI):
+    """
+    Rasterize a stroke signature for a given printed width
+
+    Args:
+        signature: Stroke signature dictionary from canvas_strokes
+        print_width_inches: Width the signature is printed at
+        dpi: Pixels per printed inch
+
+    Returns:
+        Grayscale PNG bytes cropped to the strokes, at most 1/SIGNATURE_MIN_ASPECT of the width
+        tall (narrower signatures are centered on white)
+    """
+    left, upper, right, lower = _stroke_bbox(signature['strokes'])
+    width_px = max(1, round(print_width_inches * dpi))
+    max_height_px = max(1, round(width_px / SIGNATURE_MIN_ASPECT))
+    scale = min(width_px / max(right - left, 1), max_height_px / max(lower - upper, 1))
+    height_px = max(1, min(max_height_px, round((lower - upper) * scale)))
+    # Horizontal offset (in canvas pixels) that centers a narrow signature
+    left -= (width_px / scale - (right - left)) / 2
+
+    ss = scale * SIGNATURE_SUPERSAMPLE
+    image = Image.new('L', (width_px * SIGNATURE_SUPERSAMPLE, height_px * SIGNATURE_SUPERSAMPLE), 255)
+    draw = ImageDraw.Draw(image)
+    for stroke in signature['strokes']:
+        line_width = max(1, round(stroke[0] * ss))
+        points = [((x - left) * ss, (y - upper) * ss) for x, y in zip(stroke[1::2], stroke[2::2])]
+        if len(points) > 1:
+            draw.line(points, fill=0, width=line_width, joint='curve')
+        # Round caps (and dots for single-point strokes)
+        radius = line_width / 2
+        for x, y in (points[0], points[-1]):
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=0)
+    image = image.resize((width_px, height_px), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    image.save(output, format='PNG', dpi=(dpi, dpi), optimize=True)
+    return output.getvalue()
+
+
+def add_signature_picture(run, signature, width):
+    """
+    Add a signature to a document run
+
+    Args:
+        run: python-docx Run the picture is added to
+        signature: Stroke signature dictionary, or a file object holding the signature image
+        width: Printed width as a docx Length (e.g. Inches(2))
+    """
+    if is_stroke_signature(signature):
+        return run.add_picture(io.BytesIO(render_strokes(signature, width.inches)), width=width)
+    signature.seek(0)
+    return run.add_picture(signature, width=width)
+
+
+def clear_signature_cache():
+    """Forget all processed signatures"""
+    _signature_cache.clear()
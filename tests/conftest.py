@@ -10,6 +10,9 @@ from unittest.mock import MagicMock, patch
 # Add the parent directory to the path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Process report photos serially unless a test asks for a process pool
+os.environ.setdefault('REPORT_PHOTO_WORKERS', '1')
+
 # Import test fixtures
 from tests.fixtures import (
     BASIC_REPORT_DATA,
@@ -116,7 +119,7 @@ def mock_streamlit():
 @pytest.fixture
 def mock_document():
     """Fixture providing mock Document"""
-    with patch('app.Document') as mock_doc_class:
+    with patch('report_engine.Document') as mock_doc_class:
         mock_doc = MagicMock()
         mock_doc_class.return_value = mock_doc
         
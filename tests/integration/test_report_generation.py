@@ -40,8 +40,8 @@ class TestReportGenerationIntegration(unittest.TestCase):
             'service_date': '2024-01-01'
         }
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
     def test_complete_report_generation_no_template(self, mock_exists, mock_document):
         """Test complete report generation without template"""
         # Setup mocks
@@ -60,8 +60,8 @@ class TestReportGenerationIntegration(unittest.TestCase):
         mock_document.assert_called_once()
         mock_doc.save.assert_called_once()
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
     def test_complete_report_generation_with_template(self, mock_exists, mock_document):
         """Test complete report generation with template"""
         # Setup mocks
@@ -129,8 +129,8 @@ class TestReportGenerationIntegration(unittest.TestCase):
         mock_table.cell = mock_cell_func
         mock_doc.add_table.return_value = mock_table
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
     def test_report_with_equipment_inspection(self, mock_exists, mock_document):
         """Test report generation with equipment inspection data"""
         # Setup mocks
@@ -181,8 +181,8 @@ class TestReportGenerationIntegration(unittest.TestCase):
         mock_document.assert_called_once()
         mock_doc.save.assert_called_once()
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
     def test_report_with_photos(self, mock_exists, mock_document):
         """Test report generation with photos"""
         # Setup mocks
@@ -223,8 +223,8 @@ class TestReportGenerationIntegration(unittest.TestCase):
         mock_document.assert_called_once()
         mock_doc.save.assert_called_once()
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
     def test_report_with_signatures(self, mock_exists, mock_document):
         """Test report generation with signatures"""
         # Setup mocks
@@ -302,8 +302,8 @@ class TestReportGenerationIntegration(unittest.TestCase):
     def test_sample_data_report_integration(self):
         """Test that sample data can generate a report"""
         # This test uses the actual sample data
-        with patch('app.Document') as mock_document, \
-             patch('app.os.path.exists') as mock_exists:
+        with patch('report_engine.Document') as mock_document, \
+             patch('report_engine.os.path.exists') as mock_exists:
             
             # Setup mocks
             mock_exists.return_value = False
@@ -346,8 +346,8 @@ class TestReportGenerationIntegration(unittest.TestCase):
                 ]
                 
                 # Generate report
-                with patch('app.Document') as mock_document, \
-                     patch('app.os.path.exists') as mock_exists:
+                with patch('report_engine.Document') as mock_document, \
+                     patch('report_engine.os.path.exists') as mock_exists:
                     
                     mock_exists.return_value = False
                     mock_doc = MagicMock()
@@ -384,8 +384,8 @@ class TestReportGenerationEdgeCases(unittest.TestCase):
             'service_date': '2024-01-01'
         }
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
     def test_empty_data_report(self, mock_exists, mock_document):
         """Test report generation with empty data"""
         # Setup mocks
@@ -409,8 +409,8 @@ class TestReportGenerationEdgeCases(unittest.TestCase):
         mock_document.assert_called_once()
         mock_doc.save.assert_called_once()
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
     def test_missing_recommendations(self, mock_exists, mock_document):
         """Test report generation without recommendations"""
         # Setup mocks
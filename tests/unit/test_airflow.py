@@ -0,0 +1,182 @@
+"""
+Unit tests for airflow.py
+"""
+
+import unittest
+import sys
+import os
+import math
+import random
+import time
+from unittest.mock import patch
+
+import numpy as np
+from docx import Document
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import airflow
+from airflow import (calculate_airflow, extract_k_factors, get_extract_k_factor, get_supply_k_factor,
+                     store_airflow, supply_k_factors)
+from report_engine import create_testing_commissioning_report
+
+
+def make_canopy(model, extract, supply=None):
+    """Build a canopy dictionary in the shape kept by the T&C form"""
+    return {'drawing_number': 'D-1', 'location': 'Kitchen', 'model': model, 'modules': len(extract),
+            'extract_data': extract, 'supply_data': supply or []}
+
+
+class TestAirflow(unittest.TestCase):
+    """Test cases for the vectorized T&C airflow engine"""
+
+    def test_k_factor_module(self):
+        """Test Qv = K √Pa and the percentage of design"""
+        canopy = make_canopy('KVF', [{'k_factor': 67.21, 'tab_reading': 25.0, 'design_flowrate_ls': 100.0}])
+        extract = calculate_airflow([canopy])[0].extract
+        self.assertAlmostEqual(extract.flowrate_m3h[0], 67.21 * 5)
+        self.assertAlmostEqual(extract.flowrate_m3s[0], 67.21 * 5 / 3600)
+        self.assertAlmostEqual(extract.percentage[0], (67.21 * 5 / 3600) / 0.1 * 100)
+
+    def test_missing_readings_give_zero(self):
+        """Test that modules without a reading, K-Factor or design flowrate report zero"""
+        canopy = make_canopy('KVI', [
+            {'k_factor': 67.21, 'tab_reading': 0.0, 'design_flowrate_ls': 100.0},
+            {'k_factor': 0.0, 'tab_reading': 30.0, 'design_flowrate_ls': 100.0},
+            {'k_factor': 67.21, 'tab_reading': 30.0, 'design_flowrate_ls': 0.0}
+        ])
+        extract = calculate_airflow([canopy])[0].extract
+        self.assertEqual(list(extract.flowrate_m3h[:2]), [0.0, 0.0])
+        self.assertGreater(extract.flowrate_m3h[2], 0)
+        self.assertEqual(list(extract.percentage), [0.0, 0.0, 0.0])
+
+    def test_anemometer_module(self):
+        """Test QE = V × L × W for water wash hoods"""
+        canopy = make_canopy('CMWF', [{'anemometer': 2.0, 'length_opening': 1500, 'design_flowrate_ls': 270.0,
+                                       'k_factor': 100.0, 'tab_reading': 50.0}])
+        extract = calculate_airflow([canopy])[0].extract
+        self.assertAlmostEqual(extract.flowrate_m3s[0], 2.0 * 1.5 * 0.09)
+        self.assertAlmostEqual(extract.flowrate_m3h[0], 2.0 * 1.5 * 0.09 * 3600)
+        self.assertAlmostEqual(extract.percentage[0], 100.0)
+
+    def test_totals_per_canopy(self):
+        """Test that totals only sum the canopy's own modules"""
+        canopies = [
+            make_canopy('KVF', [{'k_factor': 100.0, 'tab_reading': 16.0, 'design_flowrate_ls': 50.0}] * 2,
+                        [{'k_factor': 121.7, 'tab_reading': 9.0, 'design_flowrate_ls': 40.0}]),
+            make_canopy('UVF', [{'k_factor': 53.82, 'tab_reading': 36.0, 'design_flowrate_ls': 80.0}])
+        ]
+        first, second = calculate_airflow(canopies)
+        self.assertAlmostEqual(first.extract_total.flowrate_m3h, 800.0)
+        self.assertAlmostEqual(first.extract_total.design_ls, 100.0)
+        self.assertAlmostEqual(first.extract_total.percentage, 800.0 / 360.0 * 100)
+        self.assertAlmostEqual(first.supply_total.flowrate_m3h, 121.7 * 3)
+        self.assertAlmostEqual(second.extract_total.flowrate_m3h, 53.82 * 6)
+        self.assertEqual(second.supply_total.flowrate_m3h, 0.0)
+        self.assertEqual(len(second.supply.flowrate_m3h), 0)
+
+    def test_matches_scalar_formulas(self):
+        """Test the vectorized pass against the per-module formulas used by the form"""
+        rng = random.Random(11)
+        canopies = []
+        for _ in range(20):
+            model = rng.choice(['KVF', 'KVI', 'UVF', 'CMWF', 'CMW-CJ', 'Mobichef'])
+            modules = [{'k_factor': rng.choice([0.0, rng.uniform(50, 400)]),
+                        'tab_reading': rng.choice([0.0, rng.uniform(0, 200)]),
+                        'anemometer': rng.uniform(0, 5), 'length_opening': rng.randrange(0, 4000, 100),
+                        'design_flowrate_ls': rng.choice([0.0, rng.uniform(50, 1000)])}
+                       for _ in range(rng.randint(0, 10))]
+            canopies.append(make_canopy(model, modules, [dict(module) for module in modules]))
+
+        for canopy, result in zip(canopies, calculate_airflow(canopies)):
+            for j, module in enumerate(canopy['extract_data']):
+                if canopy['model'] in ('CMWF', 'CMW-CJ'):
+                    m3s = module['anemometer'] * (module['length_opening'] / 1000) * 0.09
+                elif module['tab_reading'] > 0 and module['k_factor'] > 0:
+                    m3s = module['k_factor'] * math.sqrt(module['tab_reading']) / 3600
+                else:
+                    m3s = 0.0
+                design = module['design_flowrate_ls']
+                percentage = m3s / (design / 1000) * 100 if design > 0 else 0
+                self.assertAlmostEqual(result.extract.flowrate_m3s[j], m3s)
+                self.assertAlmostEqual(result.extract.percentage[j], percentage)
+
+    def test_store_airflow(self):
+        """Test that results are written back into the module dictionaries"""
+        canopies = [make_canopy('KVF', [{'k_factor': 100.0, 'tab_reading': 4.0, 'design_flowrate_ls': 0.0}],
+                                [{'k_factor': 121.7, 'tab_reading': 0.0}])]
+        store_airflow(canopies, calculate_airflow(canopies))
+        module = canopies[0]['extract_data'][0]
+        self.assertEqual(module['flowrate_m3h'], 200.0)
+        self.assertIsInstance(module['flowrate_m3s'], float)
+        self.assertEqual(canopies[0]['supply_data'][0]['percentage'], 0.0)
+
+    def test_empty(self):
+        """Test that no canopies and canopies without modules are handled"""
+        self.assertEqual(calculate_airflow([]), [])
+        result = calculate_airflow([{'model': ''}])[0]
+        self.assertEqual(result.extract_total.flowrate_m3h, 0.0)
+
+    def test_report_uses_engine_totals(self):
+        """Test that the report recalculates flowrates instead of trusting stored values"""
+        canopy = make_canopy('KVF', [{'k_factor': 100.0, 'tab_reading': 16.0, 'design_flowrate_ls': 100.0,
+                                      'flowrate_m3h': 999.0, 'percentage': 999.0}] * 2,
+                             [{'k_factor': 100.0, 'tab_reading': 25.0, 'design_flowrate_ls': 0.0}] * 2)
+        doc = Document(create_testing_commissioning_report({'canopy_data': [canopy]}))
+        texts = [cell.text for table in doc.tables for row in table.rows for cell in row.cells]
+        self.assertIn('800', texts)
+        self.assertIn('1000', texts)
+        self.assertIn('200 L/s', texts)
+        self.assertNotIn('999', texts)
+
+    def test_large_commissioning_job_performance(self):
+        """Test that 150 canopies of 10 modules calculate quickly"""
+        modules = [{'k_factor': 134.46, 'tab_reading': 42.0, 'design_flowrate_ls': 120.0,
+                    'anemometer': 1.2, 'length_opening': 1800}] * 10
+        canopies = [make_canopy(['KVF', 'CMWF'][i % 2], modules, modules) for i in range(150)]
+        start = time.perf_counter()
+        results = calculate_airflow(canopies)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(results), 150)
+        self.assertLess(elapsed, 0.5)
+
+
+class TestKFactors(unittest.TestCase):
+    """Test cases for the K-Factor lookups"""
+
+    def test_extract_tables(self):
+        """Test extract K-Factors by filter count and model"""
+        self.assertEqual(get_extract_k_factor(2, 'KVF'), 134.46)
+        self.assertEqual(get_extract_k_factor(2, 'UVF'), 107.64)
+        self.assertEqual(get_extract_k_factor(2, 'KVF', with_uv=True), 107.64)
+        self.assertEqual(list(extract_k_factors('KVI', [0, 1, 6, 7, 2.5])), [0.0, 67.21, 403.30, 0.0, 0.0])
+
+    def test_supply_interpolation(self):
+        """Test supply K-Factors at, between and outside the table lengths"""
+        self.assertEqual(get_supply_k_factor(1.5), 182.6)
+        self.assertEqual(get_supply_k_factor(1.55), 188.7)
+        self.assertEqual(get_supply_k_factor(0.5), 121.7)
+        self.assertEqual(get_supply_k_factor(4.5), 486.9)
+        # Halfway values round like round() on the interpolated value
+        self.assertEqual(get_supply_k_factor(1.125), 136.9)
+
+    def test_batched_lookup_matches_scalar(self):
+        """Test that a whole canopy looks up the same values as one module at a time"""
+        lengths = np.round(np.arange(0.8, 4.3, 0.01), 2)
+        batched = supply_k_factors('KVF', lengths)
+        self.assertEqual(list(batched), [get_supply_k_factor(length) for length in lengths])
+
+    def test_new_model_from_config(self):
+        """Test that a hood model is added with table data only"""
+        tables = dict(airflow.CANOPY_K_FACTOR_TABLES, XYZ={'extract': 'xyz', 'supply': 'xyz'})
+        with patch.dict(airflow.EXTRACT_K_FACTORS, xyz=airflow._compile_extract_table({1: 10.0, 2: 20.0})), \
+             patch.dict(airflow.SUPPLY_K_FACTORS, xyz=(np.array([1.0, 2.0]), np.array([100.0, 200.0]))), \
+             patch.object(airflow, 'CANOPY_K_FACTOR_TABLES', tables):
+            self.assertEqual(list(extract_k_factors('XYZ', [1, 2, 3])), [10.0, 20.0, 0.0])
+            self.assertEqual(list(supply_k_factors('XYZ', [1.5, 3.0])), [150.0, 200.0])
+            self.assertEqual(get_supply_k_factor(1.5, 'KVF'), 182.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
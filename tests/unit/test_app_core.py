@@ -2,12 +2,14 @@
 Unit tests for core functions in app.py
 """
 
+import logging
 import unittest
 import sys
 import os
 from unittest.mock import MagicMock, patch, Mock
 from datetime import datetime
 from io import BytesIO
+import time
 
 # Add the parent directory to the path to import the modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -15,10 +17,25 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from app import (
     find_question_text,
     get_kitchen_summary,
+    group_photos_by_key,
+    compact_equipment_summary,
+    cached_equipment_summary,
+    equipment_summaries,
+    render_checklist,
+    render_report_job,
+    set_equipment_value,
+    unanswered_questions,
+    summarize_equipment,
+    log_render_time,
     create_technical_report,
     render_checklist_item
 )
+from checklist_index import COMPILED_CHECKLISTS
 from equipment_config import EQUIPMENT_TYPES
+from report_jobs import FAILED, RUNNING
+from tests.conftest import MockSessionState
+
+logger = logging.getLogger(__name__)
 
 
 class TestAppCore(unittest.TestCase):
@@ -157,8 +174,8 @@ class TestAppCore(unittest.TestCase):
         # Should return empty list since no equipment
         self.assertEqual(result, [])
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
     def test_create_technical_report_basic(self, mock_exists, mock_document):
         """Test creating technical report with basic data"""
         # Setup mocks
@@ -202,14 +219,15 @@ class TestAppCore(unittest.TestCase):
         mock_document.assert_called_once()
         mock_doc.save.assert_called_once()
     
-    @patch('app.Document')
-    @patch('app.os.path.exists')
-    def test_create_technical_report_with_template(self, mock_exists, mock_document):
+    @patch('report_engine.letterhead_template')
+    @patch('report_engine.Document')
+    @patch('report_engine.os.path.exists')
+    def test_create_technical_report_with_template(self, mock_exists, mock_document, mock_template):
         """Test creating technical report with template"""
         # Setup mocks
         mock_exists.return_value = True
         mock_doc = MagicMock()
-        mock_document.return_value = mock_doc
+        mock_template.new_document.return_value = mock_doc
         
         # Setup mock document structure
         mock_doc.sections = [MagicMock()]
@@ -240,9 +258,9 @@ class TestAppCore(unittest.TestCase):
         # Call function
         result = create_technical_report(test_data)
         
-        # Verify template path was used
-        expected_template_path = os.path.join(os.path.dirname(__file__), '..', '..', 'Templates', 'Report Letter Head.docx')
-        mock_document.assert_called_once()
+        # Verify the cached template was used instead of a blank document
+        mock_template.new_document.assert_called_once()
+        mock_document.assert_not_called()
     
     @patch('app.st')
     def test_render_checklist_item_yes_no(self, mock_st):
@@ -411,6 +429,273 @@ class TestAppHelpers(unittest.TestCase):
                 result = find_question_text(equip_type, first_item['id'])
                 self.assertEqual(result, first_item['question'])
 
+    def test_group_photos_by_key(self):
+        """Test that photos are grouped under every answered key they start with"""
+        photos = {
+            'photo_lights_ballast_0': 'a',
+            'photo_lights_0': 'b',
+            'photo_alarm_1': 'c',
+            'lights_ballast': 'd'
+        }
+        grouped = group_photos_by_key(photos, ['lights', 'lights_ballast', 'alarm'])
+        
+        self.assertEqual(grouped['lights'], [('photo_lights_ballast_0', 'a'), ('photo_lights_0', 'b')])
+        self.assertEqual(grouped['lights_ballast'], [('photo_lights_ballast_0', 'a')])
+        self.assertEqual(grouped['alarm'], [('photo_alarm_1', 'c')])
+
+
+class TestKitchenSummary(unittest.TestCase):
+    """Test cases for the single-pass kitchen summary"""
+    
+    def build_kitchens(self, kitchen_count, equipment_count):
+        """Build kitchens with fully answered KVF inspections and one photo per answer"""
+        kitchens = []
+        for kitchen_idx in range(kitchen_count):
+            equipment_list = []
+            for equip_idx in range(equipment_count):
+                inspection_data = {}
+                photos = {}
+                for item_idx, item in enumerate(EQUIPMENT_TYPES['KVF']['checklist']):
+                    inspection_data[item['id']] = {'answer': ['Yes', 'No', 'N/A'][item_idx % 3], 'comment': ''}
+                    photos[f"photo_{item['id']}_0"] = f"{kitchen_idx}-{equip_idx}-{item_idx}.jpg"
+                equipment_list.append({
+                    'type': 'KVF',
+                    'location': f"Line {equip_idx}",
+                    'inspection_data': inspection_data,
+                    'photos': photos
+                })
+            kitchens.append({'name': f"Kitchen {kitchen_idx}", 'equipment_list': equipment_list})
+        return kitchens
+    
+    @patch('app.st.session_state')
+    def test_summary_photo_buckets_and_exclusions(self, mock_session_state):
+        """Test photo buckets, skipped foreign keys and excluded No answers"""
+        mock_session_state.kitchen_list = [{'name': 'K', 'equipment_list': [{
+            'type': 'KVF',
+            'inspection_data': {
+                'lights_operational': {'answer': 'Yes'},
+                'capture_jet_fan': {'answer': 'No'},
+                'lights_ballast': {'answer': 'No'},
+                'module_count': {'answer': '3'},
+                'marvel_power_supply': {'answer': 'Yes'}
+            },
+            'photos': {
+                'photo_capture_jet_fan_0': 'fan.jpg',
+                'photo_lights_operational_0': 'lights.jpg',
+                'photo_lights_ballast_0': 'ballast.jpg'
+            }
+        }]}]
+        
+        equipment_summary = get_kitchen_summary()[0]['equipment'][0]
+        
+        self.assertEqual([r['item'] for r in equipment_summary['yes_responses']], ['lights_operational'])
+        self.assertEqual([r['item'] for r in equipment_summary['no_responses']], ['capture_jet_fan'])
+        self.assertEqual(equipment_summary['yes_photos'], {'photo_lights_operational_0': 'lights.jpg'})
+        self.assertEqual(equipment_summary['no_photos'], {'photo_capture_jet_fan_0': 'fan.jpg'})
+        self.assertIs(equipment_summary['issues_found'], equipment_summary['no_responses'])
+    
+    @patch('app.st.session_state')
+    def test_summary_large_inspection_performance(self, mock_session_state):
+        """Benchmark: summary time grows linearly up to 50 kitchens x 30 equipment"""
+        timings = {}
+        for kitchen_count in (5, 50):
+            mock_session_state.kitchen_list = self.build_kitchens(kitchen_count, 30)
+            start = time.perf_counter()
+            summary = get_kitchen_summary()
+            timings[kitchen_count] = time.perf_counter() - start
+            self.assertEqual(sum(len(k['equipment']) for k in summary), kitchen_count * 30)
+        
+        logger.info(f"Kitchen summary: 5x30 {timings[5] * 1000:.1f} ms, 50x30 {timings[50] * 1000:.1f} ms")
+        # 10x the equipment should take roughly 10x the time, never quadratic
+        self.assertLess(timings[50], timings[5] * 25)
+
+
+
+class TestEquipmentView(unittest.TestCase):
+    """Test cases for the collapsed equipment summaries"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.equipment = {
+            'type': 'KVF',
+            'location': 'Line 1',
+            'with_marvel': False,
+            'inspection_data': {
+                'lights_operational': {'answer': 'Yes'},
+                'capture_jet_fan': {'answer': 'No'},
+                'lights_ballast': {'answer': 'N/A'}
+            },
+            'photos': {'photo_lights_operational': 'lights.jpg'}
+        }
+    
+    def test_compact_summary_counts(self):
+        """Test answer and photo counts of an equipment"""
+        summary = compact_equipment_summary(self.equipment)
+        self.assertEqual(summary['type_name'], EQUIPMENT_TYPES['KVF']['name'])
+        self.assertEqual((summary['yes'], summary['no'], summary['na'], summary['photos']), (1, 1, 1, 1))
+        self.assertIsNone(compact_equipment_summary({'type': '', 'inspection_data': {}}))
+    
+    def test_summary_cache(self):
+        """Test that summaries are reused until refreshed or the equipment is replaced"""
+        with patch('app.st.session_state', {}):
+            first = cached_equipment_summary('k0_e0', self.equipment)
+            self.equipment['inspection_data']['capture_jet_fan']['answer'] = 'Yes'
+            self.assertIs(cached_equipment_summary('k0_e0', self.equipment), first)
+            self.assertEqual(cached_equipment_summary('k0_e0', self.equipment, refresh=True)['yes'], 2)
+            replaced = dict(self.equipment, inspection_data={})
+            self.assertEqual(cached_equipment_summary('k0_e0', replaced)['yes'], 0)
+    
+    def test_changes_mark_summary_dirty(self):
+        """Test that only changed values rebuild an equipment's summary"""
+        with patch('app.st.session_state', {}), \
+             patch('inspection_summary.summarize_equipment', wraps=summarize_equipment) as summarize:
+            summaries = equipment_summaries()
+            self.assertEqual(summaries.compact(self.equipment)['no'], 1)
+            
+            # Writing back the same answer, as every rerun does, keeps the summary
+            set_equipment_value(self.equipment, self.equipment['inspection_data']['capture_jet_fan'], 'answer', 'No')
+            summaries.compact(self.equipment)
+            self.assertEqual(summarize.call_count, 1)
+            
+            set_equipment_value(self.equipment, self.equipment['inspection_data']['capture_jet_fan'], 'answer', 'Yes')
+            self.assertEqual(summaries.compact(self.equipment)['yes'], 2)
+            self.assertEqual(summarize.call_count, 2)
+            
+            set_equipment_value(self.equipment, self.equipment, 'type', '')
+            self.assertIsNone(summaries.compact(self.equipment))
+    
+    @patch('app.st')
+    def test_checklist_answer_marks_summary_dirty(self, mock_st):
+        """Test that answering a question in the form updates the equipment summary"""
+        mock_st.session_state = {'q_capture_jet_fan_k0_e0': 'N/A'}
+        summaries = equipment_summaries()
+        self.assertEqual(summaries.compact(self.equipment)['na'], 1)
+        
+        item = {'id': 'capture_jet_fan', 'question': 'Is the capture jet fan working?', 'type': 'yes_no_na'}
+        render_checklist_item(self.equipment, item, 'k0_e0')
+        self.assertEqual(summaries.compact(self.equipment)['na'], 2)
+        self.assertEqual(summaries.compact(self.equipment)['no'], 0)
+    
+    def test_hidden_follow_up_left_out_of_summary(self):
+        """Test that a follow-up answer stops counting once its question's answer hides it"""
+        self.equipment['inspection_data']['ballast_issue'] = {'answer': 'No', 'comment': ''}
+        self.assertEqual(compact_equipment_summary(self.equipment)['no'], 1)
+        self.equipment['inspection_data']['lights_ballast']['answer'] = 'Yes'
+        self.assertEqual(compact_equipment_summary(self.equipment)['no'], 2)
+    
+    def test_unanswered_questions(self):
+        """Test that only visible Yes/No questions without an answer are reported"""
+        unanswered = unanswered_questions(self.equipment)
+        self.assertNotIn('lights_operational', unanswered)
+        self.assertNotIn('ballast_issue', unanswered)
+        self.equipment['inspection_data']['lights_ballast']['answer'] = 'Yes'
+        self.assertIn('ballast_issue', unanswered_questions(self.equipment))
+    
+    @patch('app.st')
+    def test_render_checklist_shows_visible_questions(self, mock_st):
+        """Test that follow-ups are rendered once their question's answer shows them"""
+        mock_st.session_state = {'q_lights_ballast_k0_e0': 'N/A'}
+        mock_st.columns.return_value = [MagicMock(), MagicMock()]
+        mock_st.number_input.return_value = 0
+        mock_st.file_uploader.return_value = None
+        
+        def rendered_keys():
+            return [call.kwargs['key'] for call in mock_st.selectbox.call_args_list]
+        
+        render_checklist(self.equipment, COMPILED_CHECKLISTS['KVF'], 'k0_e0')
+        self.assertIn('q_lights_ballast_k0_e0', rendered_keys())
+        self.assertNotIn('q_ballast_issue_k0_e0', rendered_keys())
+        
+        mock_st.selectbox.reset_mock()
+        mock_st.session_state['q_lights_ballast_k0_e0'] = 'Yes'
+        render_checklist(self.equipment, COMPILED_CHECKLISTS['KVF'], 'k0_e0')
+        keys = rendered_keys()
+        self.assertEqual(keys.index('q_ballast_issue_k0_e0'), keys.index('q_lights_ballast_k0_e0') + 1)
+        self.assertEqual(self.equipment['inspection_data']['lights_ballast']['answer'], 'Yes')
+    
+    def test_kitchen_summary_reads_ready_summaries(self):
+        """Test that report generation and the sidebar totals reuse clean summaries"""
+        kitchen_list = [{'name': 'K', 'equipment_list': [self.equipment, dict(self.equipment, photos={})]}]
+        with patch('app.st.session_state', MockSessionState(kitchen_list=kitchen_list)), \
+             patch('inspection_summary.summarize_equipment', wraps=summarize_equipment) as summarize:
+            totals = equipment_summaries().totals(kitchen_list)
+            summary = get_kitchen_summary()
+            self.assertEqual(summarize.call_count, 2)
+            self.assertEqual(totals, {'equipment': 2, 'yes': 2, 'no': 2, 'na': 2, 'photos': 1})
+            self.assertEqual(len(summary[0]['equipment']), 2)
+            
+            # Removed equipment is forgotten
+            kitchen_list[0]['equipment_list'].pop()
+            get_kitchen_summary()
+            self.assertEqual(len(equipment_summaries()._entries), 1)
+
+
+class TestReportJobView(unittest.TestCase):
+    """Test cases for the queued report view"""
+    
+    @patch('app.render_report_progress')
+    @patch('app.get_report_queue')
+    @patch('app.st')
+    def test_failed_job_stops_polling(self, mock_st, mock_queue, mock_progress):
+        """Test that a failed report is shown without the polling progress fragment"""
+        mock_st.button.return_value = False
+        mock_queue.return_value.get.return_value = MagicMock(status=FAILED, error='ValueError: no template')
+        render_report_job('job')
+        mock_st.error.assert_called_once_with("❌ Error generating report: ValueError: no template")
+        mock_progress.assert_not_called()
+        
+        mock_queue.return_value.get.return_value = MagicMock(status=RUNNING)
+        render_report_job('job')
+        mock_progress.assert_called_once_with('job')
+
+
+class TestRenderTiming(unittest.TestCase):
+    """Test cases for the render-time log"""
+
+    def test_logs_only_when_enabled(self):
+        """Test that render times are logged with REPORT_RENDER_TIMING and results pass through"""
+        timed = log_render_time(lambda kitchen_idx, equip_idx: kitchen_idx + equip_idx)
+        with patch('app.RENDER_TIMING', True), self.assertLogs('app', level='INFO') as logs:
+            self.assertEqual(timed(1, 2), 3)
+        self.assertIn('(1, 2) in', logs.output[0])
+
+        with patch('app.RENDER_TIMING', False), patch('app.logger') as mock_logger:
+            self.assertEqual(timed(2, 2), 4)
+        mock_logger.info.assert_not_called()
+
+
+class TestAppReruns(unittest.TestCase):
+    """Test cases for session state kept across reruns of the whole script"""
+
+    APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'app.py')
+
+    def setUp(self):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(self.APP_PATH, default_timeout=60)
+
+    def test_summaries_survive_rerun(self):
+        """Test that the equipment summaries are the same object after a rerun"""
+        self.at.run()
+        summaries = self.at.session_state['equipment_summaries']
+        self.at.run()
+        self.assertFalse(self.at.exception)
+        self.assertIs(self.at.session_state['equipment_summaries'], summaries)
+
+    def test_collapsed_summary_not_rebuilt_on_rerun(self):
+        """Test that a collapsed equipment is summarized once over several reruns"""
+        collapsed = {'id': 'e1', 'type': 'KVF', 'with_marvel': False, 'location': 'Line 2',
+                     'inspection_data': {'capture_jet_fan': {'answer': 'No', 'comment': ''}}, 'photos': {}}
+        self.at.session_state['kitchen_list'] = [{'id': 'k0', 'name': 'Kitchen 1', 'equipment_list': [
+            {'id': 'e0', 'type': '', 'with_marvel': False, 'location': '', 'inspection_data': {}, 'photos': {}},
+            collapsed
+        ]}]
+        with patch('inspection_summary.summarize_equipment', wraps=summarize_equipment) as summarize:
+            self.at.run()
+            self.at.run()
+        self.assertFalse(self.at.exception)
+        self.assertIn('edit_equipment_k0_e1', [button.key for button in self.at.button])
+        self.assertEqual([call.args[0]['id'] for call in summarize.call_args_list], ['e1'])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Unit tests for batch_reports.py
+"""
+
+import unittest
+import sys
+import os
+import json
+import base64
+import shutil
+import tempfile
+
+from docx import Document
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import photo_processing
+from batch_reports import decode_payload, format_summary, load_jobs, main, run_batch, write_atomic
+from tests.fixtures import create_test_photo, create_test_signature
+
+
+class TestBatchReports(unittest.TestCase):
+    """Test cases for headless batch report generation"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.temp_dir, 'payloads')
+        self.output_dir = os.path.join(self.temp_dir, 'reports')
+        os.makedirs(self.input_dir)
+
+        with open(os.path.join(self.input_dir, 'photo.jpg'), 'wb') as photo_file:
+            photo_file.write(create_test_photo().getvalue())
+        signature = base64.b64encode(create_test_signature().getvalue()).decode('ascii')
+
+        self.write_json('general.json', {
+            'report_type': 'General Service Report',
+            'customer_name': 'SELA Company',
+            'work_performed_list': [{
+                'title': 'Filter replacement',
+                'description': 'Replaced KSA filters',
+                'photos': [{'$file': 'photo.jpg'}],
+                'photo_descriptions': {}
+            }],
+            'technician_signature': {'$base64': signature}
+        })
+        with open(os.path.join(self.input_dir, 'bulk.jsonl'), 'w') as jsonl_file:
+            jsonl_file.write(json.dumps({'customer_name': 'A', 'equipment_inspection': []}) + '\n\n')
+            jsonl_file.write(json.dumps({'report_id': '../escape', 'customer_name': 'B'}) + '\n')
+            jsonl_file.write(json.dumps({'report_type': 'Unknown Report'}) + '\n')
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir)
+
+    def write_json(self, name, payload):
+        with open(os.path.join(self.input_dir, name), 'w') as json_file:
+            json.dump(payload, json_file)
+
+    def test_load_jobs(self):
+        """Test reading a directory with JSON and JSONL payloads"""
+        names = [name for name, _, _ in load_jobs([self.input_dir])]
+        self.assertEqual(names, ['bulk_0001', 'escape', 'bulk_0004', 'general'])
+
+    def test_decode_payload_markers(self):
+        """Test that file and base64 markers become BytesIO objects"""
+        decoded = decode_payload({'photos': [{'$file': 'photo.jpg'}], 'sig': {'$base64': 'YWJj'}}, self.input_dir)
+        self.assertEqual(decoded['photos'][0].getvalue(), create_test_photo().getvalue())
+        self.assertEqual(decoded['sig'].getvalue(), b'abc')
+
+    def test_write_atomic_replaces_file(self):
+        """Test that atomic writes replace the file and leave no temporary files"""
+        path = os.path.join(self.temp_dir, 'report.docx')
+        write_atomic(path, b'first')
+        write_atomic(path, b'second')
+        with open(path, 'rb') as report_file:
+            self.assertEqual(report_file.read(), b'second')
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ['payloads', 'report.docx'])
+
+    def test_run_batch_serial(self):
+        """Test dispatching, timings and failure reporting"""
+        results = run_batch(load_jobs([self.input_dir]), self.output_dir, workers=1)
+
+        failures = [result for result in results if result['error']]
+        self.assertEqual(len(failures), 1)
+        self.assertIn('Unknown report_type', failures[0]['error'])
+        self.assertTrue(all(result['seconds'] >= 0 for result in results))
+
+        general = Document(os.path.join(self.output_dir, 'general.docx'))
+        self.assertEqual(len(general.inline_shapes), 2)  # work photo and signature
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['bulk_0001.docx', 'escape.docx', 'general.docx'])
+
+        summary = format_summary(results, 1.0)
+        self.assertIn('3 of 4 report(s) generated', summary)
+        self.assertIn('bulk_0004: ValueError', summary)
+
+    def test_unreadable_payloads_fail_alone(self):
+        """Test that a malformed line or a non-object payload is a failed report, not a failed batch"""
+        with open(os.path.join(self.input_dir, 'bulk.jsonl'), 'a') as jsonl_file:
+            jsonl_file.write('{"customer_name": \n')
+            jsonl_file.write('["not", "an", "object"]\n')
+        results = run_batch(load_jobs([self.input_dir]), self.output_dir, workers=1)
+
+        errors = {result['name']: result['error'] for result in results if result['error']}
+        self.assertEqual(sorted(errors), ['bulk_0004', 'bulk_0005', 'bulk_0006'])
+        self.assertTrue(errors['bulk_0005'].startswith('PayloadError: Invalid JSON'))
+        self.assertEqual(errors['bulk_0006'], 'PayloadError: Payload is not a JSON object')
+        self.assertIn('3 of 6 report(s) generated', format_summary(results, 1.0))
+
+    def test_duplicate_names_do_not_overwrite(self):
+        """Test that payloads with the same output name are all written"""
+        self.write_json('escape.json', {'report_type': 'General Service Report', 'customer_name': 'C'})
+        self.write_json('other.json', {'report_type': 'General Service Report', 'report_id': 'ESCAPE'})
+        results = run_batch(load_jobs([self.input_dir]), self.output_dir, workers=1)
+
+        self.assertEqual([result['name'] for result in results],
+                         ['bulk_0001', 'escape', 'bulk_0004', 'escape_2', 'general', 'ESCAPE_3'])
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['ESCAPE_3.docx', 'bulk_0001.docx', 'escape.docx', 'escape_2.docx', 'general.docx'])
+
+    def test_serial_batch_keeps_photo_workers(self):
+        """Test that a serial batch does not change the photo worker setting of the calling process"""
+        before = photo_processing.PHOTO_WORKERS
+        run_batch(load_jobs([os.path.join(self.input_dir, 'general.json')]), self.output_dir, workers=1)
+        self.assertEqual(photo_processing.PHOTO_WORKERS, before)
+
+    def test_main_exit_code(self):
+        """Test that the CLI exits non-zero when a report fails"""
+        self.assertEqual(main([os.path.join(self.input_dir, 'general.json'), '-o', self.output_dir, '-w', '1']), 0)
+        self.assertEqual(main([self.input_dir, '-o', self.output_dir, '-w', '1']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+"""
+Unit tests for checklist_index.py
+"""
+
+import logging
+import unittest
+import sys
+import os
+import random
+import time
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from checklist_index import (
+    CHECKLIST_INDEX,
+    COMPILED_CHECKLISTS,
+    MARVEL,
+    build_checklist_index,
+    checklist_keys,
+    compile_checklist,
+    equipment_checklist,
+    find_question,
+    get_checklist_entry,
+    key_in_checklist,
+    visible_nodes
+)
+from equipment_config import EQUIPMENT_TYPES, MARVEL_CHECKLIST
+
+logger = logging.getLogger(__name__)
+
+
+class TestChecklistIndex(unittest.TestCase):
+    """Test cases for the precompiled checklist index"""
+
+    def test_every_top_level_item_indexed(self):
+        """Test that all top-level checklist items are in the index"""
+        for equipment_type, config in EQUIPMENT_TYPES.items():
+            for item in config['checklist']:
+                entry = get_checklist_entry(equipment_type, item['id'])
+                self.assertIsNotNone(entry, f"{equipment_type}/{item['id']}")
+        for item in MARVEL_CHECKLIST:
+            self.assertIsNotNone(get_checklist_entry(MARVEL, item['id']))
+
+    def test_follow_up_entry(self):
+        """Test that follow-up questions record their parent path"""
+        entry = get_checklist_entry('KVF', 'ballast_issue')
+        self.assertEqual(entry.question, 'Is there an issue with the hood light ballast?')
+        self.assertEqual(entry.type, 'yes_no_na')
+        self.assertEqual(entry.parent_path, ('lights_ballast',))
+
+    def test_first_occurrence_wins(self):
+        """Test that duplicate ids keep the first item in depth-first order"""
+        checklist = [
+            {'id': 'a', 'question': 'First A', 'type': 'text', 'conditions': {
+                'yes': {'follow_up': [{'id': 'b', 'question': 'Nested B', 'type': 'text'}]}
+            }},
+            {'id': 'b', 'question': 'Top B', 'type': 'text'}
+        ]
+        index, item_ids = build_checklist_index({'T': {'checklist': checklist}}, [])
+        self.assertEqual(index[('T', 'b')].question, 'Nested B')
+        self.assertEqual(item_ids['T'], ('a', 'b'))
+
+    def test_find_question_prefixed_keys(self):
+        """Test that prefixed inspection keys resolve to the item question"""
+        self.assertEqual(find_question('KVF', 'module_1_ballast_issue'),
+                         'Is there an issue with the hood light ballast?')
+        # The longest id from the start of the key wins, as in the old tree search
+        self.assertEqual(find_question('KVF', 'lights_ballast_ballast_issue'),
+                         'Is there a ballast for the Hood lights?')
+        self.assertEqual(find_question('KVF', 'marvel_power_supply'),
+                         get_checklist_entry(MARVEL, 'power_supply').question)
+        self.assertIsNone(find_question('KVF', 'not_a_question'))
+
+    def test_key_in_checklist(self):
+        """Test the equipment membership check used by the summary"""
+        self.assertTrue(key_in_checklist('KVF', 'lights_ballast_ballast_issue'))
+        self.assertFalse(key_in_checklist('KVF', 'unrelated'))
+        self.assertFalse(key_in_checklist('UNKNOWN', 'lights_operational'))
+
+    def test_index_size(self):
+        """Test that the index covers every equipment type"""
+        types = {equipment_type for equipment_type, _ in CHECKLIST_INDEX}
+        self.assertEqual(types, set(EQUIPMENT_TYPES) | {MARVEL})
+
+
+def walk_visible(items, inspection_data, prefix=''):
+    """Visible keys found by walking the nested checklist like the old recursive rendering"""
+    keys = []
+    for item in items:
+        key = prefix + item['id']
+        keys.append(key)
+        answer = inspection_data.get(key, {}).get('answer', '')
+        condition = item.get('conditions', {}).get(answer.lower()) if answer else None
+        if condition and condition.get('follow_up'):
+            keys.extend(walk_visible(condition['follow_up'], inspection_data, prefix))
+    return keys
+
+
+def random_answers(nodes, rng):
+    """Answer every question with one of its condition keys, or leave it unanswered"""
+    inspection_data = {}
+    for node in nodes:
+        choices = ['', 'Yes', 'No', 'N/A'] + [key.capitalize() for key in node.item.get('conditions', {})]
+        inspection_data[node.key] = {'answer': rng.choice(choices)}
+    return inspection_data
+
+
+class TestCompiledChecklist(unittest.TestCase):
+    """Test cases for the flattened checklists"""
+
+    def test_nodes_follow_their_parent(self):
+        """Test that follow-ups come after their question, with the answer that shows them"""
+        checklist = [
+            {'id': 'a', 'question': 'A', 'type': 'yes_no', 'conditions': {
+                'yes': {'follow_up': [{'id': 'b', 'question': 'B', 'type': 'yes_no', 'conditions': {
+                    'no': {'follow_up': [{'id': 'c', 'question': 'C', 'type': 'text'}]}}}]},
+                'no': {'comment': True, 'follow_up': [{'id': 'd', 'question': 'D', 'type': 'text'}]}
+            }},
+            {'id': 'e', 'question': 'E', 'type': 'text'}
+        ]
+        nodes = compile_checklist(checklist, prefix='marvel_')
+        self.assertEqual([(n.key, n.parent, n.trigger, n.depth) for n in nodes], [
+            ('marvel_a', -1, None, 0), ('marvel_b', 0, 'yes', 1), ('marvel_c', 1, 'no', 2),
+            ('marvel_d', 0, 'no', 1), ('marvel_e', -1, None, 0)
+        ])
+        answers = {'marvel_a': {'answer': 'Yes'}, 'marvel_b': {'answer': 'No'}}
+        self.assertEqual(visible_nodes(nodes, answers), [0, 1, 2, 4])
+        answers['marvel_a']['answer'] = 'No'
+        self.assertEqual(visible_nodes(nodes, answers), [0, 3, 4])
+
+    def test_matches_tree_walk(self):
+        """Test the linear scan against walking the nested checklists for random answers"""
+        rng = random.Random(7)
+        for equipment_type, config in EQUIPMENT_TYPES.items():
+            nodes = COMPILED_CHECKLISTS[equipment_type]
+            for _ in range(50):
+                inspection_data = random_answers(nodes, rng)
+                self.assertEqual([nodes[i].key for i in visible_nodes(nodes, inspection_data)],
+                                 walk_visible(config['checklist'], inspection_data), equipment_type)
+
+    def test_marvel_checklist_appended(self):
+        """Test that Marvel questions follow the equipment's own, with their parents kept"""
+        nodes = equipment_checklist({'type': 'CMW', 'with_marvel': True})
+        inspection_data = random_answers(nodes, random.Random(3))
+        self.assertEqual([nodes[i].key for i in visible_nodes(nodes, inspection_data)],
+                         walk_visible(EQUIPMENT_TYPES['CMW']['checklist'], inspection_data)
+                         + walk_visible(MARVEL_CHECKLIST, inspection_data, 'marvel_'))
+        self.assertIn('marvel_power_supply', checklist_keys({'type': 'CMW', 'with_marvel': True}))
+        self.assertNotIn('marvel_power_supply', checklist_keys({'type': 'CMW'}))
+
+    def test_visible_scan_performance(self):
+        """Benchmark: visible questions of the deepest checklist (CMW Hood) by scan and by tree walk"""
+        nodes = COMPILED_CHECKLISTS['CMW']
+        self.assertEqual(max(node.depth for node in nodes), 3)
+        rng = random.Random(11)
+        answer_sets = [random_answers(nodes, rng) for _ in range(200)]
+
+        start = time.perf_counter()
+        for inspection_data in answer_sets:
+            walk_visible(EQUIPMENT_TYPES['CMW']['checklist'], inspection_data)
+        walk_time = (time.perf_counter() - start) / len(answer_sets)
+
+        start = time.perf_counter()
+        for inspection_data in answer_sets:
+            visible_nodes(nodes, inspection_data)
+        scan_time = (time.perf_counter() - start) / len(answer_sets)
+
+        logger.info(f"CMW visible questions ({len(nodes)} nodes): scan {scan_time * 1e6:.1f} us, "
+                    f"tree walk {walk_time * 1e6:.1f} us")
+        self.assertLess(scan_time, 0.001)
+
+
+if __name__ == '__main__':
+    unittest.main()
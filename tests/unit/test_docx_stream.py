@@ -0,0 +1,121 @@
+"""
+Unit tests for docx_stream.py
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+from docx import Document
+from docx.shared import Inches
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import report_engine
+from docx_stream import save_streaming
+from photo_processing import DeferredPhotoBatch, clear_photo_cache, normalize_photo
+from report_jobs import ReportProgress
+from tests.fixtures import create_test_signature
+
+
+def create_jpeg(width, height, orientation=None):
+    """Create a noisy JPEG, optionally tagged with an EXIF orientation"""
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    output = BytesIO()
+    Image.effect_noise((width, height), 64).convert('RGB').save(output, format='JPEG', exif=exif.tobytes())
+    return output.getvalue()
+
+
+def package_parts(docx):
+    with zipfile.ZipFile(docx) as package:
+        return {name: package.read(name) for name in package.namelist()}
+
+
+class TestDocxStream(unittest.TestCase):
+    """Test cases for the streaming report writer"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        clear_photo_cache()
+        self.temp_dir = tempfile.mkdtemp()
+        landscape, rotated = create_jpeg(1600, 1200), create_jpeg(1200, 900, orientation=6)
+        self.data = {
+            'customer_name': 'SELA Company',
+            'technician_signature': create_test_signature(),
+            'equipment_inspection': [{'name': 'Main Kitchen', 'equipment': [{
+                'type_name': 'KVF', 'location': 'Line 1', 'checklist': {}, 'photos': {},
+                'yes_photos': {'photo_hood': BytesIO(landscape), 'photo_rotated': BytesIO(rotated)},
+                'no_photos': {'photo_hood_again': BytesIO(landscape), 'photo_small': BytesIO(create_jpeg(300, 200))}
+            }]}]
+        }
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_streamed_report_matches_in_memory_report(self):
+        """Test that the streaming writer produces the same package as the in-memory builder"""
+        in_memory = report_engine.create_technical_report(self.data)
+        self.data['technician_signature'].seek(0)
+        path = os.path.join(self.temp_dir, 'report.docx')
+        report_engine.write_technical_report(self.data, path)
+
+        expected, streamed = package_parts(in_memory), package_parts(path)
+        self.assertEqual(sorted(streamed), sorted(expected))
+        for name in expected:
+            self.assertEqual(streamed[name], expected[name], name)
+        with zipfile.ZipFile(path) as package:
+            self.assertTrue(all(info.compress_type == zipfile.ZIP_DEFLATED for info in package.infolist()))
+        self.assertEqual(len(Document(path).inline_shapes), 5)
+        self.assertEqual(os.listdir(self.temp_dir), ['report.docx'])
+
+    def test_large_reports_use_streaming_writer(self):
+        """Test that create_technical_report streams reports at the photo threshold"""
+        with patch.object(report_engine, 'STREAMING_PHOTO_THRESHOLD', 4), \
+             patch.object(report_engine, 'save_streaming', wraps=save_streaming) as streaming:
+            doc_bytes = report_engine.create_technical_report(self.data)
+        streaming.assert_called_once()
+        self.assertEqual(len(Document(doc_bytes).inline_shapes), 5)
+
+    def test_placeholders_are_replaced(self):
+        """Test that no placeholder is left in the package and photos keep their final size"""
+        doc = Document()
+        photos = DeferredPhotoBatch(max_workers=1)
+        original = create_jpeg(1200, 900, orientation=6)
+        photos.add(doc.add_paragraph().add_run(), BytesIO(original), Inches(2.0))
+        output = BytesIO()
+        save_streaming(doc, photos, output)
+
+        media = [data for name, data in package_parts(output).items() if name.startswith('word/media/')]
+        self.assertIn(normalize_photo(original), media)
+        with Image.open(BytesIO(normalize_photo(original))) as normalized:
+            self.assertEqual(normalized.size, (400, 533))
+        self.assertEqual(len(media), 1)
+
+    def test_photos_done_when_normalized(self):
+        """Test that progress counts photos as they are normalized, not when placeholders go in"""
+        doc = Document()
+        progress = ReportProgress()
+        photos = DeferredPhotoBatch(max_workers=1, progress=progress)
+        repeated = BytesIO(create_jpeg(800, 600))
+        for photo in (repeated, repeated, BytesIO(create_jpeg(600, 800))):
+            photos.add(doc.add_paragraph().add_run(), photo, Inches(2.0))
+        self.assertEqual(progress.photos_done, 0)
+
+        done = []
+        for digest, _ in photos.normalized(list(photos.deferred), chunk_size=1):
+            done.append(progress.photos_done)
+        self.assertEqual(done, [2, 3])  # the repeated photo fills two places
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Unit tests for draft_store.py
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from draft_store import DraftStore, DraftTooLargeError
+from photo_store import PhotoRef, PhotoStore
+from app import collect_draft_photos, restore_draft_photos
+from tests.fixtures import create_test_photo
+
+
+class TestDraftStore(unittest.TestCase):
+    """Test cases for the SQLite draft store"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = DraftStore(os.path.join(self.temp_dir, 'drafts', 'drafts.sqlite3'))
+        self.form_data = {
+            'basic_info': {'customer_name': 'SELA Company', 'spare_parts': []},
+            'kitchen_data': {'num_kitchens': 1, 'kitchen_list': []}
+        }
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_and_load(self):
+        """Test that form data and photos round-trip under a short ID"""
+        photos = {f"k0/e0/photo_item_{i}": create_test_photo().getvalue() for i in range(30)}
+        draft_id = self.store.save(self.form_data, photos)
+
+        self.assertLessEqual(len(draft_id), 16)
+        form_data, blobs = self.store.load(draft_id)
+        self.assertEqual(form_data, self.form_data)
+        self.assertEqual(blobs, photos)
+
+    def test_unknown_and_malformed_ids(self):
+        """Test that unknown or malformed IDs load nothing"""
+        self.assertIsNone(self.store.load('doesnotexist'))
+        self.assertIsNone(self.store.load("x' OR 1=1 --"))
+        self.assertIsNone(self.store.load(''))
+
+    def test_ttl_expiry(self):
+        """Test that drafts expire after the TTL and are purged"""
+        store = DraftStore(self.store.path, ttl_seconds=60)
+        draft_id = store.save(self.form_data)
+
+        self.assertIsNotNone(store.load(draft_id))
+        self.assertIsNone(store.load(draft_id, now=time.time() + 61))
+        self.assertEqual(store.purge_expired(now=time.time() + 61), 1)
+
+    def test_per_draft_quota(self):
+        """Test that oversized drafts are rejected"""
+        store = DraftStore(self.store.path, max_draft_bytes=1024)
+        with self.assertRaises(DraftTooLargeError):
+            store.save(self.form_data, {'photo': b'x' * 2048})
+
+    def test_total_quota_evicts_oldest(self):
+        """Test that the oldest drafts are evicted to stay within the total quota"""
+        store = DraftStore(self.store.path, max_total_bytes=5000)
+        ids = []
+        for i in range(3):
+            with patch('draft_store.time.time', return_value=1000.0 + i):
+                ids.append(store.save(self.form_data, {'photo': os.urandom(2000)}))
+
+        with patch('draft_store.time.time', return_value=1010.0):
+            self.assertIsNone(store.load(ids[0]))
+            self.assertIsNotNone(store.load(ids[1]))
+            self.assertIsNotNone(store.load(ids[2]))
+        self.assertLessEqual(store.total_size(), 5000)
+
+    def test_delete_removes_photos(self):
+        """Test that deleting a draft also removes its photos"""
+        draft_id = self.store.save(self.form_data, {'photo': b'abc'})
+        self.store.delete(draft_id)
+        self.assertIsNone(self.store.load(draft_id))
+        self.assertEqual(self.store.total_size(), 0)
+
+
+class _SessionState(dict):
+    """Dictionary with attribute access, like st.session_state"""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+class TestDraftPhotos(unittest.TestCase):
+    """Test cases for sharing photos through drafts"""
+
+    @patch('app.st')
+    def test_photos_round_trip(self, mock_st):
+        """Test that equipment and work item photos are put back in place"""
+        mock_st.session_state = _SessionState(
+            kitchen_list=[{'equipment_list': [{}, {'photos': {'photo_lights_operational': create_test_photo()}}]}],
+            work_performed_list=[{'photos': [create_test_photo(color='red'), create_test_photo(color='green')]}]
+        )
+        photos = collect_draft_photos()
+        self.assertEqual(sorted(photos), ['k0/e1/photo_lights_operational', 'w0/0', 'w0/1'])
+
+        # restore_form_data recreates the form without photos
+        photo_store = PhotoStore(root=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, os.path.dirname(photo_store.directory))
+        mock_st.session_state = _SessionState(
+            kitchen_list=[{'equipment_list': [{'photos': {}}, {'photos': {}}]}],
+            work_performed_list=[{'title': 'Work Performed 1'}],
+            photo_store=photo_store
+        )
+        restore_draft_photos(dict(photos, **{'k5/e0/photo_gone': b'stale'}))
+
+        equipment = mock_st.session_state.kitchen_list[0]['equipment_list'][1]
+        self.assertIsInstance(equipment['photos']['photo_lights_operational'], PhotoRef)
+        self.assertEqual(equipment['photos']['photo_lights_operational'].getvalue(),
+                         photos['k0/e1/photo_lights_operational'])
+        work_photos = mock_st.session_state.work_performed_list[0]['photos']
+        self.assertEqual([photo.getvalue() for photo in work_photos], [photos['w0/0'], photos['w0/1']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit tests for inspection_model.py
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inspection_model import ALARM_SECTION, MARVEL_SECTION, Answer, ItemPath, Kitchen, item_path
+from app import collect_form_data, restore_form_data
+from tests.conftest import MockSessionState
+from tests.unit.test_share_codec import build_form_data
+
+
+class TestInspectionModel(unittest.TestCase):
+    """Test cases for the typed inspection records"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.kitchen = {
+            'id': 'kitchen_0_20240101000000',
+            'name': 'Main Kitchen',
+            'equipment_list': [{
+                'id': 'equipment_0_20240101000000',
+                'type': 'KVF',
+                'with_marvel': True,
+                'location': 'Cooking line 1',
+                'inspection_data': {
+                    'capture_jet_fan': {'answer': 'No', 'comment': 'Fan noisy'},
+                    'module_count': {'answer': 3},
+                    'marvel_fan_running': {'answer': 'Yes', 'comment': ''}
+                },
+                'alarm_details': {'alarm_1': {'description': 'UV lamp failure'}},
+                'photos': {
+                    'photo_capture_jet_fan_1': 'fan-1.jpg',
+                    'photo_capture_jet_fan_2': 'fan-2.jpg',
+                    'photo_marvel_fan_running': 'marvel.jpg',
+                    'photo_alarm_1': 'alarm.jpg',
+                    'photo_unknown_item_7': 'other.jpg'
+                }
+            }]
+        }
+
+    def test_item_path(self):
+        """Test that keys are parsed once into sections and item ids"""
+        self.assertEqual(item_path('marvel_fan_running'), ItemPath('fan_running', MARVEL_SECTION))
+        self.assertEqual(item_path('capture_jet_fan').key, 'capture_jet_fan')
+        self.assertIs(item_path('lights_ballast_ballast_issue'), item_path('lights_ballast_ballast_issue'))
+        self.assertTrue(item_path('lights_ballast_ballast_issue').ends_with_any({'ballast_issue'}))
+        self.assertFalse(item_path('lights_ballast_ok').ends_with_any({'lights_ballast'}))
+
+    def test_photos_are_parsed_against_items(self):
+        """Test that photo keys resolve to their item path and number"""
+        equipment = Kitchen.from_dict(self.kitchen).equipment[0]
+        photos = {photo.key: (photo.path, photo.index) for photo in equipment.photos}
+        self.assertEqual(photos['photo_capture_jet_fan_2'], (ItemPath('capture_jet_fan'), 2))
+        self.assertEqual(photos['photo_marvel_fan_running'], (ItemPath('fan_running', MARVEL_SECTION), 0))
+        self.assertEqual(photos['photo_alarm_1'], (ItemPath('1', ALARM_SECTION), 0))
+        self.assertEqual(photos['photo_unknown_item_7'], (ItemPath('unknown_item_7'), 0))
+        self.assertEqual(equipment.answers[ItemPath('module_count')], Answer(3, ''))
+
+    def test_round_trip(self):
+        """Test that converting to records and back keeps the session state dict shape"""
+        restored = Kitchen.from_dict(self.kitchen).to_dict()
+        self.kitchen['equipment_list'][0]['inspection_data']['module_count']['comment'] = ''
+        self.assertEqual(restored, self.kitchen)
+
+    def test_values_that_are_not_answers_are_kept(self):
+        """Test that inspection_data values other than answer dicts survive the round trip"""
+        inspection_data = self.kitchen['equipment_list'][0]['inspection_data']
+        inspection_data.update({'module_count': {'answer': 3, 'comment': ''}, 'notes': 'Hood 2 repainted', 'legacy': None})
+        restored = Kitchen.from_dict(self.kitchen).to_dict(include_photos=False)
+        self.assertEqual(restored['equipment_list'][0]['inspection_data'], inspection_data)
+
+    def test_share_shape(self):
+        """Test that share links carry answers but neither photos nor ids"""
+        shared = Kitchen.from_dict(self.kitchen).to_dict(include_photos=False)
+        self.assertEqual(set(shared), {'name', 'equipment_list'})
+        self.assertEqual(set(shared['equipment_list'][0]),
+                         {'type', 'with_marvel', 'location', 'inspection_data', 'alarm_details'})
+
+    def test_collect_and_restore(self):
+        """Test that the form survives collect_form_data and restore_form_data"""
+        kitchen_list = build_form_data(2, 3)['kitchen_data']['kitchen_list']
+        with patch('app.st.session_state', MockSessionState(kitchen_list=kitchen_list)), patch('app.st.sidebar'):
+            collected = collect_form_data()
+            self.assertEqual(collected['kitchen_data']['kitchen_list'], kitchen_list)
+
+        session_state = MockSessionState()
+        with patch('app.st.session_state', session_state), patch('app.st.sidebar'):
+            self.assertTrue(restore_form_data(collected))
+        restored = session_state['kitchen_list']
+        self.assertEqual(restored[1]['equipment_list'][2]['inspection_data'], kitchen_list[1]['equipment_list'][2]['inspection_data'])
+        self.assertEqual(restored[1]['equipment_list'][2]['photos'], {})
+        self.assertTrue(restored[1]['equipment_list'][2]['id'].startswith('equipment_2_'))
+
+    def test_restore_keeps_photos(self):
+        """Test that photo references in restored data are kept"""
+        session_state = MockSessionState()
+        with patch('app.st.session_state', session_state), patch('app.st.sidebar'):
+            self.assertTrue(restore_form_data({'basic_info': {}, 'kitchen_data': {'kitchen_list': [self.kitchen]}}))
+        restored = session_state['kitchen_list'][0]['equipment_list'][0]
+        self.assertEqual(restored['photos'], self.kitchen['equipment_list'][0]['photos'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+"""
+Unit tests for photo_processing.py
+"""
+
+import unittest
+import sys
+import os
+import re
+import threading
+import zipfile
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+from docx import Document
+from docx.shared import Inches
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from photo_processing import (
+    PhotoBatch,
+    PhotoStats,
+    add_report_photo,
+    clear_photo_cache,
+    normalize_photo,
+    normalize_upload,
+    normalize_uploads,
+    placeholder_photo,
+    read_photo_bytes,
+    shutdown_photo_pool
+)
+import photo_processing
+
+
+def create_jpeg(width=2400, height=1600, orientation=None):
+    """Create a noisy JPEG, optionally tagged with an EXIF orientation"""
+    img = Image.effect_noise((width, height), 64).convert('RGB')
+    exif = Image.Exif()
+    exif[0x010F] = 'Test Camera'  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=95, exif=exif.tobytes())
+    return output.getvalue()
+
+
+class TestPhotoProcessing(unittest.TestCase):
+    """Test cases for photo normalization"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        clear_photo_cache()
+
+    def test_downscales_to_print_width(self):
+        """Test that photos are resized to the printed width at the target DPI"""
+        normalized = normalize_photo(create_jpeg(), print_width_inches=2.0, dpi=200)
+        with Image.open(BytesIO(normalized)) as img:
+            self.assertEqual(img.size, (400, 267))
+            self.assertEqual(img.format, 'JPEG')
+
+    def test_applies_exif_orientation_and_strips_metadata(self):
+        """Test that rotated phone photos come out upright without EXIF"""
+        # Orientation 6 means the camera was rotated 90 degrees
+        normalized = normalize_photo(create_jpeg(1200, 800, orientation=6), dpi=200)
+        with Image.open(BytesIO(normalized)) as img:
+            self.assertEqual(img.size, (400, 600))
+            self.assertEqual(len(img.getexif()), 0)
+
+    def test_small_photos_are_not_upscaled(self):
+        """Test that photos smaller than the print size keep their dimensions"""
+        normalized = normalize_photo(create_jpeg(300, 200))
+        with Image.open(BytesIO(normalized)) as img:
+            self.assertEqual(img.size, (300, 200))
+
+    def test_transparent_images_stay_png(self):
+        """Test that images with transparency are re-encoded as PNG"""
+        output = BytesIO()
+        Image.new('RGBA', (800, 400), (0, 0, 0, 0)).save(output, format='PNG')
+        normalized = normalize_photo(output.getvalue())
+        with Image.open(BytesIO(normalized)) as img:
+            self.assertEqual(img.format, 'PNG')
+            self.assertEqual(img.size, (400, 200))
+
+    def test_normalize_upload_reduces_size_and_tracks_stats(self):
+        """Test that the before/after sizes are reported"""
+        original = create_jpeg()
+        stats = PhotoStats()
+        normalized = normalize_upload(BytesIO(original), stats)
+
+        self.assertEqual(stats.photos, 1)
+        self.assertEqual(stats.original_bytes, len(original))
+        self.assertEqual(stats.normalized_bytes, len(normalized))
+        self.assertLess(len(normalized), len(original) / 4)
+        self.assertIn('1 photo(s)', stats.summary())
+
+    def test_normalize_upload_processes_each_upload_once(self):
+        """Test that identical uploads reuse the cached result"""
+        original = create_jpeg(800, 600)
+        first = normalize_upload(BytesIO(original))
+        second = normalize_upload(BytesIO(original))
+        self.assertIs(first, second)
+
+    def test_cache_shared_between_threads(self):
+        """Test that threads reading and evicting cached photos at once do not fail"""
+        photos = [create_jpeg(16, 16) for _ in range(12)]
+        errors = []
+
+        def upload():
+            try:
+                for _ in range(50):
+                    for photo in photos:
+                        normalize_upload(photo)
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(photo_processing, 'NORMALIZED_CACHE_SIZE', 4):
+            threads = [threading.Thread(target=upload) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(photo_processing._normalized_cache), 4)
+
+    def test_undecodable_photo_falls_back_to_original(self):
+        """Test that bytes Pillow cannot read are embedded unchanged"""
+        self.assertEqual(normalize_upload(b'not an image'), b'not an image')
+
+    def test_read_photo_bytes_sources(self):
+        """Test reading bytes from the supported photo sources"""
+        stream = BytesIO(b'abc')
+        stream.seek(2)
+        self.assertEqual(read_photo_bytes(stream), b'abc')
+        self.assertEqual(read_photo_bytes(b'abc'), b'abc')
+
+    def test_add_report_photo(self):
+        """Test that the run receives the normalized image at the requested width"""
+        run = MagicMock()
+        add_report_photo(run, BytesIO(create_jpeg()), Inches(2.0))
+
+        args, kwargs = run.add_picture.call_args
+        self.assertEqual(kwargs['width'], Inches(2.0))
+        with Image.open(args[0]) as img:
+            self.assertEqual(img.width, 400)
+
+    def test_normalize_uploads_keeps_order(self):
+        """Test that batch results line up with the input photos"""
+        repeated = create_jpeg(800, 600)
+        photos = [repeated, create_jpeg(300, 200), b'not an image', BytesIO(repeated)]
+        results = normalize_uploads(photos, max_workers=1)
+
+        self.assertEqual([size for size, _ in results], [len(read_photo_bytes(photo)) for photo in photos])
+        with Image.open(BytesIO(results[1][1])) as img:
+            self.assertEqual(img.size, (300, 200))
+        self.assertEqual(results[2][1], b'not an image')
+        self.assertIs(results[0][1], results[3][1])
+
+    def test_normalize_uploads_process_pool(self):
+        """Test that the process pool produces the same output as serial processing"""
+        photos = [create_jpeg(1200, 800), create_jpeg(900, 1200), create_jpeg(500, 500)]
+        parallel = normalize_uploads(photos, max_workers=2)
+        clear_photo_cache()
+        serial = normalize_uploads(photos, max_workers=1)
+        self.assertEqual(parallel, serial)
+
+    def test_process_pool_is_shared(self):
+        """Test that reports reuse one pool whose workers are not forked from the threaded server"""
+        shutdown_photo_pool()
+        self.addCleanup(shutdown_photo_pool)
+        photos = [create_jpeg(1200, 800), create_jpeg(900, 1200)]
+        with patch.object(photo_processing, 'ProcessPoolExecutor',
+                          wraps=photo_processing.ProcessPoolExecutor) as executor:
+            normalize_uploads(photos, max_workers=2)
+            clear_photo_cache()
+            normalize_uploads(photos, max_workers=2)
+        self.assertEqual(executor.call_count, 1)
+        self.assertNotEqual(executor.call_args.kwargs['mp_context'].get_start_method(), 'fork')
+
+    def test_replaced_pool_finishes_its_work(self):
+        """Test that a pool replaced by a bigger one is only shut down once it is no longer used"""
+        shutdown_photo_pool()
+        self.addCleanup(shutdown_photo_pool)
+        photos = [create_jpeg(300, 200), create_jpeg(200, 300), create_jpeg(100, 100)]
+        with photo_processing._photo_pool(2) as small:
+            normalize_uploads(photos, max_workers=3)
+            self.assertEqual(list(small.map(abs, [-1, -2])), [1, 2])
+        with self.assertRaises(RuntimeError):
+            small.submit(abs, -1)
+
+    def test_photo_batch_uses_prepared_photos(self):
+        """Test that prepared photos are embedded without being processed again"""
+        photo = BytesIO(create_jpeg())
+        batch = PhotoBatch(max_workers=1)
+        batch.prepare([photo])
+        clear_photo_cache()
+
+        run = MagicMock()
+        batch.add(run, photo, Inches(2.0))
+        self.assertEqual(batch.stats.photos, 1)
+        self.assertEqual(len(run.add_picture.call_args[0][0].getvalue()), batch.stats.normalized_bytes)
+
+        # Photos that were not prepared are still normalized on demand
+        batch.add(run, BytesIO(create_jpeg(800, 600)), Inches(2.0))
+        self.assertEqual(batch.stats.photos, 2)
+
+    def test_photo_batch_embeds_identical_photos_once(self):
+        """Test that identical photos from different uploads share one image part"""
+        data = create_jpeg(1200, 900)
+        photos = [BytesIO(data), BytesIO(data), BytesIO(create_jpeg(900, 1200)), BytesIO(data)]
+        doc = Document()
+        batch = PhotoBatch(max_workers=1)
+        batch.prepare(photos[:2])
+        for photo in photos:
+            batch.add(doc.add_paragraph().add_run(), photo, Inches(2.0))
+
+        output = BytesIO()
+        doc.save(output)
+        with zipfile.ZipFile(output) as package:
+            media = [name for name in package.namelist() if name.startswith('word/media/')]
+            document_xml = package.read('word/document.xml').decode('utf-8')
+        self.assertEqual(len(media), 2)
+        self.assertEqual((batch.stats.photos, batch.stats.images), (4, 2))
+        self.assertIn('(2 distinct)', batch.stats.summary())
+
+        # Every occurrence is its own drawing with a unique shape id
+        shapes = Document(BytesIO(output.getvalue())).inline_shapes
+        self.assertEqual(len(shapes), 4)
+        shape_ids = re.findall(r'<wp:docPr id="(\d+)"', document_xml)
+        self.assertEqual(len(set(shape_ids)), 4)
+
+    def test_placeholder_matches_normalized_size(self):
+        """Test that placeholders have the size and format of the normalized photo"""
+        transparent = BytesIO()
+        Image.new('RGBA', (900, 500), (0, 0, 0, 0)).save(transparent, format='PNG')
+        for data in (create_jpeg(2400, 1600), create_jpeg(1600, 1000, orientation=6),
+                     create_jpeg(300, 200), transparent.getvalue()):
+            with Image.open(BytesIO(normalize_photo(data))) as normalized, \
+                 Image.open(BytesIO(placeholder_photo(data, 'key'))) as placeholder:
+                self.assertEqual(placeholder.size, normalized.size)
+                self.assertEqual(placeholder.format, normalized.format)
+        self.assertNotEqual(placeholder_photo(data, 'a'), placeholder_photo(data, 'b'))
+
+
+if __name__ == '__main__':
+    unittest.main()
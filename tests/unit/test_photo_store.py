@@ -0,0 +1,130 @@
+"""
+Unit tests for photo_store.py
+"""
+
+import unittest
+import sys
+import os
+import gc
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from unittest.mock import MagicMock
+
+from docx.shared import Inches
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from photo_processing import PhotoBatch, read_photo_bytes
+from photo_store import PhotoRef, PhotoStore, purge_stale_spools
+from report_cache import report_cache_key
+from tests.fixtures import create_test_photo
+
+
+class TestPhotoStore(unittest.TestCase):
+    """Test cases for the per-session photo spool"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = PhotoStore('session', root=self.temp_dir)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_put_spools_to_disk(self):
+        """Test that a photo is written once and read back on demand"""
+        photo = create_test_photo()
+        ref = self.store.put(photo)
+        self.assertIsInstance(ref, PhotoRef)
+        self.assertTrue(os.path.exists(ref.path))
+        self.assertEqual(read_photo_bytes(ref), photo.getvalue())
+        self.assertEqual(self.store.total_size(), len(photo.getvalue()))
+
+    def test_identical_content_shares_handle(self):
+        """Test deduplication by content hash"""
+        data = create_test_photo().getvalue()
+        first = self.store.put(BytesIO(data))
+        self.assertIs(self.store.put(data), first)
+        self.assertIs(self.store.put(first), first)
+        self.assertIsNot(self.store.put(create_test_photo(color='red')), first)
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(len(os.listdir(self.store.directory)), 2)
+
+    def test_upload_reruns_skip_hashing(self):
+        """Test that the same Streamlit upload is only read once"""
+        upload = MagicMock(file_id='abc', getvalue=MagicMock(return_value=b'jpeg bytes'))
+        upload.name = 'hood.jpg'
+        ref = self.store.put(upload)
+        self.assertIs(self.store.put(upload), ref)
+        self.assertEqual(upload.getvalue.call_count, 1)
+        self.assertEqual(ref.name, 'hood.jpg')
+
+    def test_clear_and_session_end(self):
+        """Test that the spool is removed by clear() and when the store is garbage collected"""
+        self.store.put(b'photo')
+        directory = self.store.directory
+        self.store.clear()
+        self.assertFalse(os.path.exists(directory))
+
+        store = PhotoStore('ended', root=self.temp_dir)
+        store.put(b'photo')
+        directory = store.directory
+        del store
+        gc.collect()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_purge_stale_spools(self):
+        """Test that only old spools of ended sessions are purged"""
+        self.store.put(b'recent')
+        # Spool left behind by a session that ended without cleanup (e.g. a server crash)
+        old = os.path.join(self.temp_dir, 'old')
+        os.makedirs(old)
+        os.utime(old, (time.time() - 2 * 86400,) * 2)
+        self.assertEqual(purge_stale_spools(self.temp_dir), 1)
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(self.store.directory))
+        self.assertEqual(purge_stale_spools(os.path.join(self.temp_dir, 'missing')), 0)
+
+    def test_open_session_is_not_purged(self):
+        """Test that a session open for more than a day keeps its photos"""
+        upload = MagicMock(file_id='abc', getvalue=MagicMock(return_value=b'jpeg bytes'))
+        ref = self.store.put(upload)
+        os.utime(self.store.directory, (time.time() - 2 * 86400,) * 2)
+        self.assertEqual(purge_stale_spools(self.temp_dir), 0)
+        self.assertEqual(ref.getvalue(), b'jpeg bytes')
+
+        # Using the spool marks it as recent for other processes
+        self.store.put(upload)
+        self.assertLess(time.time() - os.stat(self.store.directory).st_mtime, 60)
+
+    def test_removed_spool_is_rewritten(self):
+        """Test that handles whose file was removed are spooled again instead of reused"""
+        upload = MagicMock(file_id='abc', getvalue=MagicMock(return_value=b'jpeg bytes'))
+        ref = self.store.put(upload)
+        shutil.rmtree(self.store.directory)
+        self.assertIs(self.store.put(upload), ref)
+        self.assertIs(self.store.put(b'jpeg bytes'), ref)
+        self.assertEqual(ref.getvalue(), b'jpeg bytes')
+
+    def test_report_consumers(self):
+        """Test that handles work with the report cache and photo preprocessing"""
+        photo = create_test_photo()
+        ref = self.store.put(photo)
+        self.assertEqual(report_cache_key({'photos': {'a': ref}}),
+                         report_cache_key({'photos': {'a': self.store.put(photo.getvalue())}}))
+        self.assertNotEqual(report_cache_key({'photos': {'a': ref}}),
+                            report_cache_key({'photos': {'a': self.store.put(create_test_photo(color='red'))}}))
+        batch = PhotoBatch(max_workers=1)
+        batch.prepare([ref])
+        run = MagicMock()
+        batch.add(run, ref, Inches(2.0))
+        run.add_picture.assert_called_once()
+        self.assertEqual(batch.stats.photos, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
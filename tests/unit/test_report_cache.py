@@ -0,0 +1,116 @@
+"""
+Unit tests for report_cache.py
+"""
+
+import unittest
+import sys
+import os
+from io import BytesIO
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_cache import ReportCache, report_cache_key
+
+
+class TestReportCache(unittest.TestCase):
+    """Test cases for the content-addressed report cache"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.build_count = 0
+        self.report_data = {
+            'customer_name': 'Test Customer',
+            'spare_parts': [{'name': 'KSA Filter', 'quantity': 2}],
+            'technician_signature': BytesIO(b'signature-bytes'),
+            'equipment_inspection': [
+                {'name': 'Main Kitchen', 'equipment': [{'photos': {'photo_a': BytesIO(b'photo-a')}}]}
+            ]
+        }
+
+    def fake_builder(self, data):
+        """Report builder stub that counts invocations"""
+        self.build_count += 1
+        return BytesIO(f"report for {data['customer_name']}".encode('utf-8'))
+
+    def test_key_is_stable(self):
+        """Test that equal content produces equal keys regardless of dict order"""
+        reordered = dict(reversed(list(self.report_data.items())))
+        self.assertEqual(report_cache_key(self.report_data), report_cache_key(reordered))
+
+    def test_key_includes_photo_bytes(self):
+        """Test that changing photo bytes changes the key"""
+        before = report_cache_key(self.report_data)
+        self.report_data['equipment_inspection'][0]['equipment'][0]['photos']['photo_a'] = BytesIO(b'photo-b')
+        self.assertNotEqual(before, report_cache_key(self.report_data))
+
+    def test_key_preserves_stream_position(self):
+        """Test that hashing does not move file positions used by the builders"""
+        signature = self.report_data['technician_signature']
+        signature.seek(3)
+        report_cache_key({'sig': _ReadOnlyStream(signature)})
+        self.assertEqual(signature.tell(), 3)
+
+    def test_hit_and_miss_counters(self):
+        """Test that unchanged data is served from the cache"""
+        cache = ReportCache()
+        first = cache.get_or_build(self.report_data, self.fake_builder)
+        second = cache.get_or_build(self.report_data, self.fake_builder)
+
+        self.assertEqual(self.build_count, 1)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(first.getvalue(), second.getvalue())
+        self.assertEqual(second.tell(), 0)
+
+    def test_invalidates_on_change(self):
+        """Test that any input change triggers a rebuild"""
+        cache = ReportCache()
+        cache.get_or_build(self.report_data, self.fake_builder)
+        self.report_data['spare_parts'][0]['quantity'] = 3
+        cache.get_or_build(self.report_data, self.fake_builder)
+
+        self.assertEqual(self.build_count, 2)
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 2, 'entries': 2})
+
+    def test_lru_eviction(self):
+        """Test that the cache keeps at most max_entries reports"""
+        cache = ReportCache(max_entries=2)
+        for name in ['A', 'B', 'C']:
+            cache.get_or_build({'customer_name': name}, self.fake_builder)
+        self.assertEqual(len(cache), 2)
+
+        # Oldest entry was evicted and is rebuilt
+        cache.get_or_build({'customer_name': 'A'}, self.fake_builder)
+        self.assertEqual(self.build_count, 4)
+
+    def test_put_and_get(self):
+        """Test that reports built elsewhere (e.g. by the report queue) are served by the cache"""
+        cache = ReportCache()
+        self.assertIsNone(cache.get(self.report_data, self.fake_builder))
+        cache.put(self.report_data, self.fake_builder, b'queued report')
+
+        self.assertEqual(cache.get(self.report_data, self.fake_builder).getvalue(), b'queued report')
+        self.assertEqual(cache.get_or_build(self.report_data, self.fake_builder).getvalue(), b'queued report')
+        self.assertEqual(self.build_count, 0)
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 1, 'entries': 1})
+
+
+class _ReadOnlyStream:
+    """File-like wrapper without getvalue(), like an open file"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def read(self):
+        return self._stream.read()
+
+    def seek(self, position):
+        return self._stream.seek(position)
+
+    def tell(self):
+        return self._stream.tell()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Unit tests for report_engine.py
+"""
+
+import unittest
+import sys
+import os
+import subprocess
+from io import BytesIO
+from unittest.mock import patch
+
+from docx import Document
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import report_engine
+from tests.fixtures.test_data import COMPLETE_REPORT_DATA
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestReportEngine(unittest.TestCase):
+    """Test cases for the Streamlit-free report builders"""
+
+    def test_import_does_not_load_streamlit(self):
+        """Test that importing the engine in a fresh process leaves Streamlit unloaded"""
+        code = ("import sys, time; start = time.perf_counter(); import report_engine; "
+                "print('streamlit' in sys.modules, time.perf_counter() - start)")
+        output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, check=True,
+                                capture_output=True, text=True).stdout.split()
+        self.assertEqual(output[0], 'False')
+        # Importing app (and Streamlit) takes around half a second; the engine alone far less
+        self.assertLess(float(output[1]), 2.0)
+
+    def test_technical_report_without_streamlit_session(self):
+        """Test that a report builds from plain data"""
+        result = report_engine.create_technical_report(COMPLETE_REPORT_DATA)
+        self.assertIsInstance(result, BytesIO)
+        doc = Document(result)
+        self.assertGreater(len(doc.paragraphs), 0)
+
+    def test_template_error_falls_back_to_blank_document(self):
+        """Test that a broken template is logged instead of shown in the UI"""
+        with patch('report_engine.letterhead_template') as mock_template, \
+             patch('report_engine.os.path.exists', return_value=True):
+            mock_template.new_document.side_effect = ValueError("corrupt template")
+            with self.assertLogs('report_engine', level='WARNING'):
+                doc = report_engine.create_report_document()
+        self.assertEqual(len(doc.sections), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Unit tests for report_jobs.py
+"""
+
+import unittest
+import sys
+import os
+import gc
+import threading
+import time
+import weakref
+from io import BytesIO
+
+from docx import Document
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_engine import create_general_service_report
+from report_jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, ReportProgress, ReportQueue
+from tests.fixtures import create_test_photo
+
+
+def wait_for(queue, job_id, timeout=30):
+    """Poll a job like the UI does until it is no longer queued or running"""
+    deadline = time.monotonic() + timeout
+    while queue.get(job_id).active:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"job {job_id} did not finish")
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+class TestReportQueue(unittest.TestCase):
+    """Test cases for the background report queue"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.queue = ReportQueue(max_workers=1)
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.release.set()
+        self.queue.shutdown()
+
+    def blocking_builder(self, data, progress=None):
+        """Report builder stub that runs until the test releases it"""
+        self.started.set()
+        progress.section('BLOCKED')
+        self.release.wait(10)
+        return BytesIO(f"report for {data['customer_name']}".encode('utf-8'))
+
+    def test_report_with_progress(self):
+        """Test that a real report is built in the background and reports sections and photos"""
+        data = {
+            'customer_name': 'SELA Company',
+            'work_performed_list': [{'description': 'Cleaned filters',
+                                     'photos': [create_test_photo(), create_test_photo(color='red')]}]
+        }
+        job_id = self.queue.submit('session-a', create_general_service_report, data)
+        job = wait_for(self.queue, job_id)
+
+        self.assertEqual(job.status, DONE, job.error)
+        self.assertEqual(len(Document(BytesIO(job.result)).inline_shapes), 2)
+        self.assertEqual((job.progress.photos_done, job.progress.photos_total), (2, 2))
+        self.assertGreaterEqual(job.progress.sections_done, 4)
+        self.assertEqual(job.progress.stage, 'Saving document')
+        self.assertIsNone(job.report_data)
+
+    def test_failure_is_reported(self):
+        """Test that a builder error fails the job instead of the worker"""
+        def broken_builder(data, progress=None):
+            raise ValueError("no template")
+
+        job = wait_for(self.queue, self.queue.submit('session-a', broken_builder, {}))
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "ValueError: no template")
+        self.assertIsNone(job.result)
+
+    def test_jobs_start_in_order(self):
+        """Test that queued jobs report how many jobs start before them"""
+        running = self.queue.submit('session-a', self.blocking_builder, {'customer_name': 'A'})
+        self.assertTrue(self.started.wait(10))
+        second = self.queue.submit('session-b', self.blocking_builder, {'customer_name': 'B'})
+        third = self.queue.submit('session-c', self.blocking_builder, {'customer_name': 'C'})
+
+        self.assertEqual(self.queue.get(running).status, RUNNING)
+        self.assertEqual(self.queue.get(running).progress.stage, 'BLOCKED')
+        self.assertEqual([self.queue.get(second).status, self.queue.get(third).status], [QUEUED, QUEUED])
+        self.assertEqual([self.queue.position(second), self.queue.position(third)], [0, 1])
+
+        self.release.set()
+        self.assertEqual(wait_for(self.queue, third).result, b'report for C')
+
+    def test_resubmit_replaces_queued_job(self):
+        """Test that a session has at most one queued job"""
+        self.queue.submit('session-a', self.blocking_builder, {'customer_name': 'A'})
+        self.assertTrue(self.started.wait(10))
+        first = self.queue.submit('session-b', self.blocking_builder, {'customer_name': 'B1'})
+        other = self.queue.submit('session-c', self.blocking_builder, {'customer_name': 'C'})
+        second = self.queue.submit('session-b', self.blocking_builder, {'customer_name': 'B2'})
+
+        self.assertEqual(self.queue.get(first).status, CANCELLED)
+        self.assertEqual(self.queue.position(second), 1)
+        self.release.set()
+        self.assertEqual(wait_for(self.queue, other).result, b'report for C')
+        self.assertEqual(wait_for(self.queue, second).result, b'report for B2')
+
+    def test_report_data_is_copied(self):
+        """Test that editing the session's lists after submitting does not change the queued report"""
+        self.queue.submit('session-a', self.blocking_builder, {'customer_name': 'A'})
+        self.assertTrue(self.started.wait(10))
+        data = {'customer_name': 'B', 'spare_parts': [{'name': 'KSA Filter'}]}
+        job_id = self.queue.submit('session-b', self.blocking_builder, data)
+        data['spare_parts'].append({'name': 'UV Lamp'})
+
+        self.assertEqual(self.queue.get(job_id).report_data['spare_parts'], [{'name': 'KSA Filter'}])
+
+    def test_resources_kept_until_build_ends(self):
+        """Test that e.g. a closed session's photo store lives until its queued report is built"""
+        class Store:
+            pass
+
+        self.queue.submit('session-a', self.blocking_builder, {'customer_name': 'A'})
+        self.assertTrue(self.started.wait(10))
+        store = Store()
+        released = weakref.ref(store)
+        job_id = self.queue.submit('session-b', self.blocking_builder, {'customer_name': 'B'}, resources=store)
+        del store
+        gc.collect()
+        self.assertIsNotNone(released())
+
+        self.release.set()
+        wait_for(self.queue, job_id)
+        gc.collect()
+        self.assertIsNone(released())
+
+    def test_forget(self):
+        """Test that finished jobs are dropped once their result was taken"""
+        self.release.set()
+        job_id = self.queue.submit('session-a', self.blocking_builder, {'customer_name': 'A'})
+        wait_for(self.queue, job_id)
+        self.queue.forget(job_id)
+        self.assertIsNone(self.queue.get(job_id))
+
+
+class TestReportProgress(unittest.TestCase):
+    """Test cases for build progress"""
+
+    def test_summary(self):
+        """Test the progress line shown while a report builds"""
+        progress = ReportProgress()
+        progress.expect_photos(3)
+        progress.section('1. GENERAL INFORMATION')
+        progress.photo_done()
+        self.assertEqual(progress.summary(), "1. GENERAL INFORMATION (1 section(s) done, 1 of 3 photos)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Unit tests for report_template.py
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_template import REPORT_TEMPLATE_PATH, TemplateCache
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestTemplateCache(unittest.TestCase):
+    """Test cases for the letterhead template cache"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.temp_dir, 'letterhead.docx')
+        shutil.copy(os.path.join(PROJECT_ROOT, REPORT_TEMPLATE_PATH), self.template_path)
+        self.cache = TemplateCache(self.template_path)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_template_parsed_once(self):
+        """Test that repeated documents reuse the parsed template"""
+        for _ in range(3):
+            self.cache.new_document()
+        self.assertEqual(self.cache.loads, 1)
+
+    def test_documents_are_independent(self):
+        """Test that changes to one report never leak into the template or other reports"""
+        first = self.cache.new_document()
+        paragraphs = len(first.paragraphs)
+        first.add_paragraph('Report content')
+
+        second = self.cache.new_document()
+        self.assertEqual(len(second.paragraphs), paragraphs)
+        self.assertEqual(len(first.paragraphs), paragraphs + 1)
+
+    def test_reloads_when_template_changes(self):
+        """Test that a new modification time invalidates the cached template"""
+        self.cache.new_document()
+        stat = os.stat(self.template_path)
+        os.utime(self.template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.cache.new_document()
+        self.assertEqual(self.cache.loads, 2)
+
+    def test_missing_template_raises(self):
+        """Test that a missing template surfaces as OSError for the caller to handle"""
+        os.remove(self.template_path)
+        with self.assertRaises(OSError):
+            self.cache.new_document()
+
+
+if __name__ == '__main__':
+    unittest.main()
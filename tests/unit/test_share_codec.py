@@ -0,0 +1,144 @@
+"""
+Unit tests for share_codec.py
+"""
+
+import logging
+import unittest
+import sys
+import os
+import zlib
+import base64
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from share_codec import V2_PREFIX, decode_share_payload, decode_v2, encode_v1, encode_v2
+from checklist_index import CHECKLIST_ITEM_IDS
+from app import decode_form_data_from_url, encode_form_data_to_url
+
+logger = logging.getLogger(__name__)
+
+
+def build_form_data(kitchen_count, equipment_count):
+    """Build a realistic collect_form_data payload with every question listed"""
+    answers = ['Yes', 'No', 'N/A', '', '']
+    kitchen_list = []
+    for kitchen_idx in range(kitchen_count):
+        equipment_list = []
+        for equip_idx in range(equipment_count):
+            equipment_type = ['KVF', 'UVF', 'CMW'][equip_idx % 3]
+            inspection_data = {}
+            for item_idx, item_id in enumerate(CHECKLIST_ITEM_IDS[equipment_type]):
+                answer = answers[item_idx % len(answers)]
+                inspection_data[item_id] = {
+                    'answer': answer,
+                    'comment': 'Needs attention' if answer == 'No' else ''
+                }
+            equipment_list.append({
+                'type': equipment_type,
+                'with_marvel': equip_idx % 2 == 0,
+                'location': f"Cooking line {equip_idx + 1}",
+                'inspection_data': inspection_data,
+                'alarm_details': {}
+            })
+        kitchen_list.append({'name': f"Kitchen {kitchen_idx + 1}", 'equipment_list': equipment_list})
+
+    return {
+        'basic_info': {
+            'customer_name': 'SELA Company',
+            'project_name': 'Riyadh Mall Food Court',
+            'contact_person': 'Ahmed Ali',
+            'outlet_location': 'Riyadh',
+            'contact_number': '+966500000000',
+            'visit_type': 'Service Call',
+            'visit_class': 'To Be Invoiced',
+            'report_date': '2024-01-01T00:00:00',
+            'work_performed': '',
+            'spare_parts': [{'id': '0_1', 'name': 'KSA Filter', 'quantity': 4}],
+            'recommendations': 'Replace filters',
+            'technician_name': 'Tech Name',
+            'service_date': None,
+            'report_type': 'Technical Report',
+            'work_performed_list': []
+        },
+        'kitchen_data': {'num_kitchens': kitchen_count, 'kitchen_list': kitchen_list}
+    }
+
+
+class TestShareCodec(unittest.TestCase):
+    """Test cases for the versioned share-link codec"""
+
+    def assert_restores_same(self, original, decoded):
+        """Check that everything restore_form_data uses survives the round trip"""
+        for key, value in original['basic_info'].items():
+            if value:
+                self.assertEqual(decoded['basic_info'][key], value)
+        self.assertEqual(decoded['kitchen_data']['num_kitchens'], original['kitchen_data']['num_kitchens'])
+        for kitchen, decoded_kitchen in zip(original['kitchen_data']['kitchen_list'],
+                                            decoded['kitchen_data']['kitchen_list']):
+            self.assertEqual(kitchen['name'], decoded_kitchen['name'])
+            for equipment, decoded_equipment in zip(kitchen['equipment_list'], decoded_kitchen['equipment_list']):
+                for field in ('type', 'with_marvel', 'location', 'alarm_details'):
+                    self.assertEqual(equipment[field], decoded_equipment[field])
+                answered = {key: data for key, data in equipment['inspection_data'].items()
+                            if data['answer'] or data['comment']}
+                self.assertEqual(answered, decoded_equipment['inspection_data'])
+
+    def test_round_trip(self):
+        """Test that v2 payloads decode to the same form data"""
+        form_data = build_form_data(2, 3)
+        encoded = encode_v2(form_data)
+        self.assertTrue(encoded.startswith(V2_PREFIX))
+        self.assertNotIn('=', encoded)
+        self.assert_restores_same(form_data, decode_share_payload(encoded))
+
+    def test_keys_colliding_with_codes(self):
+        """Test that data keys equal to short codes or the escape marker survive"""
+        form_data = build_form_data(1, 1)
+        inspection_data = form_data['kitchen_data']['kitchen_list'][0]['equipment_list'][0]['inspection_data']
+        inspection_data['cn'] = {'answer': 'Yes', 'comment': ''}
+        inspection_data['~x'] = {'answer': 'No', 'comment': 'c'}
+        self.assert_restores_same(form_data, decode_v2(encode_v2(form_data)))
+
+    def test_v1_links_still_decode(self):
+        """Test backward compatibility with existing base64 JSON links"""
+        form_data = build_form_data(1, 2)
+        self.assertEqual(decode_share_payload(encode_v1(form_data)), form_data)
+
+    def test_corrupted_payload(self):
+        """Test that damaged payloads raise ValueError"""
+        encoded = encode_v2(build_form_data(1, 1))
+        with self.assertRaises(ValueError):
+            decode_v2(encoded[:len(encoded) // 2])
+
+    def test_decompression_limit(self):
+        """Test that payloads expanding beyond the limit are rejected"""
+        bomb = zlib.compress(b'{"a":"' + b'x' * (3 * 1024 * 1024) + b'"}', 9, wbits=-15)
+        with self.assertRaises(ValueError):
+            decode_v2(V2_PREFIX + base64.urlsafe_b64encode(bomb).decode('ascii'))
+
+    def test_compression_ratio(self):
+        """Test v2 size against v1 on realistic multi-kitchen payloads"""
+        for kitchen_count, equipment_count in ((1, 3), (3, 4), (6, 6)):
+            form_data = build_form_data(kitchen_count, equipment_count)
+            v1_size = len(encode_v1(form_data))
+            v2_size = len(encode_v2(form_data))
+            logger.info(f"{kitchen_count} kitchen(s) x {equipment_count} equipment: "
+                        f"v1 {v1_size} chars, v2 {v2_size} chars ({v2_size / v1_size:.1%})")
+            self.assertLess(v2_size, v1_size * 0.2)
+
+    @patch('app.st')
+    def test_app_share_link_round_trip(self, mock_st):
+        """Test that links from encode_form_data_to_url pass the decoder's length limit"""
+        form_data = build_form_data(6, 6)
+        encoded = encode_form_data_to_url(form_data)
+        self.assertLessEqual(len(encoded), 10000)
+
+        decoded = decode_form_data_from_url(encoded)
+        mock_st.error.assert_not_called()
+        self.assert_restores_same(form_data, decoded)
+
+
+if __name__ == '__main__':
+    unittest.main()
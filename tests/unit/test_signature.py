@@ -0,0 +1,203 @@
+"""
+Unit tests for signature.py
+"""
+
+import logging
+import unittest
+import sys
+import os
+import json
+import time
+from io import BytesIO
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image, ImageDraw
+from docx import Document
+from docx.shared import Inches
+
+# Add the parent directory to the path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import signature
+from report_engine import create_general_service_report
+from share_codec import decode_share_payload, encode_v2
+from signature import (add_signature_picture, alpha_bbox, canvas_signature, canvas_strokes, clear_signature_cache,
+                       render_strokes, signature_image_bytes)
+from tests.fixtures import create_test_signature
+
+logger = logging.getLogger(__name__)
+
+
+def create_canvas(strokes, height=120, width=450):
+    """Build an st_canvas style RGBA array with black strokes given as (upper, lower, left, right) boxes"""
+    canvas = np.zeros((height, width, 4), dtype=np.uint8)
+    for upper, lower, left, right in strokes:
+        canvas[upper:lower, left:right] = (0, 0, 0, 255)
+    return canvas
+
+
+def freedraw_json(strokes, stroke_width=3):
+    """Build st_canvas json_data like fabric.js freedraw: 'M', then 'Q' curves, then a final 'L'"""
+    objects = []
+    for points in strokes:
+        path = [['M', *points[0]]]
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            path.append(['Q', x1, y1, (x1 + x2) / 2, (y1 + y2) / 2])
+        path.append(['L', *points[-1]])
+        objects.append({'type': 'path', 'strokeWidth': stroke_width, 'stroke': '#000000', 'path': path})
+    return {'version': '4.4.0', 'objects': objects + [{'type': 'rect', 'width': 10, 'height': 10}]}
+
+
+class TestSignature(unittest.TestCase):
+    """Test cases for signature canvas processing"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        clear_signature_cache()
+
+    def test_bbox_matches_pil(self):
+        """Test the NumPy bounding box against PIL's getbbox of the alpha channel"""
+        rng = np.random.default_rng(5)
+        for _ in range(20):
+            canvas = np.zeros((120, 450, 4), dtype=np.uint8)
+            points = rng.integers(0, (120, 450), size=(rng.integers(1, 6), 2))
+            canvas[points[:, 0], points[:, 1], 3] = rng.integers(1, 256)
+            expected = Image.fromarray(np.ascontiguousarray(canvas[:, :, 3]), 'L').getbbox()
+            self.assertEqual(alpha_bbox(canvas), expected)
+
+    def test_empty_canvas(self):
+        """Test that an untouched canvas is not a signature"""
+        self.assertIsNone(alpha_bbox(create_canvas([])))
+        self.assertIsNone(canvas_signature(create_canvas([])))
+        self.assertIsNone(canvas_signature(None))
+
+    def test_signature_is_cropped_onto_white(self):
+        """Test that the PNG holds only the strokes, on a white background, within the size limit"""
+        png = canvas_signature(create_canvas([(40, 60, 100, 350), (30, 90, 100, 110)]))
+        with Image.open(png) as image:
+            self.assertEqual(image.mode, 'RGB')
+            self.assertEqual(image.size, (200, 48))
+            self.assertEqual(image.getpixel((199, 0)), (255, 255, 255))
+            self.assertEqual(image.getpixel((1, 1)), (0, 0, 0))
+
+    def test_small_signature_is_not_enlarged(self):
+        """Test that signatures smaller than the limit keep their size"""
+        with Image.open(BytesIO(signature_image_bytes(create_canvas([(10, 30, 10, 60)])))) as image:
+            self.assertEqual(image.size, (50, 20))
+
+    def test_narrow_signature_is_padded(self):
+        """Test that a single vertical stroke is padded to the signature ratio, not printed inches tall"""
+        png = canvas_signature(create_canvas([(0, 120, 200, 206)]))
+        with Image.open(png) as image:
+            self.assertEqual(image.size, (200, 80))
+            self.assertEqual(image.getpixel((100, 40)), (0, 0, 0))
+            self.assertEqual(image.getpixel((0, 40)), (255, 255, 255))
+
+        doc = Document()
+        add_signature_picture(doc.add_paragraph().add_run(), png, Inches(2))
+        self.assertEqual(doc.inline_shapes[0].height, Inches(0.8))
+
+    def test_unchanged_canvas_is_processed_once(self):
+        """Test that reruns with the same drawing reuse the PNG, and a new stroke rebuilds it"""
+        canvas = create_canvas([(40, 60, 100, 350)])
+        with patch.object(signature, '_signature_png', wraps=signature._signature_png) as processed:
+            first = canvas_signature(canvas)
+            second = canvas_signature(canvas.copy())
+            self.assertEqual(processed.call_count, 1)
+            self.assertEqual(first.getvalue(), second.getvalue())
+
+            canvas[70:80, 100:120, 3] = 255
+            self.assertNotEqual(canvas_signature(canvas).getvalue(), first.getvalue())
+            self.assertEqual(processed.call_count, 2)
+
+    def test_rerun_cost(self):
+        """Test that checking an unchanged canvas on a rerun is cheap"""
+        canvas = create_canvas([(40, 60, 100, 350)], height=300, width=1200)
+        canvas_signature(canvas)
+        start = time.perf_counter()
+        for _ in range(100):
+            canvas_signature(canvas)
+        elapsed = (time.perf_counter() - start) / 100
+        logger.info(f"canvas_signature on an unchanged 1200x300 canvas: {elapsed * 1000:.2f} ms")
+        self.assertLess(elapsed, 0.005)
+
+
+class TestStrokeSignature(unittest.TestCase):
+    """Test cases for stroke list signatures"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        curve = [(60 + 4 * i, 60 + round(25 * np.sin(i / 6))) for i in range(60)]
+        self.json_data = freedraw_json([curve, [(100, 30), (300, 95)], [(380, 50)]])
+        self.signature = canvas_strokes(self.json_data, 450, 120)
+
+    def test_canvas_strokes(self):
+        """Test that freedraw paths become integer point lists and other objects are ignored"""
+        self.assertEqual(self.signature['size'], [450, 120])
+        self.assertEqual(len(self.signature['strokes']), 3)
+        self.assertEqual(self.signature['strokes'][1], [3, 100, 30, 200, 62, 300, 95])
+        self.assertEqual(self.signature['strokes'][2], [3, 380, 50])
+        self.assertIsNone(canvas_strokes({'version': '4.4.0', 'objects': []}, 450, 120))
+        self.assertIsNone(canvas_strokes(None, 450, 120))
+
+    def test_payload_is_compact(self):
+        """Test that the stroke list is much smaller than the bitmap PNG of the same drawing"""
+        canvas = np.zeros((120, 450, 4), dtype=np.uint8)
+        image = Image.fromarray(canvas, 'RGBA')
+        draw = ImageDraw.Draw(image)
+        for stroke in self.signature['strokes']:
+            draw.line(list(zip(stroke[1::2], stroke[2::2])), fill=(0, 0, 0, 255), width=3)
+        png = canvas_signature(np.asarray(image)).getvalue()
+        payload = json.dumps(self.signature, separators=(',', ':'))
+        logger.info(f"signature payload: {len(payload)} bytes of strokes, {len(png)} bytes of PNG")
+        self.assertLess(len(payload), len(png))
+
+    def test_rendered_at_print_resolution(self):
+        """Test that the strokes are rendered for the printed width, cropped to the strokes"""
+        with Image.open(BytesIO(render_strokes(self.signature, 2.0))) as image:
+            self.assertEqual(image.mode, 'L')
+            self.assertEqual(image.width, 600)
+            self.assertEqual(image.height, round(600 * (95 + 1.5 - (30 - 1.5)) / (380 + 1.5 - (60 - 1.5))))
+            self.assertEqual(round(image.info['dpi'][0]), 300)
+            self.assertEqual(image.getextrema(), (0, 255))
+
+    def test_tall_signature_fits_print_box(self):
+        """Test that a tall stroke is scaled to the height limit and centered, not to the print width"""
+        tall = {'size': [450, 120], 'strokes': [[3, 100, 10, 100, 110]]}
+        start = time.perf_counter()
+        png = render_strokes(tall, 2.0)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        with Image.open(BytesIO(png)) as image:
+            self.assertEqual(image.size, (600, 240))
+            self.assertEqual(image.getpixel((300, 120)), 0)
+            self.assertEqual(image.getpixel((0, 120)), 255)
+
+        doc = Document()
+        add_signature_picture(doc.add_paragraph().add_run(), tall, Inches(2))
+        self.assertEqual(doc.inline_shapes[0].height, Inches(0.8))
+
+    def test_add_signature_picture(self):
+        """Test that stroke and bitmap signatures are both embedded at the requested width"""
+        doc = Document()
+        add_signature_picture(doc.add_paragraph().add_run(), self.signature, Inches(2))
+        bitmap = create_test_signature()
+        bitmap.read()
+        add_signature_picture(doc.add_paragraph().add_run(), bitmap, Inches(1.5))
+        self.assertEqual([shape.width for shape in doc.inline_shapes], [Inches(2), Inches(1.5)])
+
+    def test_report_and_share_link(self):
+        """Test that a stroke signature survives a share link and prints in the report"""
+        form_data = {'basic_info': {'customer_name': 'SELA Company',
+                                    'signatures': {'technician': self.signature}}}
+        restored = decode_share_payload(encode_v2(form_data))
+        self.assertEqual(restored['basic_info']['signatures']['technician'], self.signature)
+
+        report = create_general_service_report({'customer_name': 'SELA Company',
+                                                'technician_signature': self.signature,
+                                                'customer_signature': create_test_signature()})
+        self.assertEqual(len(Document(report).inline_shapes), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
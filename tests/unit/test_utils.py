@@ -2,12 +2,20 @@
 Unit tests for utils.py
 """
 
+import logging
 import unittest
 import sys
 import os
+import time
 from unittest.mock import MagicMock, patch, Mock
 from io import BytesIO
 
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt, RGBColor
+
 # Add the parent directory to the path to import the modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
@@ -24,8 +32,70 @@ from utils import (
     style_heading,
     create_info_table,
     format_table_style_enhanced,
-    add_logo_to_doc
+    add_logo_to_doc,
+    set_cell_shading,
+    report_style,
+    INFO_LABEL_STYLE,
+    INFO_VALUE_STYLE,
+    TC_CELL_STYLE,
+    TC_TABLE_STYLE
 )
+from report_engine import format_tc_table
+
+logger = logging.getLogger(__name__)
+
+
+def format_tc_table_per_cell(table, is_header=False):
+    """format_tc_table as it was before table styles, building every element and run property per cell"""
+    tblBorders = OxmlElement('w:tblBorders')
+    for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
+        border = OxmlElement(f'w:{border_name}')
+        for attribute, value in (('val', 'single'), ('sz', '4'), ('space', '0'), ('color', '000000')):
+            border.set(qn(f'w:{attribute}'), value)
+        tblBorders.append(border)
+    table._tbl.tblPr.append(tblBorders)
+
+    for row_idx, row in enumerate(table.rows):
+        trHeight = OxmlElement('w:trHeight')
+        trHeight.set(qn('w:val'), '280')
+        trHeight.set(qn('w:hRule'), 'atLeast')
+        row._tr.get_or_add_trPr().append(trHeight)
+        for cell in row.cells:
+            tcPr = cell._tc.get_or_add_tcPr()
+            tcMar = OxmlElement('w:tcMar')
+            for margin_type, value in [('top', 0.02), ('left', 0.08), ('bottom', 0.02), ('right', 0.08)]:
+                margin = OxmlElement(f'w:{margin_type}')
+                margin.set(qn('w:w'), str(int(value * 1440)))
+                margin.set(qn('w:type'), 'dxa')
+                tcMar.append(margin)
+            tcPr.append(tcMar)
+            vAlign = OxmlElement('w:vAlign')
+            vAlign.set(qn('w:val'), 'center')
+            tcPr.append(vAlign)
+            header = is_header and row_idx == 0
+            if header:
+                shading = OxmlElement('w:shd')
+                shading.set(qn('w:fill'), '1F4788')
+                tcPr.append(shading)
+            for paragraph in cell.paragraphs:
+                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                paragraph.paragraph_format.space_before = Pt(0)
+                paragraph.paragraph_format.space_after = Pt(0)
+                paragraph.paragraph_format.line_spacing = 1.0
+                for run in paragraph.runs:
+                    if header:
+                        run.font.bold = True
+                        run.font.color.rgb = RGBColor(255, 255, 255)
+                    run.font.size = Pt(10 if header else 9)
+                    run.font.name = 'Arial'
+
+
+def filled_table(doc, rows=12, cols=7):
+    table = doc.add_table(rows=rows, cols=cols)
+    for row in table.rows:
+        for col_idx, cell in enumerate(row.cells):
+            cell.text = f"{col_idx * 10.5:.1f}"
+    return table
 
 
 class TestUtils(unittest.TestCase):
@@ -319,5 +389,92 @@ class TestUtilsIntegration(unittest.TestCase):
                 self.assertLessEqual(component, 255)
 
 
+class TestStyleFragments(unittest.TestCase):
+    """Test cases for the cached OXML style fragments"""
+
+    def test_fragments_are_copied_into_each_cell(self):
+        """Test that cells get their own copy of a cached fragment"""
+        table = Document().add_table(rows=1, cols=2)
+        first, second = table.rows[0].cells
+        for cell in (first, second):
+            set_cell_margins(cell, top=0.02, bottom=0.02)
+            set_cell_shading(cell, 'F5F5F5', val='clear', color='auto')
+        first_margins = first._tc.tcPr.find(qn('w:tcMar'))
+        self.assertIsNot(first_margins, second._tc.tcPr.find(qn('w:tcMar')))
+        first_margins[0].set(qn('w:w'), '0')
+        self.assertEqual(second._tc.tcPr.find(qn('w:tcMar'))[0].get(qn('w:w')), '28')
+        shading = second._tc.tcPr.find(qn('w:shd'))
+        self.assertEqual([shading.get(qn(f'w:{name}')) for name in ('val', 'color', 'fill')], ['clear', 'auto', 'F5F5F5'])
+
+    def test_tc_table_formatting_performance(self):
+        """Benchmark: format_tc_table with named styles against formatting every cell and run directly"""
+        doc = Document()
+        tables = [filled_table(doc) for _ in range(40)]
+        reference = [filled_table(doc) for _ in range(40)]
+
+        start = time.perf_counter()
+        for table in reference:
+            format_tc_table_per_cell(table, is_header=True)
+        per_cell = (time.perf_counter() - start) / len(reference)
+        start = time.perf_counter()
+        for table in tables:
+            format_tc_table(table, is_header=True)
+        styled = (time.perf_counter() - start) / len(tables)
+
+        per_cell_size, styled_size = len(reference[0]._tbl.xml), len(tables[0]._tbl.xml)
+        logger.info(f"format_tc_table 12x7: direct formatting {per_cell * 1000:.1f} ms / {per_cell_size} bytes, "
+                    f"named styles {styled * 1000:.1f} ms / {styled_size} bytes per table")
+        self.assertLess(styled, per_cell / 2)
+        self.assertLess(styled_size, per_cell_size / 2)
+
+
+class TestReportStyles(unittest.TestCase):
+    """Test cases for the named report styles"""
+
+    def test_styles_are_registered_once_per_document(self):
+        """Test that report styles are added on first use and then reused"""
+        doc = Document()
+        style = report_style(doc.part, TC_CELL_STYLE)
+        self.assertEqual(style.font.size, Pt(9))
+        self.assertEqual(style.font.name, 'Arial')
+        self.assertEqual(style.paragraph_format.space_after, Pt(0))
+        create_info_table(doc, [('Customer Name', 'SELA Company')])
+        names = [style.name for style in doc.styles]
+        self.assertEqual(names.count(TC_CELL_STYLE), 1)
+        self.assertEqual(names.count(INFO_LABEL_STYLE), 1)
+        self.assertIs(report_style(doc.part, TC_CELL_STYLE), style)
+
+    def test_template_styles_are_kept(self):
+        """Test that a style already defined in the template is not redefined"""
+        doc = Document()
+        doc.styles.add_style(INFO_VALUE_STYLE, 1).font.size = Pt(13)
+        table = create_info_table(doc, [('Customer Name', 'SELA Company')])
+        self.assertEqual(table.cell(0, 1).paragraphs[0].style.font.size, Pt(13))
+
+    def test_tables_reference_styles_instead_of_run_properties(self):
+        """Test that styled cells carry no run formatting of their own"""
+        doc = Document()
+        table = create_info_table(doc, [('Customer Name', 'SELA Company')])
+        label = table.cell(0, 0).paragraphs[0]
+        self.assertEqual(label.style.name, INFO_LABEL_STYLE)
+        self.assertTrue(label.style.font.bold)
+        self.assertIsNone(label.runs[0]._r.rPr)
+
+        tc_table = filled_table(doc, 2, 2)
+        format_tc_table(tc_table, is_header=True)
+        self.assertEqual(tc_table.style.name, TC_TABLE_STYLE)
+        self.assertIsNone(tc_table.cell(1, 1).paragraphs[0].runs[0]._r.rPr)
+        self.assertIsNotNone(tc_table.style.element.find(qn('w:tblPr')).find(qn('w:tblBorders')))
+
+    def test_style_heading_configures_each_style_once(self):
+        """Test that heading styles are set up on first use only"""
+        doc = Document()
+        first = doc.add_heading('1. GENERAL INFORMATION', level=1)
+        style_heading(first, level=1)
+        self.assertEqual(first.style.font.size, Pt(14))
+        first.style.font.size = Pt(16)
+        style_heading(doc.add_heading('2. EQUIPMENT', level=1), level=1)
+        self.assertEqual(first.style.font.size, Pt(16))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
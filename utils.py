@@ -5,14 +5,48 @@ Utility functions for the Service Reports application
 from docx.shared import Pt, RGBColor, Inches, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.enum.table import WD_ALIGN_VERTICAL, WD_TABLE_ALIGNMENT
+from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
+from functools import lru_cache
+import copy
 import os
+import weakref
 
 # Professional brand colors
 HALTON_BLUE = RGBColor(31, 71, 136)  # #1f4788
 HALTON_LIGHT_BLUE = RGBColor(44, 90, 160)  # #2c5aa0
 HALTON_DARK_GRAY = RGBColor(64, 64, 64)  # #404040
+WHITE = RGBColor(255, 255, 255)
+
+# Named styles added to each report document on first use. A letterhead template that
+# defines a style with the same name keeps its own definition.
+TC_TABLE_STYLE = 'Report TC Table'
+TC_HEADER_STYLE = 'Report TC Header'
+TC_CELL_STYLE = 'Report TC Cell'
+INFO_LABEL_STYLE = 'Report Info Label'
+INFO_VALUE_STYLE = 'Report Info Value'
+TABLE_HEADING_STYLE = 'Report Table Heading'
+TABLE_TEXT_STYLE = 'Report Table Text'
+HIGHLIGHT_STYLE = 'Report Highlight'
+
+# Paragraph styles; 'compact' removes paragraph spacing and uses single line spacing
+REPORT_PARAGRAPH_STYLES = {
+    TC_HEADER_STYLE: {'alignment': WD_ALIGN_PARAGRAPH.CENTER, 'compact': True,
+                      'font_name': 'Arial', 'size': Pt(10), 'bold': True, 'color': WHITE},
+    TC_CELL_STYLE: {'alignment': WD_ALIGN_PARAGRAPH.CENTER, 'compact': True, 'font_name': 'Arial', 'size': Pt(9)},
+    INFO_LABEL_STYLE: {'alignment': WD_ALIGN_PARAGRAPH.LEFT, 'size': Pt(11), 'bold': True, 'color': HALTON_DARK_GRAY},
+    INFO_VALUE_STYLE: {'alignment': WD_ALIGN_PARAGRAPH.LEFT, 'size': Pt(11)},
+    TABLE_HEADING_STYLE: {'font_name': 'Arial', 'size': Pt(11), 'bold': True},
+    TABLE_TEXT_STYLE: {'font_name': 'Arial', 'size': Pt(11)}
+}
+# Character styles
+REPORT_CHARACTER_STYLES = {
+    HIGHLIGHT_STYLE: {'bold': True, 'color': WHITE}  # Text on a blue cell background
+}
+# Table style of the T&C tables: black grid, compact cell margins (inches), vertically centered cells
+TC_TABLE_BORDERS = ('4', '000000')
+TC_TABLE_CELL_MARGINS = {'top': 0.02, 'left': 0.08, 'bottom': 0.02, 'right': 0.08}
 
 def add_header_with_logo(doc, logo_path=None):
     """
@@ -129,39 +163,197 @@ def add_page_number(paragraph):
     run._r.append(instrText)
     run._r.append(fldChar2)
 
-def set_cell_margins(cell, top=0, bottom=0, left=0.1, right=0.1):
-    """Set cell margins"""
-    tc = cell._tc
-    tcPr = tc.get_or_add_tcPr()
+# Each distinct border, shading and margin element is built once and deep-copied into cells,
+# which is several times faster than creating the OxmlElement tree again for every cell
+
+@lru_cache(maxsize=None)
+def _margins_fragment(top, bottom, left, right):
     tcMar = OxmlElement('w:tcMar')
-    
     for margin_type, value in [('top', top), ('left', left), ('bottom', bottom), ('right', right)]:
         margin = OxmlElement(f'w:{margin_type}')
         margin.set(qn('w:w'), str(int(value * 1440)))  # Convert inches to twips
         margin.set(qn('w:type'), 'dxa')
         tcMar.append(margin)
-    
-    tcPr.append(tcMar)
+    return tcMar
+
+@lru_cache(maxsize=None)
+def _shading_fragment(fill, val=None, color=None):
+    shd = OxmlElement('w:shd')
+    if val is not None:
+        shd.set(qn('w:val'), val)
+    if color is not None:
+        shd.set(qn('w:color'), color)
+    shd.set(qn('w:fill'), fill)
+    return shd
+
+@lru_cache(maxsize=None)
+def _children_fragment(tag, children):
+    """children is a tuple of (name, attributes) with attributes a tuple of (attribute, value) pairs"""
+    element = OxmlElement(tag)
+    for child_name, attributes in children:
+        child = OxmlElement(f'w:{child_name}')
+        for attribute, value in attributes:
+            child.set(qn(f'w:{attribute}'), value)
+        element.append(child)
+    return element
+
+@lru_cache(maxsize=None)
+def _property_fragment(tag, **attributes):
+    element = OxmlElement(tag)
+    for attribute, value in attributes.items():
+        element.set(qn(f'w:{attribute}'), value)
+    return element
+
+def set_cell_margins(cell, top=0, bottom=0, left=0.1, right=0.1):
+    """Set cell margins"""
+    cell._tc.get_or_add_tcPr().append(copy.deepcopy(_margins_fragment(top, bottom, left, right)))
+
+def set_cell_shading(cell, fill, val=None, color=None):
+    """Set a cell's background fill (val and color are only written when given)"""
+    cell._tc.get_or_add_tcPr().append(copy.deepcopy(_shading_fragment(fill, val, color)))
+
+def set_cell_background(cell, color):
+    """Set background color for a table cell"""
+    set_cell_shading(cell, color, val='clear', color='auto')
+
+def set_cell_vertical_alignment(cell, alignment='center'):
+    """Set a cell's vertical alignment"""
+    cell._tc.get_or_add_tcPr().append(copy.deepcopy(_property_fragment('w:vAlign', val=alignment)))
+
+def remove_cell_borders(cell):
+    """Hide all four borders of a cell"""
+    borders = tuple((name, (('val', 'nil'),)) for name in ('top', 'left', 'bottom', 'right'))
+    cell._tc.get_or_add_tcPr().append(copy.deepcopy(_children_fragment('w:tcBorders', borders)))
+
+def set_row_height(row, twips, rule='atLeast'):
+    """Set a table row's height in twips"""
+    row._tr.get_or_add_trPr().append(copy.deepcopy(_property_fragment('w:trHeight', val=str(twips), hRule=rule)))
+
+def set_table_borders(table, size='4', color='000000', replace=True):
+    """
+    Apply single borders around and inside a table
+
+    Args:
+        table: python-docx Table
+        size: Border width in eighths of a point
+        color: Border color as hex
+        replace: Remove borders already set on the table first
+    """
+    tblPr = table._tbl.tblPr
+    if replace:
+        for child in tblPr:
+            if child.tag.endswith('tblBorders'):
+                tblPr.remove(child)
+    borders = tuple((name, (('val', 'single'), ('sz', size), ('space', '0'), ('color', color)))
+                    for name in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV'))
+    tblPr.append(copy.deepcopy(_children_fragment('w:tblBorders', borders)))
+
+def _apply_font(font, size=None, bold=None, color=None, font_name=None):
+    if font_name is not None:
+        font.name = font_name
+    if size is not None:
+        font.size = size
+    if bold is not None:
+        font.bold = bold
+    if color is not None:
+        font.color.rgb = color
+
+def _add_report_styles(styles):
+    """Add the report styles that the document does not define yet"""
+    normal = styles['Normal'] if 'Normal' in styles else None
+    for name, definition in REPORT_PARAGRAPH_STYLES.items():
+        if name in styles:
+            continue
+        style = styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = normal
+        definition = dict(definition)
+        alignment = definition.pop('alignment', None)
+        if alignment is not None:
+            style.paragraph_format.alignment = alignment
+        if definition.pop('compact', False):
+            style.paragraph_format.space_before = Pt(0)
+            style.paragraph_format.space_after = Pt(0)
+            style.paragraph_format.line_spacing = 1.0
+        _apply_font(style.font, **definition)
+
+    for name, definition in REPORT_CHARACTER_STYLES.items():
+        if name not in styles:
+            _apply_font(styles.add_style(name, WD_STYLE_TYPE.CHARACTER).font, **definition)
+
+    if TC_TABLE_STYLE not in styles:
+        style = styles.add_style(TC_TABLE_STYLE, WD_STYLE_TYPE.TABLE)
+        if 'Normal Table' in styles:
+            style.base_style = styles['Normal Table']
+        size, color = TC_TABLE_BORDERS
+        borders = tuple((name, (('val', 'single'), ('sz', size), ('space', '0'), ('color', color)))
+                        for name in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV'))
+        margins = tuple((name, (('w', str(int(value * 1440))), ('type', 'dxa')))
+                        for name, value in TC_TABLE_CELL_MARGINS.items())
+        tblPr = OxmlElement('w:tblPr')
+        tblPr.append(copy.deepcopy(_children_fragment('w:tblBorders', borders)))
+        tblPr.append(copy.deepcopy(_children_fragment('w:tblCellMar', margins)))
+        tcPr = OxmlElement('w:tcPr')
+        tcPr.append(copy.deepcopy(_property_fragment('w:vAlign', val='center')))
+        style.element.append(tblPr)
+        style.element.append(tcPr)
+
+# document part -> {style name: style}, filled on first use
+_report_styles = weakref.WeakKeyDictionary()
+
+def report_style(part, name):
+    """
+    Return a named report style, adding the report styles to the document on first use
+
+    Args:
+        part: Part of the document (e.g. table.part or paragraph.part)
+        name: One of the *_STYLE names above
+    """
+    document_part = part.package.main_document_part
+    styles = _report_styles.get(document_part)
+    if styles is None:
+        _add_report_styles(document_part.styles)
+        styles = _report_styles[document_part] = {}
+    if name not in styles:
+        styles[name] = document_part.styles[name]
+    return styles[name]
+
+def set_paragraph_styles(cell, style):
+    """Give every paragraph of a table cell a paragraph style"""
+    # Set the style id directly: Paragraph.style looks up the default style on every assignment
+    style_id = style.style_id
+    for paragraph in cell.paragraphs:
+        paragraph._p.style = style_id
+
+def set_run_styles(cell, style):
+    """Give every run of a table cell a character style"""
+    style_id = style.style_id
+    for paragraph in cell.paragraphs:
+        for run in paragraph.runs:
+            run._r.style = style_id
+
+# document part -> names of the heading styles already configured
+_styled_headings = weakref.WeakKeyDictionary()
 
 def style_heading(heading, level=1):
-    """Apply consistent styling to headings"""
+    """Apply consistent styling to headings (each heading style is configured once per document)"""
+    configured = _styled_headings.setdefault(heading.part, set())
+    style = heading.style
+    if style.name in configured:
+        return
     if level == 0:  # Title
-        heading.style.font.size = Pt(20)
-        heading.style.font.color.rgb = HALTON_BLUE
-        heading.style.font.bold = True
+        _apply_font(style.font, size=Pt(20), bold=True, color=HALTON_BLUE)
     elif level == 1:  # Main sections
-        heading.style.font.size = Pt(14)
-        heading.style.font.color.rgb = HALTON_BLUE
-        heading.style.font.bold = True
+        _apply_font(style.font, size=Pt(14), bold=True, color=HALTON_BLUE)
     else:  # Subsections
-        heading.style.font.size = Pt(12)
-        heading.style.font.color.rgb = HALTON_DARK_GRAY
-        heading.style.font.bold = True
+        _apply_font(style.font, size=Pt(12), bold=True, color=HALTON_DARK_GRAY)
+    configured.add(style.name)
 
 def create_info_table(doc, data_rows, col_widths=[2.5, 4]):
     """Create a professionally formatted information table"""
     table = doc.add_table(rows=len(data_rows), cols=2)
     table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    label_style = report_style(table.part, INFO_LABEL_STYLE)
+    value_style = report_style(table.part, INFO_VALUE_STYLE)
     
     # Set column widths
     for i, width in enumerate(col_widths):
@@ -173,20 +365,12 @@ def create_info_table(doc, data_rows, col_widths=[2.5, 4]):
         # Label cell
         label_cell = table.cell(i, 0)
         label_cell.text = label
-        label_para = label_cell.paragraphs[0]
-        label_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        label_run = label_para.runs[0]
-        label_run.font.bold = True
-        label_run.font.size = Pt(11)
-        label_run.font.color.rgb = HALTON_DARK_GRAY
+        set_paragraph_styles(label_cell, label_style)
         
         # Value cell
         value_cell = table.cell(i, 1)
         value_cell.text = str(value) if value else ""
-        value_para = value_cell.paragraphs[0]
-        value_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        value_run = value_para.runs[0]
-        value_run.font.size = Pt(11)
+        set_paragraph_styles(value_cell, value_style)
         
         # Set cell margins
         set_cell_margins(label_cell)
@@ -195,13 +379,7 @@ def create_info_table(doc, data_rows, col_widths=[2.5, 4]):
         # Add subtle shading to alternate rows
         if i % 2 == 1:
             for cell in [label_cell, value_cell]:
-                tc = cell._tc
-                tcPr = tc.get_or_add_tcPr()
-                shd = OxmlElement('w:shd')
-                shd.set(qn('w:val'), 'clear')
-                shd.set(qn('w:color'), 'auto')
-                shd.set(qn('w:fill'), 'F5F5F5')
-                tcPr.append(shd)
+                set_cell_background(cell, 'F5F5F5')
     
     # Apply table borders
     format_table_style_enhanced(table)
@@ -218,28 +396,18 @@ def format_table_style_enhanced(table):
         if child.tag.endswith('tblBorders'):
             tblPr.remove(child)
     
-    # Create new borders
-    tblBorders = OxmlElement('w:tblBorders')
-    
-    # Define border styles
-    border_styles = {
-        'top': {'sz': '12', 'color': '1f4788'},
-        'bottom': {'sz': '12', 'color': '1f4788'},
-        'left': {'sz': '4', 'color': 'CCCCCC'},
-        'right': {'sz': '4', 'color': 'CCCCCC'},
-        'insideH': {'sz': '4', 'color': 'E0E0E0'},
-        'insideV': {'sz': '0', 'color': 'FFFFFF'}  # No vertical lines
-    }
-    
-    for border_name, style in border_styles.items():
-        border = OxmlElement(f'w:{border_name}')
-        border.set(qn('w:val'), 'single')
-        border.set(qn('w:sz'), style['sz'])
-        border.set(qn('w:space'), '0')
-        border.set(qn('w:color'), style['color'])
-        tblBorders.append(border)
-    
-    tblPr.append(tblBorders)
+    # Define border styles: (name, size, color)
+    border_styles = (
+        ('top', '12', '1f4788'),
+        ('bottom', '12', '1f4788'),
+        ('left', '4', 'CCCCCC'),
+        ('right', '4', 'CCCCCC'),
+        ('insideH', '4', 'E0E0E0'),
+        ('insideV', '0', 'FFFFFF')  # No vertical lines
+    )
+    borders = tuple((name, (('val', 'single'), ('sz', size), ('space', '0'), ('color', color)))
+                    for name, size, color in border_styles)
+    tblPr.append(copy.deepcopy(_children_fragment('w:tblBorders', borders)))
 
 def add_logo_to_doc(doc, logo_path=None):
     """Check for logo in assets folder and add to document"""